@@ -4,31 +4,167 @@ Main Flask Application - COMPLETE VERSION
 Windows-compatible backend with all features integrated
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
+from flask import (Flask, Blueprint, current_app, render_template, request, jsonify, session,
+                   redirect, url_for, send_file, send_from_directory, Response, stream_with_context,
+                   g, make_response)
+import gzip
+import json
+import mimetypes
 import os
+import random
+import re
+import secrets
+import time
+import zlib
 from datetime import datetime
 from functools import wraps
+from werkzeug.wsgi import ClosingIterator
 from config import *
+# Scanners and thumbnails are used as modules.<name>, so their heavy
+# dependencies load on the first scan rather than when the app starts
+import modules
 from modules import (
     validate_login, 
-    scan_domain, 
-    format_domain_report,
-    scan_ip, 
-    format_ip_report,
-    analyze_image, 
-    format_image_intel_report
+    check_session,
+    remove_report,
+    query_reports,
+    iter_reports,
+    ensure_index,
+    search_reports,
+    ensure_search_index,
+    unindex_report,
+    SearchQueryError,
+    has_structured,
+    rendered_gzip_path,
+    load_legacy_gzip,
+    iter_gunzip,
+    compact_reports,
+    report_stem,
+    REPORT_MIMETYPES,
+    iter_zip_export,
+    diff_reports,
+    diff_latest,
+    DiffError,
+    new_report_id,
+    submit_report,
+    wait_for_report,
+    timed,
+    inc,
+    observe,
+    render_prometheus,
+    new_request_id,
+    start_profile,
+    save_profile,
+    list_profiles,
+    profile_path,
+    single_flight,
+    scan_key,
+    register_job_type,
+    submit_job,
+    run_job,
+    cancel_job,
+    get_job,
+    list_jobs,
+    queue_stats,
+    start_scheduler,
+    emit_progress,
+    iter_job_events,
+    JobError,
+    PRIORITIES,
+    add_targets,
+    remove_targets,
+    list_watchlists,
+    list_targets,
+    target_state,
+    list_events,
+    refresh_target,
+    start_watchlist_dispatcher,
+    WatchlistError,
+    WATCH_JOB_TYPES,
+    admit,
+    release,
+    AdmissionDenied,
+    DISCLAIMERS,
+    parse_fields,
+    project,
+    compact,
+    dumps_compact,
+    build_assets,
+    asset_name,
+    asset_file,
+    start_threat_intel,
+    reload_threat_intel,
+    threat_intel_status,
+    match_indicator
 )
 
-# Initialize Flask app
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
-app.config['PERMANENT_SESSION_LIFETIME'] = PERMANENT_SESSION_LIFETIME
+# All routes live on this blueprint; create_app() builds the application
+bp = Blueprint('main', __name__, cli_group=None)
 
-# Ensure directories exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(REPORTS_FOLDER, exist_ok=True)
+
+# ═══════════════════════════════════════════════════════
+# REQUEST METRICS
+# ═══════════════════════════════════════════════════════
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@bp.before_app_request
+def ensure_scheduler():
+    # Worker pools, the watchlist dispatcher and the blocklist reloader start
+    # with the first request in each process (after any fork)
+    start_scheduler()
+    start_watchlist_dispatcher()
+    start_threat_intel()
+
+
+@bp.after_app_request
+def record_request_metrics(response):
+    """Count every request and time it (streamed bodies: until the response starts)"""
+    start = g.pop('request_start', None)
+    endpoint = request.endpoint or 'unmatched'
+    if start is not None:
+        observe('osint_http_request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+    inc('osint_http_requests_total', endpoint=endpoint, status=str(response.status_code))
+    return response
+
+
+# ═══════════════════════════════════════════════════════
+# RESPONSE COMPRESSION
+# ═══════════════════════════════════════════════════════
+
+def iter_gzip_chunks(chunks):
+    """gzip a streamed body, flushing after every chunk so each event arrives at once"""
+    compressor = zlib.compressobj(API_GZIP_LEVEL, zlib.DEFLATED, 31)   # 31: gzip container
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@bp.after_app_request
+def compress_scan_response(response):
+    """gzip /api/scan/* responses for clients that accept it"""
+    if (not request.path.startswith('/api/scan/') or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+    
+    if response.is_streamed:
+        chunks = response.response
+        response.response = ClosingIterator(iter_gzip_chunks(chunks), getattr(chunks, 'close', None))
+    else:
+        data = response.get_data()
+        if len(data) < API_GZIP_MIN_BYTES:
+            return response
+        response.set_data(gzip.compress(data, API_GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 
 # ═══════════════════════════════════════════════════════
@@ -43,11 +179,133 @@ def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not session.get('logged_in'):
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
 
 
+def profiled(f):
+    """
+    Run a scan request under the sampling profiler when asked to
+    Triggers: '?profile=1' from an admin session, or a random
+    PROFILE_SAMPLE_RATE share of requests; otherwise f runs untouched
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.args.get('profile') == '1' and check_session(session):
+            trigger = 'requested'
+        elif PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            trigger = 'sampled'
+        else:
+            return f(*args, **kwargs)
+        
+        request_id = re.sub(r'[^A-Za-z0-9]', '', request.headers.get('X-Request-ID', ''))[:32] or new_request_id()
+        # Run the scan job on this thread so the samples show the scan itself
+        g.profiling = True
+        start = time.perf_counter()
+        sampler = start_profile()
+        try:
+            response = make_response(f(*args, **kwargs))
+        finally:
+            sampler.stop()
+        
+        result = response.get_json(silent=True) or {}
+        profile_id = save_profile(sampler, {
+            'request_id': request_id,
+            'endpoint': request.endpoint,
+            'path': request.path,
+            'trigger': trigger,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+            'report_file': result.get('report_file'),
+            'timings': result.get('timings')
+        })
+        
+        response.headers['X-Request-ID'] = request_id
+        response.headers['X-Profile-ID'] = profile_id
+        return response
+    return decorated_function
+
+
+def admission_controlled(scan_type):
+    """
+    Decorator applying admission control to a scan endpoint
+    Over the session's rate or the scan type's in-flight cap, answers 429
+    with Retry-After without running the scan; otherwise the in-flight
+    slot is held until the response (streamed or not) is finished
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                slot_id = admit(scan_type, session_key())
+            except AdmissionDenied as e:
+                response = jsonify({
+                    'success': False,
+                    'message': str(e),
+                    'retry_after': e.retry_after
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            
+            try:
+                response = make_response(f(*args, **kwargs))
+            except BaseException:
+                release(slot_id)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: release(slot_id))
+            else:
+                release(slot_id)
+            return response
+        return decorated_function
+    return decorator
+
+
+def run_diff(args):
+    """
+    Resolve diff parameters from a query string
+    new (+ optional old) report filenames, or type + target for latest vs previous
+    """
+    if args.get('new'):
+        new = os.path.basename(args['new'])
+        old = os.path.basename(args['old']) if args.get('old') else None
+        for filename in (new, old):
+            if filename:
+                wait_for_report(filename)
+        return diff_reports(new, old)
+    if args.get('target'):
+        return diff_latest(args.get('type', 'domain'), args['target'].strip())
+    raise DiffError('Specify a report (new=...) or a target (type=...&target=...)')
+
+
+def shape_result(result, keep=('success',)):
+    """
+    Apply the request's 'fields' and 'compact' parameters to a scan result
+    fields=a,b.c keeps only those fields (plus keep); compact=1 sends codes
+    for the standard disclaimers (see /api/disclaimers) and leaves out
+    empty sections
+    """
+    fields = parse_fields(request.args.get('fields'))
+    if fields is not None:
+        fields.update(dict.fromkeys(keep))
+        result = project(result, fields)
+    if request.args.get('compact') == '1':
+        result = compact(result)
+    return result
+
+
+def scan_response(result):
+    """
+    JSON response for a finished scan, shaped by shape_result()
+    Compact responses also skip pretty-printing and key sorting
+    """
+    result = shape_result(result)
+    if request.args.get('compact') == '1':
+        return Response(dumps_compact(result), mimetype='application/json')
+    return jsonify(result)
+
+
 def allowed_file(filename):
     """
     Check if uploaded file has allowed extension
@@ -56,21 +314,205 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def clean_domain(domain):
+    """
+    Strip protocol, 'www.' and path from a submitted domain
+    """
+    domain = domain.strip().replace('http://', '').replace('https://', '')
+    domain = domain.replace('www.', '')
+    return domain.split('/')[0]
+
+
+def session_key():
+    """
+    Identify the requesting session for fair sharing of the scan queue
+    """
+    return session.get('session_id') or session.get('username') or 'anonymous'
+
+
+def save_upload(file):
+    """
+    Save an uploaded image under a unique name
+    Returns (safe_filename, report_id); the same ID names the report
+    """
+    report_id = new_report_id()
+    safe_filename = f"img_{report_id}_{file.filename}"
+    file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], safe_filename))
+    return safe_filename, report_id
+
+
+def thumbnail_urls(result):
+    """
+    Preview URLs for an image job result (empty if generation failed)
+    """
+    if not result.get('file_hash'):
+        return {}
+    return {
+        size: url_for('main.thumbnail', file_hash=result['file_hash'], size=size)
+        for size in THUMBNAIL_SIZES
+    }
+
+
+# ═══════════════════════════════════════════════════════
+# SCAN JOBS (run by the scheduler's worker pools)
+# ═══════════════════════════════════════════════════════
+
+def domain_job(domain, options):
+    """
+    Scan a domain and queue its report
+    options: stream (publish each section as a job progress event)
+    """
+    if options.get('stream'):
+        scan_result = None
+        for event in modules.iter_scan_domain(domain):
+            if event['event'] == 'result':
+                scan_result = event['result']
+            else:
+                emit_progress(event)
+        if scan_result is None:
+            raise JobError(f'Domain scan of {domain} ended without a result')
+    else:
+        scan_result = modules.scan_domain(domain)
+    
+    # Queue report for background persistence
+    report_filename = f"domain_{domain.replace('.', '_')}_{new_report_id()}.txt"
+    submit_report(report_filename, 'domain', domain, scan_result)
+    
+    scan_result['report_file'] = report_filename
+    return scan_result
+
+
+def ip_job(ip_address, options):
+    """
+    Scan an IP address and queue its report
+    """
+    scan_result = modules.scan_ip(ip_address)
+    
+    # Queue report for background persistence
+    report_filename = f"ip_{ip_address.replace('.', '-')}_{new_report_id()}.txt"
+    submit_report(report_filename, 'ip', ip_address, scan_result)
+    
+    scan_result['report_file'] = report_filename
+    return scan_result
+
+
+def image_job(safe_filename, options):
+    """
+    Analyze an uploaded image and queue its report
+    options: report_id (from save_upload)
+    """
+    filepath = os.path.join(UPLOAD_FOLDER, safe_filename)
+    
+    # Generate previews once at ingest, keyed by content hash
+    file_hash = None
+    timings = {}
+    try:
+        with timed(timings, 'thumbnails'):
+            file_hash = modules.content_hash(filepath)
+            modules.generate_thumbnails(filepath, file_hash)
+    except Exception as e:
+        print(f"Thumbnail generation failed: {str(e)}")
+    
+    # Perform image intelligence analysis
+    analysis_result = modules.analyze_image(filepath, TESSERACT_PATH)
+    analysis_result['timings'].update(timings)
+    
+    # Queue report for background persistence
+    report_filename = f"image_intel_{options['report_id']}.txt"
+    submit_report(report_filename, 'image', safe_filename, analysis_result)
+    
+    analysis_result['report_file'] = report_filename
+    analysis_result['uploaded_filename'] = safe_filename
+    analysis_result['file_hash'] = file_hash
+    return analysis_result
+
+
+def email_job(address, options):
+    """
+    Check one email address (no report: results are returned only)
+    options: verify (ask the mail server about the mailbox)
+    """
+    return modules.scan_email(address, verify=options.get('verify', True))
+
+
+def email_bulk_job(target, options):
+    """
+    Check a list of email addresses
+    options: addresses, verify
+    """
+    return modules.scan_emails(options['addresses'], verify=options.get('verify', True))
+
+
+def queue_domain_scans(domains, requester):
+    """
+    Batch domain scans (with reports) for the hosts a URL analysis passed through
+    Returns [{'domain', 'job_id'}]
+    """
+    domains = dict.fromkeys(clean_domain(domain) for domain in domains)
+    return [
+        {'domain': domain, 'job_id': submit_job('domain', domain, requester, 'batch')}
+        for domain in domains if domain
+    ]
+
+
+def url_job(url, options):
+    """
+    Analyze a URL (no report: results are returned only)
+    options: scan_domains (queue domain scans of the hosts on its redirect chain), requester
+    """
+    scan_result = modules.scan_url(url)
+    if options.get('scan_domains'):
+        scan_result['domain_jobs'] = queue_domain_scans(scan_result['domains'], options['requester'])
+    return scan_result
+
+
+def url_bulk_job(target, options):
+    """
+    Analyze a list of URLs
+    options: urls, scan_domains, requester
+    """
+    scan_result = modules.scan_urls(options['urls'])
+    if options.get('scan_domains'):
+        scan_result['domain_jobs'] = queue_domain_scans(scan_result['domains'], options['requester'])
+    return scan_result
+
+
+def watch_job(target, options):
+    """
+    Re-check the expired facets of a watched target
+    options: target_type, facets
+    """
+    return refresh_target(options['target_type'], target, options['facets'])
+
+
+register_job_type('domain', domain_job, pool='io', upstreams=('dns', 'whois'))
+register_job_type('ip', ip_job, pool='io', upstreams=('ip_api', 'ptr'))
+# Image jobs call Nominatim only for GPS-tagged images; that call is rate-limited
+# itself, so it does not hold an upstream slot for the whole (CPU-bound) job
+register_job_type('image', image_job, pool='cpu')
+register_job_type('email', email_job, pool='io', upstreams=('dns', 'smtp'))
+register_job_type('email_bulk', email_bulk_job, pool='io', upstreams=('dns', 'smtp'))
+register_job_type('url', url_job, pool='io', upstreams=('http',))
+register_job_type('url_bulk', url_bulk_job, pool='io', upstreams=('http',))
+for upstream, job_type in WATCH_JOB_TYPES.items():
+    register_job_type(job_type, watch_job, pool='io', upstreams=(upstream,))
+
+
 # ═══════════════════════════════════════════════════════
 # AUTHENTICATION ROUTES
 # ═══════════════════════════════════════════════════════
 
-@app.route('/')
+@bp.route('/')
 def index():
     """
     Root route - redirect based on authentication status
     """
     if session.get('logged_in'):
-        return redirect(url_for('dashboard'))
-    return redirect(url_for('login'))
+        return redirect(url_for('main.dashboard'))
+    return redirect(url_for('main.login'))
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     """
     Login page and authentication handler
@@ -78,7 +520,7 @@ def login():
     """
     # If already logged in, redirect to dashboard
     if session.get('logged_in'):
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     if request.method == 'POST':
         try:
@@ -93,6 +535,7 @@ def login():
                 # Set session variables
                 session['logged_in'] = True
                 session['username'] = auth_result['username']
+                session['session_id'] = secrets.token_hex(8)   # Fair sharing of the scan queue
                 session.permanent = True
                 
                 return jsonify({
@@ -115,20 +558,20 @@ def login():
     return render_template('login.html')
 
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """
     Logout handler - clears session and redirects to login
     """
     session.clear()
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 
 # ═══════════════════════════════════════════════════════
 # DASHBOARD ROUTES (PROTECTED)
 # ═══════════════════════════════════════════════════════
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     """
@@ -137,7 +580,7 @@ def dashboard():
     return render_template('dashboard.html', username=session.get('username'))
 
 
-@app.route('/domain-scan')
+@bp.route('/domain-scan')
 @login_required
 def domain_scan_page():
     """
@@ -146,7 +589,7 @@ def domain_scan_page():
     return render_template('domain_scan.html', username=session.get('username'))
 
 
-@app.route('/ip-scan')
+@bp.route('/ip-scan')
 @login_required
 def ip_scan_page():
     """
@@ -155,7 +598,7 @@ def ip_scan_page():
     return render_template('ip_scan.html', username=session.get('username'))
 
 
-@app.route('/image-intel')
+@bp.route('/image-intel')
 @login_required
 def image_intel_page():
     """
@@ -164,28 +607,78 @@ def image_intel_page():
     return render_template('image_intel.html', username=session.get('username'))
 
 
-@app.route('/reports')
+@bp.route('/reports')
 @login_required
 def reports_page():
     """
     Reports page - lists all generated reports
     """
-    reports = []
+    filters = {
+        'report_type': request.args.get('type', ''),
+        'target': request.args.get('target', '').strip(),
+        'sort': request.args.get('sort', 'newest'),
+        'date_from': request.args.get('from', ''),
+        'date_to': request.args.get('to', '')
+    }
+    # The page number is only displayed; pages continue from a cursor
+    page = max(request.args.get('page', 1, type=int), 1)
+    result = {'reports': [], 'has_next': False, 'has_prev': False, 'next_cursor': None, 'prev_cursor': None}
     
     try:
-        if os.path.exists(REPORTS_FOLDER):
-            # Get all .txt files in reports folder
-            all_files = os.listdir(REPORTS_FOLDER)
-            reports = [f for f in all_files if f.endswith('.txt')]
-            # Sort by modification time (most recent first)
-            reports.sort(key=lambda x: os.path.getmtime(os.path.join(REPORTS_FOLDER, x)), reverse=True)
+        # Keyset-paginated query against the report index (no directory listing)
+        result = query_reports(after=request.args.get('after') or None,
+                               before=request.args.get('before') or None, **filters)
     except Exception as e:
         print(f"Error loading reports: {str(e)}")
     
-    return render_template('reports.html', username=session.get('username'), reports=reports)
+    return render_template('reports.html', username=session.get('username'),
+                           filters=filters, page=page, **result)
+
+
+@bp.route('/reports/diff')
+@login_required
+def report_diff_page():
+    """
+    Scan diff page - changes between two scans of the same target
+    """
+    diff, error = None, None
+    try:
+        diff = run_diff(request.args)
+    except DiffError as e:
+        error = str(e)
+    
+    return render_template('report_diff.html', username=session.get('username'),
+                           diff=diff, error=error)
+
+
+@bp.route('/profiles')
+@login_required
+def profiles_page():
+    """
+    Recent request profiles (admin only)
+    """
+    if not check_session(session):
+        return "Forbidden", 403
+    return render_template('profiles.html', username=session.get('username'),
+                           profiles=list_profiles())
+
+
+@bp.route('/profiles/<profile_id>.folded')
+@login_required
+def download_profile(profile_id):
+    """
+    Download a profile in collapsed-stack format (flamegraph input)
+    """
+    if not check_session(session):
+        return "Forbidden", 403
+    path = profile_path(profile_id)
+    if not path:
+        return "Profile not found", 404
+    return send_file(path, mimetype='text/plain', as_attachment=True,
+                     download_name=f'{profile_id}.folded')
 
 
-@app.route('/creator')
+@bp.route('/creator')
 @login_required
 def creator_page():
     """
@@ -198,13 +691,16 @@ def creator_page():
 # API ENDPOINTS - OSINT SCANNING
 # ═══════════════════════════════════════════════════════
 
-@app.route('/api/scan/domain', methods=['POST'])
+@bp.route('/api/scan/domain', methods=['POST'])
 @login_required
+@admission_controlled('domain')
+@profiled
 def api_scan_domain():
     """
     API endpoint for domain scanning
     Accepts JSON with 'domain' field
     Returns scan results and generates report
+    Query: fields=a,b.c (sparse fields), compact=1 (see shape_result)
     """
     try:
         data = request.get_json()
@@ -216,27 +712,19 @@ def api_scan_domain():
                 'message': 'Domain is required'
             })
         
-        # Remove protocol if present
-        domain = domain.replace('http://', '').replace('https://', '')
-        domain = domain.replace('www.', '')
-        domain = domain.split('/')[0]  # Remove path if present
-        
-        # Perform domain scan
-        scan_result = scan_domain(domain)
-        
-        # Generate report file
-        report_content = format_domain_report(scan_result)
-        report_filename = f"domain_{domain.replace('.', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        report_path = os.path.join(REPORTS_FOLDER, report_filename)
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        # Remove protocol, 'www.' and path if present
+        domain = clean_domain(domain)
         
-        # Add report filename to result
-        scan_result['report_file'] = report_filename
+        # Run as an interactive job; concurrent requests for the same domain share it
+        requester = session_key()
+        scan_result, coalesced = single_flight(
+            'domain', scan_key('domain', domain),
+            lambda: run_job('domain', domain, requester, inline=g.get('profiling', False))
+        )
+        scan_result['coalesced'] = coalesced
         scan_result['success'] = True
         
-        return jsonify(scan_result)
+        return scan_response(scan_result)
     
     except Exception as e:
         return jsonify({
@@ -245,13 +733,77 @@ def api_scan_domain():
         })
 
 
-@app.route('/api/scan/ip', methods=['POST'])
+@bp.route('/api/scan/domain/stream', methods=['POST'])
 @login_required
+@admission_controlled('domain')
+def api_scan_domain_stream():
+    """
+    Streaming domain scan (NDJSON, one JSON object per line)
+    Accepts JSON with 'domain' field
+    Emits {'event': 'ip'}, one {'event': 'dns'} per record type and
+    {'event': 'whois'} as each lookup resolves, then {'event': 'result'}
+    with the full result and report file, or {'event': 'error'}
+    'fields' applies to the result event, 'compact' to every event
+    """
+    data = request.get_json(silent=True) or {}
+    domain = clean_domain(data.get('domain', ''))
+    
+    if not domain:
+        return jsonify({
+            'success': False,
+            'message': 'Domain is required'
+        })
+    
+    job_id = submit_job('domain', domain, session_key(), 'interactive', {'stream': True})
+    compact_events = request.args.get('compact') == '1'
+    
+    def encode(event):
+        if compact_events:
+            return dumps_compact(compact(event)) + '\n'
+        return json.dumps(event, default=str) + '\n'
+    
+    def generate():
+        try:
+            for event in iter_job_events(job_id):
+                yield encode(event)
+            job = get_job(job_id)
+            if job['status'] != 'done':
+                raise JobError(job['error'] or f"Job {job['status']}")
+            scan_result = job['result']
+            scan_result['success'] = True
+            yield encode(shape_result({'event': 'result', **scan_result}, keep=('event', 'success')))
+        except Exception as e:
+            yield json.dumps({'event': 'error', 'success': False, 'message': f'Scan error: {str(e)}'}) + '\n'
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'   # Stop reverse proxies buffering the stream
+    return response
+
+
+@bp.route('/api/disclaimers')
+@login_required
+def api_disclaimers():
+    """
+    Standard disclaimer, limitation and analyst-note texts by code
+    (compact scan responses carry the codes)
+    """
+    return jsonify({
+        'success': True,
+        'disclaimers': DISCLAIMERS
+    })
+
+
+@bp.route('/api/scan/ip', methods=['POST'])
+@login_required
+@admission_controlled('ip')
+@profiled
 def api_scan_ip():
     """
     API endpoint for IP scanning
     Accepts JSON with 'ip' field
     Returns scan results and generates report
+    Query: fields=a,b.c (sparse fields), compact=1 (see shape_result)
     """
     try:
         data = request.get_json()
@@ -263,22 +815,132 @@ def api_scan_ip():
                 'message': 'IP address is required'
             })
         
-        # Perform IP scan
-        scan_result = scan_ip(ip_address)
+        # Run as an interactive job; concurrent requests for the same address share it
+        requester = session_key()
+        scan_result, coalesced = single_flight(
+            'ip', scan_key('ip', ip_address),
+            lambda: run_job('ip', ip_address, requester, inline=g.get('profiling', False))
+        )
+        scan_result['coalesced'] = coalesced
+        scan_result['success'] = True
         
-        # Generate report file
-        report_content = format_ip_report(scan_result)
-        report_filename = f"ip_{ip_address.replace('.', '-')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        report_path = os.path.join(REPORTS_FOLDER, report_filename)
+        return scan_response(scan_result)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Scan error: {str(e)}'
+        })
+
+
+@bp.route('/api/scan/email', methods=['POST'])
+@login_required
+@admission_controlled('email')
+@profiled
+def api_scan_email():
+    """
+    API endpoint for email address checks
+    Accepts JSON with 'email' and optional 'verify' (default true: ask
+    the mail server whether the mailbox exists)
+    Query: fields=a,b.c (sparse fields), compact=1 (see shape_result)
+    """
+    try:
+        data = request.get_json()
+        address = data.get('email', '').strip()
+        verify = bool(data.get('verify', True))
+        
+        if not address:
+            return jsonify({
+                'success': False,
+                'message': 'Email address is required'
+            })
+        
+        # Run as an interactive job; concurrent requests for the same address share it
+        requester = session_key()
+        scan_result, coalesced = single_flight(
+            'email', scan_key('email', address, verify=verify),
+            lambda: run_job('email', address, requester, options={'verify': verify},
+                            inline=g.get('profiling', False))
+        )
+        scan_result['coalesced'] = coalesced
+        scan_result['success'] = True
+        
+        return scan_response(scan_result)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Scan error: {str(e)}'
+        })
+
+
+@bp.route('/api/scan/email/bulk', methods=['POST'])
+@login_required
+@admission_controlled('email_bulk')
+def api_scan_email_bulk():
+    """
+    Queue a check of many email addresses
+    Accepts JSON with 'emails' (list, at most EMAIL_BULK_MAX) and optional 'verify'
+    Returns 202 with the job; its result (GET status_url) has one entry
+    per unique address and a count per status
+    """
+    data = request.get_json(silent=True) or {}
+    addresses = data.get('emails')
+    if not isinstance(addresses, list) or not addresses:
+        return jsonify({
+            'success': False,
+            'message': 'emails (a list of addresses) is required'
+        }), 400
+    if len(addresses) > EMAIL_BULK_MAX:
+        return jsonify({
+            'success': False,
+            'message': f'At most {EMAIL_BULK_MAX} addresses per request'
+        }), 400
+    
+    addresses = [str(address).strip() for address in addresses]
+    job_id = submit_job('email_bulk', f'{len(addresses)} addresses', session_key(), 'batch',
+                        {'addresses': addresses, 'verify': bool(data.get('verify', True))})
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('main.api_job_status', job_id=job_id)
+    }), 202
+
+
+@bp.route('/api/scan/url', methods=['POST'])
+@login_required
+@admission_controlled('url')
+@profiled
+def api_scan_url():
+    """
+    API endpoint for URL analysis
+    Accepts JSON with 'url' and optional 'scan_domains' (default true:
+    queue a domain scan for every host on the redirect chain; their job
+    IDs are returned in 'domain_jobs')
+    Query: fields=a,b.c (sparse fields), compact=1 (see shape_result)
+    """
+    try:
+        data = request.get_json()
+        url = data.get('url', '').strip()
+        scan_domains = bool(data.get('scan_domains', True))
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        if not url:
+            return jsonify({
+                'success': False,
+                'message': 'URL is required'
+            })
         
-        # Add report filename to result
-        scan_result['report_file'] = report_filename
+        # Run as an interactive job; concurrent requests for the same URL share it
+        requester = session_key()
+        scan_result, coalesced = single_flight(
+            'url', scan_key('url', url, scan_domains=scan_domains),
+            lambda: run_job('url', url, requester, options={'scan_domains': scan_domains, 'requester': requester},
+                            inline=g.get('profiling', False))
+        )
+        scan_result['coalesced'] = coalesced
         scan_result['success'] = True
         
-        return jsonify(scan_result)
+        return scan_response(scan_result)
     
     except Exception as e:
         return jsonify({
@@ -287,13 +949,51 @@ def api_scan_ip():
         })
 
 
-@app.route('/api/scan/image', methods=['POST'])
+@bp.route('/api/scan/url/bulk', methods=['POST'])
+@login_required
+@admission_controlled('url_bulk')
+def api_scan_url_bulk():
+    """
+    Queue an analysis of many URLs
+    Accepts JSON with 'urls' (list, at most URL_BULK_MAX) and optional 'scan_domains'
+    Returns 202 with the job; its result (GET status_url) has a summary
+    per unique URL, a count per status and every domain seen
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls:
+        return jsonify({
+            'success': False,
+            'message': 'urls (a list of URLs) is required'
+        }), 400
+    if len(urls) > URL_BULK_MAX:
+        return jsonify({
+            'success': False,
+            'message': f'At most {URL_BULK_MAX} URLs per request'
+        }), 400
+    
+    requester = session_key()
+    urls = [str(url).strip() for url in urls]
+    job_id = submit_job('url_bulk', f'{len(urls)} URLs', requester, 'batch',
+                        {'urls': urls, 'scan_domains': bool(data.get('scan_domains', True)),
+                         'requester': requester})
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('main.api_job_status', job_id=job_id)
+    }), 202
+
+
+@bp.route('/api/scan/image', methods=['POST'])
 @login_required
+@admission_controlled('image')
+@profiled
 def api_scan_image():
     """
     API endpoint for image intelligence analysis
     Accepts multipart/form-data with 'image' file
     Returns analysis results and generates report
+    Query: fields=a,b.c (sparse fields), compact=1 (see shape_result)
     """
     try:
         # Check if file was uploaded
@@ -318,31 +1018,16 @@ def api_scan_image():
                 'message': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
             })
         
-        # Generate unique filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_filename = f"img_{timestamp}_{file.filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
-        
-        # Save uploaded file
-        file.save(filepath)
-        
-        # Perform image intelligence analysis
-        analysis_result = analyze_image(filepath, TESSERACT_PATH)
-        
-        # Generate report
-        report_content = format_image_intel_report(analysis_result)
-        report_filename = f"image_intel_{timestamp}.txt"
-        report_path = os.path.join(REPORTS_FOLDER, report_filename)
+        # Save uploaded file under a unique name
+        safe_filename, report_id = save_upload(file)
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-        
-        # Add report filename to result
-        analysis_result['report_file'] = report_filename
+        # Thumbnails, analysis and report run as an interactive job on the CPU pool
+        analysis_result = run_job('image', safe_filename, session_key(), options={'report_id': report_id},
+                                  inline=g.get('profiling', False))
         analysis_result['success'] = True
-        analysis_result['uploaded_filename'] = safe_filename
+        analysis_result['thumbnails'] = thumbnail_urls(analysis_result)
         
-        return jsonify(analysis_result)
+        return scan_response(analysis_result)
     
     except Exception as e:
         return jsonify({
@@ -352,15 +1037,455 @@ def api_scan_image():
         })
 
 
+@bp.route('/api/reports/search')
+@login_required
+def api_search_reports():
+    """
+    Full-text search across all reports
+    Query string: q (search syntax), limit, offset
+    """
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 25, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    if not query:
+        return jsonify({
+            'success': False,
+            'message': 'Search query is required'
+        })
+    
+    try:
+        results = search_reports(query, limit=limit, offset=offset)
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': results,
+            'has_more': len(results) == limit
+        })
+    except SearchQueryError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+
+@bp.route('/api/reports/diff')
+@login_required
+def api_diff_reports():
+    """
+    Compare two stored scans of the same target field by field
+    Query string: new=<filename>[&old=<filename>] or type=domain|ip|image&target=<target>
+    Without 'old', the previous scan of the same target is used
+    """
+    try:
+        diff = run_diff(request.args)
+        diff['success'] = True
+        return jsonify(diff)
+    except DiffError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+
+@bp.route('/api/reports/export', methods=['GET', 'POST'])
+@login_required
+def export_reports():
+    """
+    Bulk export reports as one streamed ZIP
+    GET query string: format, type, target, from, to (YYYY-MM-DD),
+    and/or repeated filename=... for an explicit list
+    POST JSON: the same keys, with 'filenames' as a list
+    The archive is generated while it is sent; nothing is buffered
+    """
+    if request.method == 'POST':
+        params = request.get_json(silent=True) or {}
+        filenames = params.get('filenames')
+    else:
+        params = request.args
+        filenames = request.args.getlist('filename') or None
+    
+    fmt = params.get('format', 'txt')
+    if fmt not in REPORT_MIMETYPES:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid report format'
+        }), 400
+    
+    if filenames is not None:
+        if not isinstance(filenames, list) or not filenames:
+            return jsonify({
+                'success': False,
+                'message': 'filenames must be a non-empty list'
+            }), 400
+        filenames = [os.path.basename(str(name)) for name in filenames]
+    
+    try:
+        reports = iter_reports(
+            report_type=params.get('type') or None,
+            target=(params.get('target') or '').strip() or None,
+            date_from=params.get('from') or None,
+            date_to=params.get('to') or None,
+            filenames=filenames
+        )
+        # Start the query now so a bad date is reported before streaming begins
+        first = next(reports, None)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Dates must be in YYYY-MM-DD format'
+        }), 400
+    
+    if first is None:
+        return jsonify({
+            'success': False,
+            'message': 'No reports match the export filter'
+        }), 404
+    
+    def all_reports():
+        yield first
+        yield from reports
+    
+    response = Response(stream_with_context(iter_zip_export(all_reports(), fmt)),
+                        mimetype='application/zip')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="reports_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip"'
+    )
+    return response
+
+
+# ═══════════════════════════════════════════════════════
+# API ENDPOINTS - SCAN JOB QUEUE
+# ═══════════════════════════════════════════════════════
+
+@bp.route('/api/jobs', methods=['POST'])
+@login_required
+def api_submit_jobs():
+    """
+    Queue scans without waiting for them
+    JSON: type (domain|ip), target or targets (list), priority (batch|interactive, default batch)
+    multipart/form-data: type=image, priority, one or more 'image' files
+    Returns 202 with a job ID and status URL per target
+    """
+    if request.files:
+        params = request.form
+        scan_type = params.get('type', 'image')
+    else:
+        params = request.get_json(silent=True) or {}
+        scan_type = params.get('type')
+    priority = params.get('priority', 'batch')
+    
+    if priority not in PRIORITIES:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid priority. Allowed: {", ".join(PRIORITIES)}'
+        }), 400
+    
+    jobs = []
+    if scan_type == 'image':
+        files = request.files.getlist('image')
+        if not files or any(not allowed_file(file.filename) for file in files):
+            return jsonify({
+                'success': False,
+                'message': f'Upload one or more images. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+            }), 400
+        for file in files:
+            safe_filename, report_id = save_upload(file)
+            jobs.append((safe_filename, {'report_id': report_id}))
+    elif scan_type in ('domain', 'ip'):
+        targets = params.get('targets') or [params.get('target', '')]
+        if not isinstance(targets, list):
+            targets = [targets]
+        targets = [str(target).strip() for target in targets]
+        if scan_type == 'domain':
+            targets = [clean_domain(target) for target in targets]
+        if not all(targets):
+            return jsonify({
+                'success': False,
+                'message': 'target or targets is required'
+            }), 400
+        jobs = [(target, None) for target in targets]
+    else:
+        return jsonify({
+            'success': False,
+            'message': 'type must be domain, ip or image'
+        }), 400
+    
+    requester = session_key()
+    submitted = []
+    for target, options in jobs:
+        job_id = submit_job(scan_type, target, requester, priority, options)
+        submitted.append({
+            'job_id': job_id,
+            'target': target,
+            'status_url': url_for('main.api_job_status', job_id=job_id)
+        })
+    
+    return jsonify({
+        'success': True,
+        'jobs': submitted
+    }), 202
+
+
+@bp.route('/api/jobs')
+@login_required
+def api_list_jobs():
+    """
+    This session's recent jobs and queue depth per pool
+    Query string: limit (default 50)
+    """
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    return jsonify({
+        'success': True,
+        'jobs': list_jobs(session_key(), limit=limit),
+        'queue': queue_stats()
+    })
+
+
+@bp.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+@login_required
+def api_job_status(job_id):
+    """
+    Job status: queued (with queue_position), running, done (with result),
+    failed (with error) or cancelled
+    DELETE cancels a job that has not started yet
+    """
+    if request.method == 'DELETE':
+        if not cancel_job(job_id):
+            return jsonify({
+                'success': False,
+                'message': 'Job not found or already started'
+            }), 409
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'cancelled'
+        })
+    
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found'
+        }), 404
+    
+    if job['scan_type'] == 'image' and job['result']:
+        job['result']['thumbnails'] = thumbnail_urls(job['result'])
+    job['success'] = True
+    return jsonify(job)
+
+
+# ═══════════════════════════════════════════════════════
+# API ENDPOINTS - WATCHLISTS
+# ═══════════════════════════════════════════════════════
+
+@bp.route('/api/watchlists')
+@login_required
+def api_list_watchlists():
+    """
+    All watchlists with their target counts
+    """
+    return jsonify({
+        'success': True,
+        'watchlists': list_watchlists()
+    })
+
+
+@bp.route('/api/watchlists/<name>', methods=['GET', 'POST', 'DELETE'])
+@login_required
+def api_watchlist(name):
+    """
+    GET: one page of targets (query string: limit, offset)
+    POST JSON: type (domain|ip), targets (list) - adds them, creating the list
+    DELETE: the whole watchlist, or with JSON type + targets just those targets
+    """
+    try:
+        if request.method == 'GET':
+            limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+            offset = max(request.args.get('offset', 0, type=int), 0)
+            targets = list_targets(name, limit=limit, offset=offset)
+            return jsonify({
+                'success': True,
+                'name': name,
+                'targets': targets,
+                'has_more': len(targets) == limit
+            })
+        
+        params = request.get_json(silent=True) or {}
+        targets = params.get('targets')
+        if targets is not None and not isinstance(targets, list):
+            targets = [targets]
+        
+        if request.method == 'DELETE':
+            remove_targets(name, params.get('type'), targets)
+            return jsonify({
+                'success': True,
+                'name': name
+            })
+        
+        if not targets:
+            raise WatchlistError('targets is required')
+        added = add_targets(name, params.get('type', 'domain'), targets)
+        return jsonify({
+            'success': True,
+            'name': name,
+            'added': added
+        })
+    
+    except WatchlistError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404 if 'not found' in str(e) else 400
+
+
+@bp.route('/api/watchlist-events')
+@login_required
+def api_watchlist_events():
+    """
+    Change events, oldest first
+    Query string: since (last event_id seen), watchlist, limit
+    """
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    events = list_events(since=request.args.get('since', 0, type=int),
+                         name=request.args.get('watchlist') or None, limit=limit)
+    return jsonify({
+        'success': True,
+        'events': events,
+        'last_event_id': events[-1]['event_id'] if events else request.args.get('since', 0, type=int)
+    })
+
+
+@bp.route('/api/watchlist-state')
+@login_required
+def api_watchlist_state():
+    """
+    Latest value and schedule of each facet of a watched target
+    Query string: type (domain|ip), target
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'facets': target_state(request.args.get('type', 'domain'), request.args.get('target', ''))
+        })
+    except WatchlistError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+
+# ═══════════════════════════════════════════════════════
+# API ENDPOINTS - THREAT INTELLIGENCE
+# ═══════════════════════════════════════════════════════
+
+@bp.route('/api/threat-intel')
+@login_required
+def api_threat_intel():
+    """
+    Blocklists in use: per-list entry counts and when they were loaded
+    """
+    return jsonify({
+        'success': True,
+        **threat_intel_status()
+    })
+
+
+@bp.route('/api/threat-intel/reload', methods=['POST'])
+@login_required
+def api_threat_intel_reload():
+    """
+    Reload the blocklists now instead of at the next change check
+    """
+    return jsonify({
+        'success': True,
+        **reload_threat_intel(force=True)
+    })
+
+
+@bp.route('/api/threat-intel/match')
+@login_required
+def api_threat_intel_match():
+    """
+    Blocklist matches for one indicator (IP address, domain or file hash)
+    Query string: indicator
+    """
+    indicator = request.args.get('indicator', '').strip()
+    if not indicator:
+        return jsonify({
+            'success': False,
+            'message': 'indicator is required'
+        }), 400
+    matches = match_indicator(indicator)
+    return jsonify({
+        'success': True,
+        'indicator': indicator,
+        'matched': bool(matches),
+        'matches': matches
+    })
+
+
 # ═══════════════════════════════════════════════════════
 # UTILITY ROUTES
 # ═══════════════════════════════════════════════════════
 
-@app.route('/download-report/<filename>')
+@bp.app_url_defaults
+def fingerprint_static_urls(endpoint, values):
+    """url_for('static', filename=...) links to the fingerprinted copy"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = asset_name(values['filename'])
+
+
+def static_file(filename):
+    """
+    Static files (the app's 'static' endpoint)
+    Fingerprinted names, which url_for('static') produces, are served
+    precompressed when the client accepts it and cached as immutable;
+    plain names are served from STATIC_FOLDER with revalidation
+    """
+    found = asset_file(filename, lambda encoding: request.accept_encodings[encoding])
+    if found is None:
+        return send_from_directory(STATIC_FOLDER, filename)
+    
+    name, encoding = found
+    response = send_from_directory(ASSET_FOLDER, name, max_age=ASSET_MAX_AGE,
+                                   mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if os.path.splitext(filename)[1].lower() in ASSET_COMPRESS_EXTENSIONS:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+def gzip_response(source, mimetype, download_name):
+    """
+    Serve pre-encoded gzip data (a .gz path or gzip bytes)
+    Clients that accept gzip get the stored bytes as-is; others get a
+    streamed decompression of the same data
+    """
+    if request.accept_encodings['gzip']:
+        if isinstance(source, str):
+            response = send_file(source, mimetype=mimetype, conditional=True)
+        else:
+            response = Response(source, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(iter_gunzip(source), mimetype=mimetype)
+    
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@bp.route('/download-report/<filename>')
 @login_required
 def download_report(filename):
     """
     Download generated report
+    Query string: format=txt|json|csv (default txt)
+    Structured reports are rendered and gzipped once, then served
+    pre-encoded; legacy text-only reports are served from disk or archive
     Validates filename to prevent directory traversal attacks
     """
     try:
@@ -370,19 +1495,68 @@ def download_report(filename):
         
         # Remove any path components
         filename = os.path.basename(filename)
+        fmt = request.args.get('format', 'txt')
+        
+        if fmt not in REPORT_MIMETYPES:
+            return "Invalid report format", 400
+        
+        # A report requested right after its scan may still be queued for writing
+        wait_for_report(filename)
+        
+        if has_structured(filename):
+            return gzip_response(rendered_gzip_path(filename, fmt), REPORT_MIMETYPES[fmt],
+                                 f"{report_stem(filename)}.{fmt}")
         
         report_path = os.path.join(REPORTS_FOLDER, filename)
+        legacy_gzip = None if os.path.isfile(report_path) else load_legacy_gzip(filename)
         
-        if os.path.exists(report_path) and os.path.isfile(report_path):
-            return send_file(report_path, as_attachment=True, download_name=filename)
-        else:
+        if not os.path.isfile(report_path) and legacy_gzip is None:
             return "Report not found", 404
+        elif fmt != 'txt':
+            return "Legacy report is only available as text", 404
+        elif legacy_gzip is not None:
+            return gzip_response(legacy_gzip, REPORT_MIMETYPES['txt'], filename)
+        else:
+            return send_file(report_path, as_attachment=True, download_name=filename)
     
     except Exception as e:
         return f"Error downloading report: {str(e)}", 500
 
 
-@app.route('/health')
+@bp.route('/forensics/<filename>')
+@login_required
+def forensics_heatmap(filename):
+    """
+    Serve an ELA heatmap generated during image analysis
+    send_from_directory rejects paths outside FORENSICS_FOLDER
+    """
+    if not filename.endswith('.png'):
+        return "Invalid file type", 400
+    return send_from_directory(FORENSICS_FOLDER, filename)
+
+
+@bp.route('/thumbnail/<file_hash>/<size>')
+@login_required
+def thumbnail(file_hash, size):
+    """
+    Serve a pre-generated image preview
+    Thumbnails are content-addressed and never change, so they carry a
+    strong ETag and a long-lived immutable Cache-Control header
+    """
+    path = modules.thumbnail_path(file_hash, size)
+    if not path or not os.path.isfile(path):
+        return "Thumbnail not found", 404
+    
+    # send_file answers If-None-Match / If-Modified-Since with 304
+    response = send_file(path, mimetype='image/jpeg', etag=f"{file_hash}-{size}",
+                         conditional=True, max_age=THUMBNAIL_MAX_AGE)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+
+@bp.route('/health')
 def health_check():
     """
     Health check endpoint for monitoring
@@ -394,21 +1568,53 @@ def health_check():
     })
 
 
+@bp.route('/metrics')
+def metrics():
+    """
+    Prometheus metrics, merged across all worker processes
+    Requires 'Authorization: Bearer <METRICS_TOKEN>' when METRICS_TOKEN is set
+    """
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return "Unauthorized", 401
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ═══════════════════════════════════════════════════════
+# MAINTENANCE COMMANDS
+# ═══════════════════════════════════════════════════════
+
+@bp.cli.command('compact-reports')
+def compact_reports_command():
+    """
+    Gzip legacy reports, pack old ones into monthly archives and apply retention
+    Run periodically: flask --app app compact-reports
+    """
+    summary = compact_reports(REPORT_COMPACT_AFTER_DAYS, REPORT_RETENTION_DAYS)
+    
+    for filename in summary['expired']:
+        unindex_report(filename)
+        remove_report(filename)
+    
+    print(f"✓ Compressed {summary['compressed']} legacy reports")
+    print(f"✓ Archived {summary['archived']} reports older than {REPORT_COMPACT_AFTER_DAYS} days")
+    print(f"✓ Deleted {len(summary['expired'])} expired reports")
+
+
 # ═══════════════════════════════════════════════════════
 # ERROR HANDLERS
 # ═══════════════════════════════════════════════════════
 
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def page_not_found(e):
     """Handle 404 errors"""
     if session.get('logged_in'):
         return render_template('dashboard.html', 
                              username=session.get('username'),
                              error="Page not found"), 404
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(e):
     """Handle 500 errors"""
     return jsonify({
@@ -417,7 +1623,7 @@ def internal_error(e):
     }), 500
 
 
-@app.errorhandler(413)
+@bp.app_errorhandler(413)
 def request_entity_too_large(e):
     """Handle file upload size exceeded"""
     return jsonify({
@@ -426,11 +1632,45 @@ def request_entity_too_large(e):
     }), 413
 
 
+# ═══════════════════════════════════════════════════════
+# APPLICATION FACTORY
+# ═══════════════════════════════════════════════════════
+
+def create_app():
+    """
+    Build the Flask application
+    Creates the storage folders, indexes reports that predate the
+    catalog and search index (no-op once populated) and builds the
+    fingerprinted static assets
+    Used by `flask --app app`, gunicorn ('app:create_app()') and python app.py
+    """
+    for folder in (UPLOAD_FOLDER, REPORTS_FOLDER, DATA_FOLDER, REPORT_DATA_FOLDER,
+                   REPORT_RENDER_FOLDER, REPORT_ARCHIVE_FOLDER, FORENSICS_FOLDER, THUMBNAIL_FOLDER,
+                   THREAT_INTEL_FOLDER):
+        os.makedirs(folder, exist_ok=True)
+    
+    ensure_index()
+    ensure_search_index()
+    build_assets()
+    
+    # Static files are served by static_file() (fingerprinted, precompressed)
+    app = Flask(__name__, static_folder=None)
+    app.add_url_rule('/static/<path:filename>', endpoint='static', view_func=static_file)
+    app.secret_key = SECRET_KEY
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+    app.config['PERMANENT_SESSION_LIFETIME'] = PERMANENT_SESSION_LIFETIME
+    app.register_blueprint(bp)
+    return app
+
+
 # ═══════════════════════════════════════════════════════
 # APPLICATION STARTUP
 # ═══════════════════════════════════════════════════════
 
 if __name__ == '__main__':
+    app = create_app()
+    
     print("═══════════════════════════════════════════════════════")
     print("    I PWNED YOU - OSINT THREAT DETECTION PLATFORM")
     print("═══════════════════════════════════════════════════════")
@@ -0,0 +1,96 @@
+"""
+Error Level Analysis Throughput Benchmark
+Measures ELA speed on synthetic multi-megapixel JPEGs
+
+Usage:
+    python benchmarks/bench_ela.py
+    python benchmarks/bench_ela.py --sizes 12 24 --repeat 3
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from modules.image_forensics import error_level_analysis
+
+
+def make_test_image(megapixels, path):
+    """Write a noisy gradient JPEG of roughly the requested size"""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(42)
+    gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+    noise = rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+    pixels = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    Image.fromarray(pixels, 'RGB').save(path, 'JPEG', quality=85)
+    return width, height
+
+
+def naive_python_ela(path, size=128, quality=90):
+    """Per-pixel Python loop over a small crop, for comparison"""
+    with Image.open(path) as img:
+        tile = img.convert('RGB').crop((0, 0, size, size))
+    buffer = io.BytesIO()
+    tile.save(buffer, 'JPEG', quality=quality)
+    buffer.seek(0)
+    resaved = Image.open(buffer).convert('RGB')
+
+    start = time.perf_counter()
+    a, b = tile.load(), resaved.load()
+    total = 0
+    for y in range(size):
+        for x in range(size):
+            pa, pb = a[x, y], b[x, y]
+            total += abs(pa[0] - pb[0]) + abs(pa[1] - pb[1]) + abs(pa[2] - pb[2])
+    elapsed = time.perf_counter() - start
+    return size * size / elapsed / 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ELA throughput benchmark')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[4, 12, 24],
+                        help='Image sizes in megapixels')
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("  ERROR LEVEL ANALYSIS BENCHMARK")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for megapixels in args.sizes:
+            path = os.path.join(workdir, f'bench_{megapixels}mp.jpg')
+            width, height = make_test_image(megapixels, path)
+
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = error_level_analysis(path)
+                timings.append(time.perf_counter() - start)
+                if not result['performed']:
+                    print(f"❌ ELA failed: {result['disclaimer']}")
+                    return 1
+
+            best = min(timings)
+            mpx = width * height / 1_000_000
+            print(f"{width} x {height} ({mpx:.1f} MP): "
+                  f"best {best * 1000:.0f} ms, {mpx / best:.1f} MP/s")
+
+        naive = naive_python_ela(path)
+        print("-" * 50)
+        print(f"Naive per-pixel Python loop: {naive:.2f} MP/s (compare only, not used)")
+
+    print("=" * 50)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Scan Path Benchmark
+Per-stage and end-to-end latency and throughput of scan_domain, scan_ip
+and analyze_image, against local stand-ins for every upstream (fully offline)
+
+- DNS, ip-api, Nominatim and WHOIS are served by benchmarks/standins.py
+- Images: every image in uploads/, plus a generated GPS-tagged JPEG so
+  the reverse-geocoding path is exercised
+- Results are compared with a stored baseline; any regression beyond
+  --tolerance is printed and the script exits with status 1
+- Baselines are machine-specific and not committed: without one the
+  script exits with status 2, unless --save-baseline records it or
+  --no-baseline asks for measurements only
+
+Usage:
+    python benchmarks/bench_scans.py
+    python benchmarks/bench_scans.py --iterations 50 --latency-ms 20 --error-rate 0.05
+    python benchmarks/bench_scans.py --save-baseline
+    python benchmarks/bench_scans.py --no-baseline --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from standins import start_standins
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'scans.json')
+BENCH_DOMAIN = 'bench-target.com'
+BENCH_IP = '127.0.0.1'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
+# Ignore differences smaller than this (timer and scheduler noise)
+NOISE_FLOOR_MS = 1.0
+
+
+# ═══════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples, errors=0):
+    """Latency summary in milliseconds"""
+    ms = [s * 1000 for s in samples]
+    return {
+        'n': len(ms),
+        'errors': errors,
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'max_ms': round(max(ms), 3) if ms else 0.0
+    }
+
+
+def measure(fn, iterations):
+    """Run fn sequentially; exceptions are counted, not raised"""
+    samples, errors = [], 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, errors)
+
+
+def throughput(fn, total, concurrency):
+    """Completed calls per second with `concurrency` threads"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: fn(), range(total)))
+    return round(total / (time.perf_counter() - start), 2)
+
+
+def make_gps_image(path):
+    """JPEG with camera and GPS EXIF, so EXIF parsing and geocoding both run"""
+    from PIL import Image
+    exif = Image.Exif()
+    exif[0x010F] = 'BenchCam'
+    exif[0x0110] = 'Model 1'
+    exif[0x8825] = {1: 'N', 2: (40.0, 26.0, 46.0), 3: 'W', 4: (79.0, 58.0, 56.0)}
+    Image.new('RGB', (1600, 1200), (90, 120, 150)).save(path, 'JPEG', quality=90, exif=exif.tobytes())
+    return path
+
+
+# ═══════════════════════════════════════════════════════
+# SCAN PATHS
+# ═══════════════════════════════════════════════════════
+
+def bench_domain(iterations, concurrency):
+    from modules import domain_osint
+
+    def dns_records():
+        for record_type in ('A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME'):
+            try:
+                domain_osint._get_resolver().resolve(BENCH_DOMAIN, record_type)
+            except Exception:
+                pass
+
+    return {
+        'stages': {
+            'resolve_ip': measure(lambda: domain_osint._resolve_ip(BENCH_DOMAIN), iterations),
+            'dns_records': measure(dns_records, iterations),
+            'whois': measure(lambda: domain_osint._whois_lookup(BENCH_DOMAIN), iterations)
+        },
+        'end_to_end': measure(lambda: domain_osint.scan_domain(BENCH_DOMAIN), iterations),
+        'throughput_per_s': throughput(lambda: domain_osint.scan_domain(BENCH_DOMAIN),
+                                       iterations, concurrency)
+    }
+
+
+def bench_ip(iterations, concurrency):
+    import requests
+    from config import IP_GEOLOCATION_API
+    from modules import ip_osint
+
+    def geolocation():
+        requests.get(f'{IP_GEOLOCATION_API}{BENCH_IP}', timeout=10).raise_for_status()
+
+    return {
+        'stages': {
+            'geolocation': measure(geolocation, iterations),
+            'reverse_dns': measure(lambda: socket.gethostbyaddr(BENCH_IP), iterations)
+        },
+        'end_to_end': measure(lambda: ip_osint.scan_ip(BENCH_IP), iterations),
+        'throughput_per_s': throughput(lambda: ip_osint.scan_ip(BENCH_IP), iterations, concurrency)
+    }
+
+
+def bench_image(iterations, concurrency, gps_image):
+    from config import UPLOAD_FOLDER
+    from modules import image_intel
+    from modules.image_forensics import error_level_analysis
+    from modules.image_loader import probe_image
+
+    images = sorted(
+        os.path.join(UPLOAD_FOLDER, name) for name in os.listdir(UPLOAD_FOLDER)
+        if name.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(os.path.join(UPLOAD_FOLDER, name))
+    ) + [gps_image]
+
+    def each_image(fn):
+        return lambda: [fn(path) for path in images]
+
+    results = {
+        'images': [os.path.basename(path) for path in images],
+        'stages': {
+            'probe': measure(each_image(probe_image), iterations),
+            'exif': measure(each_image(image_intel.extract_exif_metadata), iterations),
+            'ocr': measure(each_image(image_intel.extract_text_ocr), iterations),
+            'geocode': measure(lambda: image_intel.reverse_geocode_location(40.446, -79.982), iterations),
+            'ela': measure(each_image(error_level_analysis), iterations)
+        },
+        'end_to_end': measure(each_image(image_intel.analyze_image), iterations),
+        'throughput_per_s': round(
+            throughput(each_image(image_intel.analyze_image), iterations, concurrency) * len(images), 2
+        )
+    }
+    return results
+
+
+# ═══════════════════════════════════════════════════════
+# BASELINES
+# ═══════════════════════════════════════════════════════
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions (empty if none)"""
+    regressions = []
+    for path, current in results['paths'].items():
+        previous = baseline['paths'].get(path)
+        if not previous:
+            continue
+
+        timings = [('end_to_end', current['end_to_end'], previous['end_to_end'])]
+        timings += [(f'stage {name}', stats, previous['stages'].get(name))
+                    for name, stats in current['stages'].items()]
+        for label, now, before in timings:
+            if not before:
+                continue
+            limit = before['p50_ms'] * (1 + tolerance) + NOISE_FLOOR_MS
+            if now['p50_ms'] > limit:
+                regressions.append(f"{path} {label}: p50 {now['p50_ms']:.2f} ms "
+                                   f"(baseline {before['p50_ms']:.2f} ms, limit {limit:.2f} ms)")
+
+        floor = previous['throughput_per_s'] / (1 + tolerance)
+        if current['throughput_per_s'] < floor:
+            regressions.append(f"{path} throughput: {current['throughput_per_s']:.2f}/s "
+                               f"(baseline {previous['throughput_per_s']:.2f}/s, floor {floor:.2f}/s)")
+    return regressions
+
+
+def print_results(results):
+    for path, data in results['paths'].items():
+        print(f"\n{path.upper()}  (throughput {data['throughput_per_s']}/s)")
+        print(f"  {'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'errors':>8}")
+        rows = list(data['stages'].items()) + [('END TO END', data['end_to_end'])]
+        for name, stats in rows:
+            print(f"  {name:<14}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                  f"{stats['max_ms']:>10.2f}{stats['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scan paths against local stand-ins')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Injected upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Injected upstream failure rate')
+    parser.add_argument('--paths', nargs='+', default=['domain', 'ip', 'image'],
+                        choices=['domain', 'ip', 'image'])
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--no-baseline', action='store_true',
+                        help='Only measure; do not compare with (or require) a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.30, help='Allowed slowdown (0.30 = 30%%)')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    # exifread logs a line for every image without EXIF
+    logging.getLogger('exifread').setLevel(logging.ERROR)
+
+    standins, env = start_standins(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate)
+    # config.py reads the OSINT_* variables at import time
+    os.environ.update(env)
+
+    settings = {
+        'iterations': args.iterations,
+        'concurrency': args.concurrency,
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'tesseract': bool(shutil.which('tesseract'))
+    }
+    print(f"Scan benchmark: {settings}")
+
+    results = {'settings': settings, 'paths': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        gps_image = make_gps_image(os.path.join(tmp, 'bench_gps.jpg'))
+        for path in args.paths:
+            if path == 'domain':
+                results['paths'][path] = bench_domain(args.iterations, args.concurrency)
+            elif path == 'ip':
+                results['paths'][path] = bench_ip(args.iterations, args.concurrency)
+            else:
+                results['paths'][path] = bench_image(args.iterations, args.concurrency, gps_image)
+    results['upstream_requests'] = {name: standin.stats() for name, standin in standins.items()}
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if args.no_baseline:
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n✗ No baseline at {args.baseline} - run with --save-baseline to record one "
+              "(or --no-baseline to only measure)")
+        return 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if {k: v for k, v in baseline['settings'].items() if k != 'tesseract'} != \
+            {k: v for k, v in settings.items() if k != 'tesseract'}:
+        print("\n⚠ Baseline was recorded with different settings; comparison may not be meaningful")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ PERFORMANCE REGRESSION (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  ✗ {line}")
+        return 1
+
+    print(f"\n✓ No regressions against baseline (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,421 @@
+"""
+HTTP Load Test
+Drives mixed scan traffic at the Flask API and reports capacity per server setup
+
+- Starts the local upstream stand-ins (benchmarks/standins.py), so no
+  external service is contacted
+- Starts each server configuration in turn against an isolated temporary
+  storage folder (OSINT_STORAGE_DIR): the Flask dev server and any number
+  of gunicorn worker/thread settings
+- Logs in once per run, then sends /api/scan/domain, /api/scan/ip and
+  /api/scan/image requests in the requested mix, either at a fixed
+  concurrency (closed loop) or at a fixed arrival rate (open loop;
+  latency is measured from the scheduled start, so a slow server cannot
+  hide queueing delay)
+- Reports throughput, p50/p95/p99 latency, error rates and worker
+  saturation (CPU busy fraction of the server processes, from /proc)
+- Admission control is off unless --admission is given, so the run
+  measures capacity rather than the rate limits; with it on, 429
+  answers are counted as rejected rather than as errors
+- Writes machine-readable JSON for tracking capacity across releases
+
+gunicorn setups need Linux and: pip install -r requirements-bench.txt
+
+Usage:
+    python benchmarks/loadtest.py --servers dev gunicorn:4x1 gunicorn:2x8 --concurrency 16
+    python benchmarks/loadtest.py --servers gunicorn:4x4 --rate 40 --duration 30 --output load.json
+    python benchmarks/loadtest.py --mix domain=5,ip=4,image=1 --latency-ms 50
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from standins import start_standins
+
+ENDPOINTS = {
+    'domain': '/api/scan/domain',
+    'ip': '/api/scan/ip',
+    'image': '/api/scan/image'
+}
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+# ═══════════════════════════════════════════════════════
+# SERVER PROCESSES
+# ═══════════════════════════════════════════════════════
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(spec, port):
+    """
+    'dev' -> Flask development server (threaded)
+    'gunicorn:<workers>x<threads>' -> gunicorn with the gthread worker
+    """
+    if spec == 'dev':
+        return [sys.executable, '-m', 'flask', '--app', 'app', 'run',
+                '--host', '127.0.0.1', '--port', str(port), '--with-threads']
+    if spec.startswith('gunicorn:'):
+        workers, _, threads = spec.split(':', 1)[1].partition('x')
+        return [sys.executable, '-m', 'gunicorn', '--workers', workers, '--threads', threads or '1',
+                '--worker-class', 'gthread', '--bind', f'127.0.0.1:{port}',
+                '--log-level', 'warning', 'app:create_app()']
+    raise ValueError(f"Unknown server spec '{spec}' (use dev or gunicorn:<workers>x<threads>)")
+
+
+def worker_count(spec):
+    if spec.startswith('gunicorn:'):
+        return int(spec.split(':', 1)[1].partition('x')[0])
+    return 1
+
+
+def process_tree(pid):
+    """pid plus all descendants (gunicorn workers), via /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def cpu_seconds(pids):
+    """User + system CPU seconds per process"""
+    usage = {}
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            usage[pid] = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        except (OSError, IndexError, ValueError):
+            pass
+    return usage
+
+
+def start_server(spec, env):
+    port = free_port()
+    process = subprocess.Popen(server_command(spec, port), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{spec} exited during startup:\n{process.stderr.read().decode()}')
+        try:
+            if requests.get(f'{base_url}/health', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{spec} did not become healthy within 60 seconds')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# ═══════════════════════════════════════════════════════
+# TRAFFIC
+# ═══════════════════════════════════════════════════════
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_image(path):
+    if path:
+        with open(path, 'rb') as f:
+            return os.path.basename(path), f.read()
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 600), (90, 120, 150)).save(buffer, 'JPEG', quality=85)
+    return 'loadtest.jpg', buffer.getvalue()
+
+
+def login(base_url):
+    session = requests.Session()
+    response = session.post(f'{base_url}/login', json={'username': 'admin', 'password': 'admin123'},
+                            timeout=10)
+    if not response.json().get('success'):
+        raise RuntimeError(f'Login failed: {response.text}')
+    return session.cookies.get_dict()
+
+
+class LoadRun:
+    """One load run against one server"""
+
+    def __init__(self, base_url, cookies, mix, image, seed=7):
+        self.base_url = base_url
+        self.cookies = cookies
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.image = image
+        self.samples = {name: [] for name in self.names}
+        self.errors = {name: 0 for name in self.names}
+        self.rejected = {name: 0 for name in self.names}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.cookies.update(self.cookies)
+            self._local.session = session
+        return session
+
+    def pick(self):
+        with self._lock:
+            return self._random.choices(self.names, self.weights)[0]
+
+    def send(self, name, scheduled=None):
+        """Send one request; latency counts from `scheduled` when given (open loop)"""
+        start = scheduled if scheduled is not None else time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        ok = rejected = False
+        try:
+            url = self.base_url + ENDPOINTS[name]
+            if name == 'domain':
+                response = self._session().post(url, json={'domain': 'bench-target.com'}, timeout=120)
+            elif name == 'ip':
+                response = self._session().post(url, json={'ip': '127.0.0.1'}, timeout=120)
+            else:
+                response = self._session().post(url, files={'image': self.image}, timeout=120)
+            rejected = response.status_code == 429
+            ok = response.status_code == 200 and response.json().get('success', False)
+        except (requests.RequestException, ValueError):
+            ok = False
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.in_flight -= 1
+            self.samples[name].append(elapsed)
+            if rejected:
+                self.rejected[name] += 1
+            elif not ok:
+                self.errors[name] += 1
+
+    def closed_loop(self, concurrency, duration):
+        deadline = time.perf_counter() + duration
+
+        def user():
+            while time.perf_counter() < deadline:
+                self.send(self.pick())
+
+        threads = [threading.Thread(target=user) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def open_loop(self, rate, duration, max_outstanding):
+        interval = 1.0 / rate
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+            sent = 0
+            while True:
+                scheduled = start + sent * interval
+                if scheduled - start >= duration:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, self.pick(), scheduled)
+                sent += 1
+
+
+# ═══════════════════════════════════════════════════════
+# RESULTS
+# ═══════════════════════════════════════════════════════
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))]
+
+
+def latency_summary(samples):
+    ms = [s * 1000 for s in samples]
+    return {
+        'p50': round(percentile(ms, 50), 2),
+        'p95': round(percentile(ms, 95), 2),
+        'p99': round(percentile(ms, 99), 2),
+        'max': round(max(ms), 2) if ms else 0.0
+    }
+
+
+def run_server(spec, args, env, mix, image):
+    process, base_url = start_server(spec, env)
+    try:
+        run = LoadRun(base_url, login(base_url), mix, image)
+        # Warm up imports, connection pools and the report index before measuring
+        for name in mix:
+            run.send(name)
+        run = LoadRun(base_url, run.cookies, mix, image)
+
+        pids = process_tree(process.pid)
+        cpu_before = cpu_seconds(pids)
+        started = time.perf_counter()
+        if args.rate:
+            run.open_loop(args.rate, args.duration, args.max_outstanding)
+        else:
+            run.closed_loop(args.concurrency, args.duration)
+        wall = time.perf_counter() - started
+        cpu_after = cpu_seconds(pids)
+    finally:
+        stop_server(process)
+
+    busy = {pid: (cpu_after.get(pid, 0) - cpu_before.get(pid, 0)) / wall for pid in cpu_before}
+    workers = worker_count(spec)
+    worker_busy = sorted(busy.values(), reverse=True)[:workers]
+
+    all_samples = [s for samples in run.samples.values() for s in samples]
+    total_errors = sum(run.errors.values())
+    total_rejected = sum(run.rejected.values())
+    return {
+        'server': spec,
+        'workers': workers,
+        'requests': len(all_samples),
+        'duration_s': round(wall, 2),
+        'throughput_rps': round(len(all_samples) / wall, 2),
+        'error_rate': round(total_errors / len(all_samples), 4) if all_samples else 0.0,
+        'rejected_rate': round(total_rejected / len(all_samples), 4) if all_samples else 0.0,
+        'latency_ms': latency_summary(all_samples),
+        'endpoints': {
+            name: {
+                'requests': len(samples),
+                'errors': run.errors[name],
+                'rejected': run.rejected[name],
+                'error_rate': round(run.errors[name] / len(samples), 4) if samples else 0.0,
+                'latency_ms': latency_summary(samples)
+            }
+            for name, samples in run.samples.items()
+        },
+        'saturation': {
+            # 1.0 = one CPU core busy for the whole run
+            'worker_cpu_busy': [round(value, 3) for value in worker_busy],
+            'mean_worker_cpu_busy': round(sum(worker_busy) / len(worker_busy), 3) if worker_busy else 0.0,
+            'max_in_flight': run.max_in_flight
+        }
+    }
+
+
+def print_table(runs):
+    print(f"\n{'server':<18}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'errors':>9}{'429s':>9}{'cpu busy':>10}{'in flight':>11}")
+    for run in runs:
+        print(f"{run['server']:<18}{run['throughput_rps']:>9.2f}{run['latency_ms']['p50']:>10.1f}"
+              f"{run['latency_ms']['p95']:>10.1f}{run['latency_ms']['p99']:>10.1f}"
+              f"{run['error_rate']:>9.2%}{run['rejected_rate']:>9.2%}{run['saturation']['mean_worker_cpu_busy']:>10.2f}"
+              f"{run['saturation']['max_in_flight']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the scan API against local stand-ins')
+    parser.add_argument('--servers', nargs='+', default=['dev', 'gunicorn:4x1'],
+                        help="'dev' and/or 'gunicorn:<workers>x<threads>'")
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed loop: simultaneous users')
+    parser.add_argument('--rate', type=float, help='Open loop: requests per second (overrides --concurrency)')
+    parser.add_argument('--max-outstanding', type=int, default=256, help='Open loop: client thread cap')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per server')
+    parser.add_argument('--mix', default='domain=4,ip=4,image=2', help='Endpoint weights')
+    parser.add_argument('--image', help='Image to upload (default: generated 800x600 JPEG)')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Injected upstream latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Injected upstream failure rate')
+    parser.add_argument('--admission', action='store_true', help='Keep admission control (429s) on')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    image = make_image(args.image)
+    standins, standin_env = start_standins(args.latency_ms / 1000, error_rate=args.error_rate)
+
+    runs = []
+    for spec in args.servers:
+        storage = tempfile.mkdtemp(prefix='osint-load-')
+        env = dict(os.environ, **standin_env, OSINT_STORAGE_DIR=storage,
+                   OSINT_ADMISSION='1' if args.admission else '0')
+        try:
+            print(f"▶ {spec}: {'rate ' + str(args.rate) + '/s' if args.rate else str(args.concurrency) + ' users'}"
+                  f" for {args.duration:.0f}s")
+            runs.append(run_server(spec, args, env, mix, image))
+        finally:
+            shutil.rmtree(storage, ignore_errors=True)
+
+    print_table(runs)
+
+    results = {
+        'tool': 'ipwnedyou-loadtest',
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'settings': {
+            'mode': 'open' if args.rate else 'closed',
+            'rate': args.rate,
+            'concurrency': None if args.rate else args.concurrency,
+            'duration_s': args.duration,
+            'mix': mix,
+            'upstream_latency_ms': args.latency_ms,
+            'upstream_error_rate': args.error_rate,
+            'cpu_count': os.cpu_count()
+        },
+        'runs': runs,
+        'upstream_requests': {name: standin.stats() for name, standin in standins.items()}
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
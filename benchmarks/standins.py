@@ -0,0 +1,407 @@
+"""
+Local Upstream Stand-ins
+Offline replacements for every service the scanners call, for benchmarks
+
+- StubDNSServer:        UDP DNS answering A/AAAA/MX/NS/TXT for any name
+- FakeIpApiServer:      HTTP, ip-api.com style /json/<ip>
+- FakeNominatimServer:  HTTP, Nominatim style /reverse
+- FakeWhoisServer:      TCP WHOIS (port 43 protocol on any port)
+- FakeSMTPServer:       SMTP up to RCPT TO, with a fixed set of mailboxes
+- FakeWebServer:        HTTP pages, shortener/tracker redirects and a large body
+
+Each stand-in listens on 127.0.0.1 (random port) and supports:
+- latency:    mean added delay per request, in seconds
+- jitter:     +/- uniform variation of that delay, in seconds
+- error_rate: fraction of requests answered with a failure
+  (SERVFAIL, HTTP 503, a WHOIS connection closed without data, or an
+  SMTP 421 that closes the connection)
+
+The web stand-in is reached by URL (FakeWebServer.url), not through an
+OSINT_* setting; OSINT_URL_ALLOW_PRIVATE lets the URL scanner fetch it.
+
+start_standins() starts all of them and returns the OSINT_* environment
+variables that point config.py at them. Set them before importing config.
+
+Usage:
+    python benchmarks/standins.py --latency-ms 20    (serve until Ctrl+C)
+"""
+
+import argparse
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+# Records served by the stub DNS server for every queried name
+DNS_RECORDS = {
+    'A': ['93.184.216.34', '93.184.216.35'],
+    'AAAA': ['2606:2800:220:1:248:1893:25c8:1946'],
+    'MX': ['10 mail.bench-target.com.', '20 mail2.bench-target.com.'],
+    'NS': ['ns1.bench-dns.net.', 'ns2.bench-dns.net.'],
+    'TXT': ['"v=spf1 include:_spf.bench-target.com ~all"'],
+}
+# Names under this prefix have no MX records (mail goes to their A record)
+DNS_NO_MX_PREFIX = 'no-mx.'
+
+# Mailboxes the SMTP stand-in accepts (plus 'user<N>'), on any domain;
+# local parts starting with 'greylist' get a 451, domains starting with
+# 'catch-all.' accept every address
+SMTP_MAILBOXES = {'alice', 'bob', 'info', 'postmaster'}
+SMTP_CATCH_ALL_PREFIX = 'catch-all.'
+
+# Size of the web stand-in's /big page
+WEB_BIG_BYTES = 8 * 1024 * 1024
+
+WHOIS_TEXT = """Domain Name: {domain}
+Registry Domain ID: 2336799_DOMAIN_COM-VRSN
+Registrar WHOIS Server: whois.bench-registrar.com
+Registrar: Bench Registrar, Inc.
+Creation Date: 1995-08-14T04:00:00Z
+Registry Expiry Date: 2030-08-13T04:00:00Z
+Name Server: NS1.BENCH-DNS.NET
+Name Server: NS2.BENCH-DNS.NET
+DNSSEC: signedDelegation
+"""
+
+
+class StandIn:
+    """Shared latency / error injection and request counters"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = None
+        self.port = None
+
+    def begin_request(self):
+        """Count the request, sleep the injected latency, return True to inject an error"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.failures += 1
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    def start(self):
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        return {'requests': self.requests, 'failures': self.failures}
+
+
+# ═══════════════════════════════════════════════════════
+# DNS
+# ═══════════════════════════════════════════════════════
+
+class _DNSHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        standin = self.server.standin
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+
+        if standin.begin_request():
+            response.set_rcode(dns.rcode.SERVFAIL)
+        else:
+            for question in query.question:
+                rtype = dns.rdatatype.to_text(question.rdtype)
+                values = DNS_RECORDS.get(rtype)
+                if rtype == 'MX' and question.name.to_text().startswith(DNS_NO_MX_PREFIX):
+                    values = None
+                if values:
+                    response.answer.append(dns.rrset.from_text_list(question.name, 300, 'IN', rtype, values))
+        sock.sendto(response.to_wire(), self.client_address)
+
+
+class StubDNSServer(StandIn):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.server = socketserver.ThreadingUDPServer(('127.0.0.1', 0), _DNSHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+
+
+# ═══════════════════════════════════════════════════════
+# HTTP (ip-api, Nominatim)
+# ═══════════════════════════════════════════════════════
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.server.standin.begin_request():
+            self._send(503, {'status': 'fail', 'message': 'injected error'})
+            return
+        url = urlparse(self.path)
+        self._send(200, self.server.standin.respond(url.path, parse_qs(url.query)))
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPStandIn(StandIn):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _JSONHandler)
+        self.server.standin = self
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+
+class FakeIpApiServer(_HTTPStandIn):
+    def respond(self, path, query):
+        ip = path.rsplit('/', 1)[-1]
+        return {
+            'status': 'success', 'query': ip,
+            'country': 'United States', 'countryCode': 'US',
+            'region': 'CA', 'regionName': 'California', 'city': 'Los Angeles', 'zip': '90001',
+            'lat': 34.05, 'lon': -118.24, 'timezone': 'America/Los_Angeles',
+            'isp': 'Bench Networks', 'org': 'Bench Hosting', 'as': 'AS64500 Bench Networks'
+        }
+
+
+class FakeNominatimServer(_HTTPStandIn):
+    def respond(self, path, query):
+        return {
+            'lat': query.get('lat', ['0'])[0],
+            'lon': query.get('lon', ['0'])[0],
+            'display_name': 'Bench Street 1, Springfield, Bench State, Benchland',
+            'address': {
+                'road': 'Bench Street', 'city': 'Springfield',
+                'state': 'Bench State', 'country': 'Benchland', 'country_code': 'bl'
+            }
+        }
+
+
+class _WebHandler(BaseHTTPRequestHandler):
+    """
+    /page/<name>          200 HTML page titled 'Bench Page <name>'
+    /short/<code>         301 to /track/<code> (a URL shortener)
+    /track/<code>         302 to /page/<code>, max-age=60 (a click tracker)
+    /ad/<id>              302 to /short/campaign, no-store (many links, one shortener)
+    /loop                 302 to itself
+    /big                  200 with WEB_BIG_BYTES of HTML
+    /status/<code>        That status code
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        standin = self.server.standin
+        standin.hit(self.path)
+        if standin.begin_request():
+            self._send(503, b'injected error')
+            return
+        section, _, name = self.path.lstrip('/').partition('/')
+        if section == 'page':
+            body = f'<html><head><title>Bench Page {name}</title></head><body>{name}</body></html>'
+            self._send(200, body.encode('utf-8'))
+        elif section == 'short':
+            self._send(301, b'', {'Location': f'/track/{name}'})
+        elif section == 'track':
+            self._send(302, b'', {'Location': f'/page/{name}', 'Cache-Control': 'max-age=60'})
+        elif section == 'ad':
+            self._send(302, b'', {'Location': '/short/campaign', 'Cache-Control': 'no-store'})
+        elif section == 'loop':
+            self._send(302, b'', {'Location': '/loop'})
+        elif section == 'big':
+            self._send(200, b'<html><head><title>Big</title></head>' + b'x' * WEB_BIG_BYTES)
+        elif section == 'status':
+            self._send(int(name), b'status')
+        else:
+            self._send(404, b'not found')
+
+    def _send(self, code, body, headers=None):
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except ConnectionError:
+            pass    # The client stopped reading (download limit)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeWebServer(_HTTPStandIn):
+    """Counts requests per path as well (hits)"""
+
+    def __init__(self, **kwargs):
+        StandIn.__init__(self, **kwargs)
+        self.hits = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _WebHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+
+    def hit(self, path):
+        with self._lock:
+            self.hits[path] = self.hits.get(path, 0) + 1
+
+
+# ═══════════════════════════════════════════════════════
+# WHOIS
+# ═══════════════════════════════════════════════════════
+
+class _WhoisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        domain = self.rfile.readline().decode('ascii', errors='replace').strip()
+        if self.server.standin.begin_request():
+            return
+        self.wfile.write(WHOIS_TEXT.format(domain=domain.upper()).encode('utf-8'))
+
+
+class FakeWhoisServer(StandIn):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _WhoisHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+
+
+# ═══════════════════════════════════════════════════════
+# SMTP
+# ═══════════════════════════════════════════════════════
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        standin = self.server.standin
+        standin.connected()
+        self.reply('220 bench-mx ESMTP ready')
+        while True:
+            line = self.rfile.readline(1024).decode('ascii', errors='replace').strip()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            if standin.begin_request():
+                self.reply('421 Service not available (injected error)')
+                return
+            if command == 'EHLO':
+                self.reply('250-bench-mx', '250 8BITMIME')
+            elif command in ('HELO', 'MAIL', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                self.reply(standin.rcpt(line.partition(':')[2].strip().strip('<>')))
+            else:
+                self.reply('502 Command not implemented')
+
+    def reply(self, *lines):
+        self.wfile.write(''.join(line + '\r\n' for line in lines).encode('ascii'))
+
+
+class FakeSMTPServer(StandIn):
+    """Every SMTP command counts as a request; connections are counted too"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.connections = 0
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+
+    def connected(self):
+        with self._lock:
+            self.connections += 1
+
+    def rcpt(self, address):
+        local_part, _, domain = address.lower().rpartition('@')
+        if local_part.startswith('greylist'):
+            return '451 4.7.1 Greylisted, try again later'
+        if (domain.startswith(SMTP_CATCH_ALL_PREFIX) or local_part in SMTP_MAILBOXES
+                or (local_part.startswith('user') and local_part[4:].isdigit())):
+            return '250 2.1.5 OK'
+        return '550 5.1.1 No such user'
+
+    def stats(self):
+        return {**super().stats(), 'connections': self.connections}
+
+
+# ═══════════════════════════════════════════════════════
+# STARTUP
+# ═══════════════════════════════════════════════════════
+
+def start_standins(latency=0.0, jitter=0.0, error_rate=0.0):
+    """
+    Start every stand-in
+
+    Returns:
+        tuple: (dict of running stand-ins by name, dict of OSINT_* environment variables)
+    """
+    options = {'latency': latency, 'jitter': jitter, 'error_rate': error_rate}
+    standins = {
+        'dns': StubDNSServer(**options).start(),
+        'ip_api': FakeIpApiServer(**options).start(),
+        'nominatim': FakeNominatimServer(**options).start(),
+        'whois': FakeWhoisServer(**options).start(),
+        'smtp': FakeSMTPServer(**options).start(),
+        'web': FakeWebServer(**options).start(),
+    }
+    env = {
+        'OSINT_DNS_NAMESERVERS': f"127.0.0.1:{standins['dns'].port}",
+        'OSINT_IP_GEOLOCATION_API': f"{standins['ip_api'].url}/json/",
+        'OSINT_NOMINATIM_API': f"{standins['nominatim'].url}/reverse",
+        'OSINT_NOMINATIM_MIN_INTERVAL': '0',
+        'OSINT_WHOIS_SERVER': f"127.0.0.1:{standins['whois'].port}",
+        'OSINT_SMTP_SERVER': f"127.0.0.1:{standins['smtp'].port}",
+        'OSINT_URL_ALLOW_PRIVATE': '1',
+    }
+    return standins, env
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the local upstream stand-ins')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    standins, env = start_standins(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate)
+    print('Stand-ins running. Point the app at them with:')
+    for key, value in env.items():
+        print(f'  export {key}={value}')
+    print(f"Web stand-in (URL analysis): {standins['web'].url}/page/home")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -15,20 +15,189 @@ SECRET_KEY = 'cyber-sec-osint-platform-2025'
 ADMIN_USERNAME = 'admin'
 ADMIN_PASSWORD = 'admin123'
 
+# Where uploads, reports and local state live (override to run isolated
+# instances, e.g. load tests, without touching the real folders)
+STORAGE_DIR = os.environ.get('OSINT_STORAGE_DIR', BASE_DIR)
+
 # Upload settings
-UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
-REPORTS_FOLDER = os.path.join(BASE_DIR, 'reports')
+UPLOAD_FOLDER = os.path.join(STORAGE_DIR, 'uploads')
+REPORTS_FOLDER = os.path.join(STORAGE_DIR, 'reports')
+DATA_FOLDER = os.path.join(STORAGE_DIR, 'data')  # SQLite indexes and local state
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
-# Create directories if they don't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(REPORTS_FOLDER, exist_ok=True)
+# Image decoding limits (memory-bounded loader)
+# A 16MB compressed upload can expand to hundreds of MB once decoded,
+# so every decode is checked against a pixel ceiling and a shared byte budget.
+IMAGE_MAX_PIXELS = 80 * 1000 * 1000          # Reject anything larger (decompression bomb guard)
+IMAGE_OCR_MAX_PIXELS = 16 * 1000 * 1000      # Larger JPEGs are decoded at reduced resolution
+IMAGE_MEMORY_BUDGET = 256 * 1024 * 1024      # Decoded bytes allowed in flight per worker
+IMAGE_BUDGET_WAIT = 30                       # Seconds to wait for budget before giving up
+IMAGE_TILE_SIZE = 2048                       # OCR band height for very large images
+IMAGE_TILE_OVERLAP = 64                      # Rows (about two text lines) searched for a blank row
+                                             # to cut bands at; bands overlap this much if none is
+IMAGE_MAX_FRAMES = 3                         # Frames sampled from animated GIFs
+
+# Error Level Analysis (image forensics)
+FORENSICS_FOLDER = os.path.join(UPLOAD_FOLDER, 'forensics')
+ELA_QUALITY = 90              # JPEG quality used for re-compression
+ELA_BLOCK_SIZE = 16           # Block edge (pixels) for per-block error statistics
+ELA_TILE_SIZE = 1024          # Tile edge processed per task (multiple of ELA_BLOCK_SIZE)
+ELA_WORKERS = min(4, os.cpu_count() or 1)
+ELA_HEATMAP_MAX_SIDE = 1024   # Longest side of the saved heatmap
+
+# Thumbnails (generated once at upload, stored by content hash)
+THUMBNAIL_FOLDER = os.path.join(UPLOAD_FOLDER, 'thumbs')
+THUMBNAIL_SIZES = {'sm': 160, 'md': 640}    # Longest side in pixels
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600         # Content-addressed, safe to cache for a year
+
+# Static assets (fingerprinted, minified and precompressed copies built at startup)
+STATIC_FOLDER = os.path.join(BASE_DIR, 'static')
+ASSET_FOLDER = os.path.join(DATA_FOLDER, 'assets')
+ASSET_MAX_AGE = 365 * 24 * 3600             # Fingerprinted names never change content
+ASSET_COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt')   # PNG/JPEG are compressed already
+ASSET_KEEP_DAYS = 7                         # Files of earlier builds kept for pages still open
+
+# Report index (SQLite catalog of generated reports)
+REPORT_INDEX_DB = os.path.join(DATA_FOLDER, 'reports.db')
+REPORTS_PER_PAGE = 25
+
+# Structured report storage (canonical scan results, rendered on download)
+REPORT_DATA_FOLDER = os.path.join(REPORTS_FOLDER, 'data')
+REPORT_FORMATS = ('txt', 'json', 'csv')
+RENDER_CACHE_BYTES = 16 * 1024 * 1024   # In-memory cache of rendered reports
+
+# Compressed report storage (gzip; zstd is not in the standard library)
+REPORT_RENDER_FOLDER = os.path.join(REPORTS_FOLDER, 'rendered')   # Pre-encoded .gz downloads
+REPORT_ARCHIVE_FOLDER = os.path.join(REPORTS_FOLDER, 'archive')   # Monthly ZIPs of old reports
+REPORT_GZIP_LEVEL = 6
+REPORT_COMPACT_AFTER_DAYS = 30      # Pack reports older than this into monthly archives
+REPORT_RETENTION_DAYS = None        # Delete reports older than this (None = keep forever)
+
+# Metrics (Prometheus text format at /metrics, merged across worker processes)
+METRICS_FOLDER = os.path.join(DATA_FOLDER, 'metrics')   # Per-process snapshots
+METRICS_FLUSH_INTERVAL = 2                              # Seconds between snapshots
+METRICS_TOKEN = os.environ.get('OSINT_METRICS_TOKEN') or None   # Bearer token for /metrics (None = open)
+
+# Request profiling (admin '?profile=1' on /api/scan/*, or a random sample of scans)
+PROFILE_FOLDER = os.path.join(DATA_FOLDER, 'profiles')
+PROFILE_INTERVAL = 0.005                                 # Seconds between stack samples
+PROFILE_KEEP = 200                                       # Newest profiles kept on disk
+PROFILE_SAMPLE_RATE = float(os.environ.get('OSINT_PROFILE_SAMPLE_RATE', '0'))   # 0.01 = 1% of scans
+
+# Single-flight (concurrent identical scans share one execution, across workers)
+COORDINATION_DB = os.path.join(DATA_FOLDER, 'coordination.db')
+SINGLE_FLIGHT_TIMEOUT = 120             # Longest wait for an in-flight scan; also its claim lifetime
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05      # Seconds between checks for another worker's result
+
+# Scan scheduler (persistent job queue; pools and limits below apply per worker process,
+# except upstream limits, which count running jobs across all processes)
+SCHEDULER_DB = os.path.join(DATA_FOLDER, 'jobs.db')
+SCHEDULER_IO_WORKERS = 16                   # Threads for DNS/HTTP-bound scans (domain, IP)
+SCHEDULER_CPU_WORKERS = os.cpu_count() or 2 # Threads for CPU-bound scans (OCR, hashing, ELA)
+SCHEDULER_UPSTREAM_LIMITS = {               # Running jobs allowed per upstream
+    'dns': 32,
+    'whois': 4,
+    'ip_api': 8,        # Free tier: 45 requests/minute
+    'ptr': 32,
+    'smtp': 16,         # Email jobs; each also limits its connections per MX host
+    'http': 16          # URL analysis jobs
+}
+SCHEDULER_POLL_INTERVAL = 0.2               # Seconds between queue checks when idle
+SCHEDULER_WAIT_TIMEOUT = 120                # Longest an interactive request waits for its job
+SCHEDULER_MAX_ATTEMPTS = 3                  # Runs before a job orphaned by dead workers fails
+SCHEDULER_KEEP_DAYS = 7                     # Finished jobs kept for the status API
+
+# Admission control (scan APIs answer 429 with Retry-After instead of piling up
+# requests; keep the in-flight caps below the server's total request threads so
+# login, pages and other cheap routes always find a free thread)
+ADMISSION_ENABLED = os.environ.get('OSINT_ADMISSION', '1') != '0'
+ADMISSION_RATES = {                 # Per-session token buckets: (scans per second, burst)
+    'domain': (1.0, 10),
+    'ip': (1.0, 10),
+    'image': (0.2, 4),
+    'email': (2.0, 20),
+    'email_bulk': (0.05, 3),        # Each one checks up to EMAIL_BULK_MAX addresses
+    'url': (1.0, 10),
+    'url_bulk': (0.05, 3),
+}
+ADMISSION_IN_FLIGHT = {             # Scans of each type handled at once, across all workers
+    'domain': 16,
+    'ip': 16,
+    'image': os.cpu_count() or 2,
+    'email': 16,
+    'url': 16,
+}
+ADMISSION_BUSY_RETRY_AFTER = 2      # Retry-After (seconds) when a scan type is at its in-flight cap
+ADMISSION_SLOT_TIMEOUT = 300        # An in-flight slot older than this is treated as leaked
+
+# Scan API responses ('?fields=' projection, 'compact=1'); gzip when the client accepts it
+API_GZIP_MIN_BYTES = 1024           # Smaller responses are sent uncompressed
+API_GZIP_LEVEL = 5                  # Favours speed; JSON compresses well at any level
+
+# Watchlists (targets re-checked piece by piece as each piece's TTL expires)
+WATCHLIST_DB = os.path.join(DATA_FOLDER, 'watchlists.db')
+WATCH_TICK = 5                      # Seconds between dispatcher passes
+WATCH_RATE_LIMITS = {               # Re-checks per second per upstream, across all workers
+    'dns': 20,
+    'whois': 0.2,
+    'ip_api': 0.5,      # 30/minute, leaving 15/minute of the free tier for interactive scans
+    'ptr': 20
+}
+WATCH_MIN_TTL = 3600                # Floor for DNS TTLs (seconds)
+WATCH_MAX_TTL = 86400               # Ceiling for DNS TTLs and default for negative answers
+WATCH_WHOIS_TTL = 7 * 86400         # WHOIS re-check interval...
+WATCH_WHOIS_EXPIRING_TTL = 86400    # ...daily within 30 days of the registration's expiry
+WATCH_GEO_TTL = 7 * 86400           # Geolocation/ASN re-check interval
+WATCH_RETRY = 900                   # Wait after a failed lookup before retrying
+WATCH_JITTER = 0.1                  # Each interval is stretched by a random 0-10%
+WATCH_INITIAL_SPREAD = 600          # New targets get their first check within this many seconds
+WATCH_MAX_QUEUED = 200              # Dispatcher pauses while this many re-check jobs are queued
 
 # API Settings (Free tier / Basic functionality)
 # Note: Using free services for basic OSINT functionality
-IP_GEOLOCATION_API = 'http://ip-api.com/json/'  # Free, no key required
-NOMINATIM_API = 'https://nominatim.openstreetmap.org/reverse'
+# Every upstream can be redirected with an OSINT_* environment variable
+# (the benchmarks point them at local stand-ins)
+IP_GEOLOCATION_API = os.environ.get('OSINT_IP_GEOLOCATION_API', 'http://ip-api.com/json/')  # Free, no key required
+NOMINATIM_API = os.environ.get('OSINT_NOMINATIM_API', 'https://nominatim.openstreetmap.org/reverse')
+NOMINATIM_MIN_INTERVAL = float(os.environ.get('OSINT_NOMINATIM_MIN_INTERVAL', '1.0'))  # Usage policy: max 1 request/second
+DNS_NAMESERVERS = [ns for ns in os.environ.get('OSINT_DNS_NAMESERVERS', '').split(',') if ns]  # 'ip' or 'ip:port'; empty = system resolver
+WHOIS_SERVER = os.environ.get('OSINT_WHOIS_SERVER') or None   # 'host:port'; None = python-whois picks the registry server
+DOMAIN_LOOKUP_WORKERS = 32     # Threads shared by all domain scans' concurrent DNS/WHOIS lookups
+SMTP_SERVER = os.environ.get('OSINT_SMTP_SERVER') or None      # 'host:port' dialled for every MX; None = the MX itself, port 25
+
+# Email OSINT (syntax, MX and optional SMTP mailbox checks; nothing is ever sent)
+EMAIL_WORKERS = 32                  # Threads per bulk check (per-host limits below still apply)
+EMAIL_BULK_MAX = 10000              # Addresses per bulk request
+SMTP_HELO_NAME = os.environ.get('OSINT_SMTP_HELO') or None     # None = this machine's FQDN
+SMTP_MAIL_FROM = os.environ.get('OSINT_SMTP_MAIL_FROM', '')    # '' = null sender (<>)
+SMTP_TIMEOUT = 10                   # Seconds per SMTP command
+SMTP_CONNECTIONS_PER_HOST = 2       # Concurrent connections (= concurrent checks) per MX host
+SMTP_RCPT_PER_TRANSACTION = 50      # RCPT TO commands before a RSET (servers cap recipients)
+SMTP_CHECKS_PER_CONNECTION = 1000   # Checks before a connection is closed and replaced
+SMTP_IDLE_TIMEOUT = 30              # Idle pooled connections older than this are closed
+EMAIL_DOMAIN_CACHE_TTL = 3600       # Seconds a domain's catch-all probe result is reused
+
+# URL analysis (redirect chains, landing page fingerprint)
+URL_WORKERS = 16                    # Threads per bulk analysis
+URL_BULK_MAX = 1000                 # URLs per bulk request
+URL_POOL_HOSTS = 64                 # Hosts with pooled keep-alive connections
+URL_MAX_REDIRECTS = 10
+URL_CONNECT_TIMEOUT = 5             # Seconds to connect, per hop
+URL_READ_TIMEOUT = 10               # Seconds between received bytes, per hop
+URL_TOTAL_TIMEOUT = 30              # Seconds for a whole chain, body included
+URL_MAX_BYTES = 2 * 1024 * 1024     # Landing page bytes read (and hashed); the rest is not downloaded
+URL_REDIRECT_CACHE_TTL = 3600       # Longest a redirect hop is reused (temporary ones: their max-age, else 5 min)
+URL_USER_AGENT = 'Mozilla/5.0 (compatible; OSINT-Tool URL analysis)'
+URL_ALLOW_PRIVATE = os.environ.get('OSINT_URL_ALLOW_PRIVATE') == '1'   # Fetch loopback/private addresses (stand-ins only)
+
+# Threat intelligence (local blocklists matched against every scan result)
+# One indicator per line (IP, CIDR, domain or MD5/SHA-1/SHA-256 hash; '#' comments,
+# hosts-file lines and .gz files accepted); each file is a list named after it
+THREAT_INTEL_FOLDER = os.environ.get('OSINT_THREAT_INTEL_DIR') or os.path.join(DATA_FOLDER, 'threat_intel')
+THREAT_INTEL_RELOAD_INTERVAL = 30   # Seconds between checks for changed list files
+THREAT_INTEL_BLOOM_BITS = 10        # Bloom filter bits per listed domain (~1% false positives); 0 = none
 
 # Tesseract OCR Path (Windows default installation)
 # Users must install Tesseract separately
@@ -1,19 +1,182 @@
 """
 Modules package initialization
 Updated to include image intelligence
+
+The scanners and thumbnails depend on dnspython, python-whois, requests,
+Pillow, NumPy, pytesseract, ExifRead and geopy. Their exports are loaded
+on first access (module __getattr__), so importing the package, and the
+app, does not pay for those imports until a scan or preview needs them.
 """
 
-from .auth import validate_login
-from .domain_osint import scan_domain, format_domain_report
-from .ip_osint import scan_ip, format_ip_report
-from .image_intel import analyze_image, format_image_intel_report
+import importlib
+
+from .auth import validate_login, check_session
+from .report_index import (
+    record_report, remove_report, query_reports, iter_reports, ensure_index, rebuild_index
+)
+from .report_search import (
+    index_report, unindex_report, search_reports, ensure_search_index, SearchQueryError
+)
+from .report_store import (
+    save_result, load_record, has_structured, iter_render, render_report,
+    rendered_gzip_path, iter_gunzip, read_legacy_text, load_legacy_gzip, compact_reports,
+    searchable_text, report_stem, MIMETYPES as REPORT_MIMETYPES
+)
+from .report_export import iter_zip_export
+from .scan_diff import diff_reports, diff_latest, diff_results, DiffError
+from .report_writer import new_report_id, submit_report, wait_for_report, flush_reports
+from .metrics import timed, inc, observe, render_prometheus
+from .profiler import new_request_id, start_profile, save_profile, list_profiles, profile_path
+from .single_flight import single_flight, scan_key, SingleFlightTimeout
+from .scheduler import (
+    register_job_type, submit_job, wait_for_job, run_job, cancel_job, get_job, list_jobs,
+    queue_stats, start_scheduler, emit_progress, iter_job_events, JobError, PRIORITIES
+)
+from .watchlist import (
+    add_targets, remove_targets, list_watchlists, list_targets, target_state, list_events,
+    refresh_target, start_watchlist_dispatcher, WatchlistError, JOB_TYPES as WATCH_JOB_TYPES
+)
+from .admission import admit, release, AdmissionDenied
+from .disclaimers import DISCLAIMERS
+from .projection import parse_fields, project, compact, dumps_compact
+from .assets import build_assets, asset_name, asset_file
+from .threat_intel import start_threat_intel, reload_threat_intel, threat_intel_status, match_indicator
+
+# Exported name -> submodule, imported on first access
+_LAZY_EXPORTS = {
+    'scan_domain': '.domain_osint',
+    'iter_scan_domain': '.domain_osint',
+    'format_domain_report': '.domain_osint',
+    'iter_domain_report': '.domain_osint',
+    'scan_ip': '.ip_osint',
+    'format_ip_report': '.ip_osint',
+    'iter_ip_report': '.ip_osint',
+    'scan_email': '.email_osint',
+    'scan_emails': '.email_osint',
+    'scan_url': '.url_osint',
+    'scan_urls': '.url_osint',
+    'analyze_image': '.image_intel',
+    'format_image_intel_report': '.image_intel',
+    'iter_image_intel_report': '.image_intel',
+    'content_hash': '.thumbnails',
+    'generate_thumbnails': '.thumbnails',
+    'thumbnail_path': '.thumbnails'
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 __all__ = [
     'validate_login',
+    'check_session',
     'scan_domain',
+    'iter_scan_domain',
     'format_domain_report',
+    'iter_domain_report',
     'scan_ip',
     'format_ip_report',
+    'iter_ip_report',
+    'scan_email',
+    'scan_emails',
+    'scan_url',
+    'scan_urls',
     'analyze_image',
-    'format_image_intel_report'
+    'format_image_intel_report',
+    'iter_image_intel_report',
+    'content_hash',
+    'generate_thumbnails',
+    'thumbnail_path',
+    'record_report',
+    'remove_report',
+    'query_reports',
+    'iter_reports',
+    'ensure_index',
+    'rebuild_index',
+    'index_report',
+    'unindex_report',
+    'search_reports',
+    'ensure_search_index',
+    'SearchQueryError',
+    'save_result',
+    'load_record',
+    'has_structured',
+    'iter_render',
+    'render_report',
+    'rendered_gzip_path',
+    'iter_gunzip',
+    'read_legacy_text',
+    'load_legacy_gzip',
+    'compact_reports',
+    'searchable_text',
+    'report_stem',
+    'REPORT_MIMETYPES',
+    'iter_zip_export',
+    'diff_reports',
+    'diff_latest',
+    'diff_results',
+    'DiffError',
+    'new_report_id',
+    'submit_report',
+    'wait_for_report',
+    'flush_reports',
+    'timed',
+    'inc',
+    'observe',
+    'render_prometheus',
+    'new_request_id',
+    'start_profile',
+    'save_profile',
+    'list_profiles',
+    'profile_path',
+    'single_flight',
+    'scan_key',
+    'SingleFlightTimeout',
+    'register_job_type',
+    'submit_job',
+    'wait_for_job',
+    'run_job',
+    'cancel_job',
+    'get_job',
+    'list_jobs',
+    'queue_stats',
+    'start_scheduler',
+    'emit_progress',
+    'iter_job_events',
+    'JobError',
+    'PRIORITIES',
+    'add_targets',
+    'remove_targets',
+    'list_watchlists',
+    'list_targets',
+    'target_state',
+    'list_events',
+    'refresh_target',
+    'start_watchlist_dispatcher',
+    'WatchlistError',
+    'WATCH_JOB_TYPES',
+    'admit',
+    'release',
+    'AdmissionDenied',
+    'DISCLAIMERS',
+    'parse_fields',
+    'project',
+    'compact',
+    'dumps_compact',
+    'build_assets',
+    'asset_name',
+    'asset_file',
+    'start_threat_intel',
+    'reload_threat_intel',
+    'threat_intel_status',
+    'match_indicator'
 ]
\ No newline at end of file
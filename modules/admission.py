@@ -0,0 +1,237 @@
+"""
+Admission Module
+Per-session rate limits and global in-flight caps for the scan APIs
+
+- Each session has a token bucket per scan type (ADMISSION_RATES):
+  a scan request takes one token; tokens refill at the configured rate
+  up to the burst size
+- Each scan type has a cap on requests handled at once, across all
+  worker processes (ADMISSION_IN_FLIGHT); an admitted request holds an
+  in-flight slot until its response is finished
+- A request over either limit is refused straight away with the number
+  of seconds to wait (AdmissionDenied.retry_after), so overload turns
+  into fast 429s instead of tied-up worker threads
+- Buckets and slots live in the coordination store (COORDINATION_DB);
+  each decision is one short BEGIN IMMEDIATE transaction, so gunicorn
+  workers share the limits
+- Slots left by dead processes, or older than ADMISSION_SLOT_TIMEOUT,
+  are reclaimed when a scan type reaches its cap
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import (
+    COORDINATION_DB, ADMISSION_ENABLED, ADMISSION_RATES, ADMISSION_IN_FLIGHT,
+    ADMISSION_BUSY_RETRY_AFTER, ADMISSION_SLOT_TIMEOUT
+)
+from .metrics import inc, register_gauge
+from .processes import pid_alive
+
+# Buckets untouched this long are full again and are deleted
+_BUCKET_IDLE = 3600
+# Seconds between deletions of idle buckets (per process)
+_PRUNE_INTERVAL = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS admission_buckets (
+    session_key TEXT NOT NULL,
+    scan_type   TEXT NOT NULL,
+    tokens      REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (session_key, scan_type)
+);
+CREATE INDEX IF NOT EXISTS idx_admission_buckets_updated ON admission_buckets (updated_at);
+CREATE TABLE IF NOT EXISTS admission_slots (
+    slot_id     TEXT PRIMARY KEY,
+    scan_type   TEXT NOT NULL,
+    owner_pid   INTEGER NOT NULL,
+    owner_token TEXT NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_admission_slots_type ON admission_slots (scan_type);
+"""
+
+_local = threading.local()
+
+
+class AdmissionDenied(Exception):
+    """Raised when a scan request is over its session rate or its type's in-flight cap"""
+
+    def __init__(self, scan_type, reason, retry_after, limit):
+        self.scan_type = scan_type
+        self.reason = reason            # 'rate' or 'in_flight'
+        self.retry_after = retry_after  # Whole seconds
+        self.limit = limit
+        if reason == 'rate':
+            message = f'Too many {scan_type} scans from this session; retry in {retry_after}s'
+        else:
+            message = f'Too many {scan_type} scans in progress; retry in {retry_after}s'
+        super().__init__(message)
+
+
+def _connect():
+    """Return this thread's connection (autocommit; decisions open their own transaction)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(COORDINATION_DB), exist_ok=True)
+        conn = sqlite3.connect(COORDINATION_DB, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+class _Slots:
+    """This process's held slots (for the gauge and stale-slot checks)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pid = None
+        self.token = None
+        self.held = {}
+        self.last_prune = 0.0
+
+    def owner(self):
+        # A forked worker holds none of its parent's slots
+        with self._lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.token = uuid.uuid4().hex
+                self.held = {}
+            return self.pid, self.token
+
+    def add(self, slot_id, scan_type):
+        with self._lock:
+            self.held[slot_id] = scan_type
+
+    def pop(self, slot_id):
+        with self._lock:
+            return self.held.pop(slot_id, None)
+
+    def count(self, scan_type):
+        with self._lock:
+            return sum(1 for held_type in self.held.values() if held_type == scan_type)
+
+
+_slots = _Slots()
+for _scan_type in ADMISSION_IN_FLIGHT:
+    register_gauge('osint_admission_in_flight', lambda scan_type=_scan_type: _slots.count(scan_type),
+                   scan_type=_scan_type)
+
+
+def _owner_alive(pid, owner_token):
+    pid_now, token = _slots.owner()
+    if pid == pid_now:
+        # Same pid as an earlier run of the app (e.g. a restarted container)
+        return owner_token == token
+    return pid_alive(pid)
+
+
+def _reclaim_slots(conn, scan_type, now):
+    """Delete slots of dead processes and slots held too long"""
+    stale = [
+        row['slot_id'] for row in conn.execute(
+            'SELECT slot_id, owner_pid, owner_token, acquired_at FROM admission_slots WHERE scan_type = ?',
+            (scan_type,)
+        )
+        if row['acquired_at'] < now - ADMISSION_SLOT_TIMEOUT
+        or not _owner_alive(row['owner_pid'], row['owner_token'])
+    ]
+    conn.executemany('DELETE FROM admission_slots WHERE slot_id = ?', [(slot_id,) for slot_id in stale])
+
+
+def _decide(conn, scan_type, session_key, now):
+    """Take a token and a slot, or raise AdmissionDenied; runs inside the transaction"""
+    rate, burst = ADMISSION_RATES.get(scan_type, (None, None))
+    if rate is not None:
+        row = conn.execute('SELECT tokens, updated_at FROM admission_buckets WHERE session_key = ? AND scan_type = ?',
+                           (session_key, scan_type)).fetchone()
+        tokens = burst if row is None else min(burst, row['tokens'] + (now - row['updated_at']) * rate)
+        if tokens < 1:
+            raise AdmissionDenied(scan_type, 'rate', max(1, math.ceil((1 - tokens) / rate)), burst)
+
+    cap = ADMISSION_IN_FLIGHT.get(scan_type)
+    if cap is not None:
+        count_sql = 'SELECT COUNT(*) FROM admission_slots WHERE scan_type = ?'
+        if conn.execute(count_sql, (scan_type,)).fetchone()[0] >= cap:
+            _reclaim_slots(conn, scan_type, now)
+            if conn.execute(count_sql, (scan_type,)).fetchone()[0] >= cap:
+                raise AdmissionDenied(scan_type, 'in_flight', ADMISSION_BUSY_RETRY_AFTER, cap)
+
+    if rate is not None:
+        conn.execute('INSERT INTO admission_buckets (session_key, scan_type, tokens, updated_at) VALUES (?, ?, ?, ?) '
+                     'ON CONFLICT (session_key, scan_type) DO UPDATE SET tokens = excluded.tokens, '
+                     'updated_at = excluded.updated_at',
+                     (session_key, scan_type, tokens - 1, now))
+
+    if cap is None:
+        return None
+    pid, token = _slots.owner()
+    slot_id = uuid.uuid4().hex
+    conn.execute('INSERT INTO admission_slots (slot_id, scan_type, owner_pid, owner_token, acquired_at) '
+                 'VALUES (?, ?, ?, ?, ?)', (slot_id, scan_type, pid, token, now))
+    return slot_id
+
+
+def admit(scan_type, session_key):
+    """
+    Admit one scan request or refuse it
+
+    Args:
+        scan_type (str): 'domain', 'ip', 'image', 'email', 'url', ... (the ADMISSION_* keys)
+        session_key (str): Requesting session
+
+    Returns:
+        str: Slot ID to pass to release() when the response is finished
+        (None when the type has no in-flight cap or admission is off)
+
+    Raises:
+        AdmissionDenied: Over the session's rate or the type's in-flight cap
+    """
+    if not ADMISSION_ENABLED:
+        return None
+
+    now = time.time()
+    try:
+        conn = _connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            slot_id = _decide(conn, scan_type, session_key, now)
+            if now - _slots.last_prune > _PRUNE_INTERVAL:
+                _slots.last_prune = now
+                conn.execute('DELETE FROM admission_buckets WHERE updated_at < ?', (now - _BUCKET_IDLE,))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    except AdmissionDenied as e:
+        inc('osint_admission_decisions_total', scan_type=scan_type, decision=e.reason)
+        raise
+    except (sqlite3.Error, OSError) as e:
+        # An unavailable coordination store must not take the scan APIs down with it
+        print(f"Error checking admission: {str(e)}")
+        inc('osint_admission_decisions_total', scan_type=scan_type, decision='unchecked')
+        return None
+
+    if slot_id is not None:
+        _slots.add(slot_id, scan_type)
+    inc('osint_admission_decisions_total', scan_type=scan_type, decision='admitted')
+    return slot_id
+
+
+def release(slot_id):
+    """Free an in-flight slot from admit() (safe to call twice, or with None)"""
+    if slot_id is None or _slots.pop(slot_id) is None:
+        return
+    try:
+        _connect().execute('DELETE FROM admission_slots WHERE slot_id = ?', (slot_id,))
+    except (sqlite3.Error, OSError) as e:
+        # The slot is reclaimed once it passes ADMISSION_SLOT_TIMEOUT
+        print(f"Error releasing admission slot: {str(e)}")
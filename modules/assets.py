@@ -0,0 +1,213 @@
+"""
+Assets Module
+Fingerprinted, minified and precompressed copies of the static files
+
+- build_assets() copies every file under STATIC_FOLDER to ASSET_FOLDER
+  as '<name>.<content hash>.<ext>'; CSS and JavaScript are minified
+  first (whitespace and comments only, nothing is renamed)
+- Text assets also get a '.gz' variant (and '.br' when the brotli
+  package is installed), compressed once at maximum level instead of
+  on every request
+- asset_name() maps a static path to its fingerprinted name; a changed
+  file gets a new name, so fingerprinted names can be cached forever
+- asset_file() picks the best precompressed variant for a client
+- Builds are idempotent and safe to run from several workers at once
+  (files are written under a temporary name, then renamed); files of
+  earlier builds are deleted once they are ASSET_KEEP_DAYS old
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import time
+
+from config import STATIC_FOLDER, ASSET_FOLDER, ASSET_COMPRESS_EXTENSIONS, ASSET_KEEP_DAYS
+
+# (Content-Encoding, file suffix), most preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Static path -> fingerprinted name; fingerprinted name -> precompressed encodings
+_manifest = {}
+_variants = {}
+
+# CSS strings and comments; strings are copied verbatim, comments dropped
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')|(/\*.*?\*/)', re.S)
+
+
+# ═══════════════════════════════════════════════════════
+# MINIFICATION
+# ═══════════════════════════════════════════════════════
+
+def _tighten_css(code):
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r' ?([{};,>]) ?', r'\1', code)
+    return code.replace(': ', ':').replace(';}', '}')
+
+
+def minify_css(text):
+    """Drop comments and whitespace that no selector or value needs"""
+    pieces = []
+    code = []
+    position = 0
+    for match in _CSS_TOKENS.finditer(text):
+        code.append(text[position:match.start()])
+        string, _comment = match.groups()
+        if string:
+            pieces.append(_tighten_css(''.join(code)))
+            pieces.append(string)
+            code = []
+        else:
+            code.append(' ')
+        position = match.end()
+    code.append(text[position:])
+    pieces.append(_tighten_css(''.join(code)))
+    return ''.join(pieces).strip() + '\n'
+
+
+def minify_js(text):
+    """
+    Drop comment lines, blank lines and indentation
+    Line breaks stay (automatic semicolon insertion depends on them) and
+    template literals spanning lines are left untouched
+    """
+    lines = []
+    in_comment = in_template = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if in_template:
+            lines.append(line)
+        elif in_comment:
+            if '*/' in stripped:
+                in_comment = False
+            continue
+        elif stripped.startswith('/*'):
+            in_comment = '*/' not in stripped
+            continue
+        elif not stripped or stripped.startswith('//'):
+            continue
+        else:
+            lines.append(stripped)
+        if line.count('`') % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+_MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+# ═══════════════════════════════════════════════════════
+# BUILD
+# ═══════════════════════════════════════════════════════
+
+def _compressors():
+    """Encoders for the precompressed variants: gzip always, brotli if installed"""
+    compressors = {'gzip': lambda data: gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+        compressors['br'] = lambda data: brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    return compressors
+
+
+def _write(path, data):
+    if os.path.exists(path):
+        return      # Same name, same content
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _fingerprint(relative_path, data):
+    stem, ext = os.path.splitext(relative_path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def build_assets():
+    """
+    Build ASSET_FOLDER from STATIC_FOLDER and load the manifest
+
+    Returns:
+        dict: Static path ('css/style.css') -> fingerprinted name
+    """
+    compressors = _compressors()
+    manifest = {}
+    variants = {}
+    for directory, _, filenames in os.walk(STATIC_FOLDER):
+        for filename in filenames:
+            source = os.path.join(directory, filename)
+            relative_path = os.path.relpath(source, STATIC_FOLDER).replace(os.sep, '/')
+            ext = os.path.splitext(filename)[1].lower()
+            with open(source, 'rb') as f:
+                data = f.read()
+            if ext in _MINIFIERS:
+                data = _MINIFIERS[ext](data.decode('utf-8')).encode('utf-8')
+
+            name = _fingerprint(relative_path, data)
+            target = os.path.join(ASSET_FOLDER, name)
+            _write(target, data)
+            variants[name] = []
+            if ext in ASSET_COMPRESS_EXTENSIONS:
+                for encoding, suffix in ENCODINGS:
+                    if encoding in compressors:
+                        if not os.path.exists(target + suffix):
+                            _write(target + suffix, compressors[encoding](data))
+                        variants[name].append(encoding)
+            manifest[relative_path] = name
+
+    _manifest.clear()
+    _manifest.update(manifest)
+    _variants.clear()
+    _variants.update(variants)
+    _prune(manifest)
+    return dict(manifest)
+
+
+def _prune(manifest):
+    """Delete files of earlier builds (kept a while for pages still open on them)"""
+    keep = set(manifest.values())
+    cutoff = time.time() - ASSET_KEEP_DAYS * 86400
+    for directory, _, filenames in os.walk(ASSET_FOLDER):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, ASSET_FOLDER).replace(os.sep, '/')
+            for _, suffix in ENCODINGS:
+                if name.endswith(suffix):
+                    name = name[:-len(suffix)]
+            try:
+                if name not in keep and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+# ═══════════════════════════════════════════════════════
+# LOOKUP
+# ═══════════════════════════════════════════════════════
+
+def asset_name(relative_path):
+    """Fingerprinted name for a static path (unchanged if it has none)"""
+    return _manifest.get(relative_path, relative_path)
+
+
+def asset_file(name, accepts):
+    """
+    File to serve for a fingerprinted name
+
+    Args:
+        name (str): Fingerprinted name from asset_name()
+        accepts (callable): accepts(encoding) -> True if the client takes it
+
+    Returns:
+        tuple: (name in ASSET_FOLDER, Content-Encoding or None), or None
+        if name is not a fingerprinted asset of this build
+    """
+    if name not in _variants:
+        return None
+    for encoding, suffix in ENCODINGS:
+        if encoding in _variants[name] and accepts(encoding):
+            return name + suffix, encoding
+    return name, None
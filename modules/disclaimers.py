@@ -0,0 +1,143 @@
+"""
+Disclaimers Module
+The standard disclaimers, limitations and analyst notes of scan results,
+each with a stable code
+
+- Scanners put the full texts in every result (web UI, reports)
+- Compact API responses (compact=1) carry the codes instead; clients
+  resolve them once through /api/disclaimers
+- A code keeps its meaning for good: rewording a text keeps its code,
+  a new statement gets a new code
+- Texts that embed per-scan details (error messages) have no code and
+  are always sent in full
+"""
+
+DISCLAIMERS = {
+    # EXIF
+    'exif_missing': (
+        "⚠ NO EXIF METADATA FOUND - This is common and expected. "
+        "Reasons: Social media stripping, screenshot, edited image, or camera settings. "
+        "Missing EXIF is NOT suspicious."
+    ),
+    'exif_found': (
+        "⚠ EXIF DATA FOUND - Remember: EXIF can be edited, deleted, or fabricated. "
+        "Use as informational guidance only. Verify all findings independently."
+    ),
+    'gps_editable': "⚠ GPS coordinates can be edited or spoofed. Verify independently.",
+    'camera_editable': "⚠ Camera information can be modified or faked.",
+    'timestamp_editable': "⚠ Timestamps can be altered. Verify with other sources.",
+
+    # OCR
+    'ocr_accuracy': (
+        "⚠ OCR ACCURACY NOT GUARANTEED - Text extraction is informational only. "
+        "Results may contain errors, misreads, or artifacts. "
+        "Verify all extracted text manually. "
+        "Low-quality images produce unreliable results."
+    ),
+    'ocr_no_text': (
+        "⚠ NO TEXT DETECTED - Image may not contain readable text, "
+        "or text quality is too poor for OCR. This is common and not suspicious."
+    ),
+
+    # Location
+    'location_approximate': (
+        "⚠ APPROXIMATE LOCATION - Geolocation accuracy varies. "
+        "GPS coordinates may be edited or spoofed. "
+        "Street-level accuracy is NOT guaranteed. "
+        "Verify location through multiple sources."
+    ),
+    'geocoding_failed': "⚠ GEOCODING FAILED - Coordinates may be in remote area or invalid.",
+    'no_gps': '⚠ NO GPS DATA - Location cannot be determined from image metadata alone.',
+
+    # Reverse image search
+    'reverse_search_manual': (
+        "⚠ MANUAL VERIFICATION REQUIRED\n"
+        "Upload the image to each search engine manually.\n"
+        "Similar images DO NOT confirm original source.\n"
+        "Edited/cropped versions may appear.\n"
+        "Cross-reference results from multiple engines."
+    ),
+    'reverse_search_limits': (
+        "⚠ REVERSE SEARCH LIMITATIONS:\n"
+        "• This tool does NOT upload images automatically\n"
+        "• Analyst must manually upload to each search engine\n"
+        "• Similar ≠ Original source\n"
+        "• Platform identification requires additional OSINT\n"
+        "• Results may include unrelated but visually similar images"
+    ),
+
+    # Error Level Analysis
+    'ela_too_small': "⚠ ELA SKIPPED - Image is too small for block analysis.",
+    'ela_indicator': (
+        "⚠ ELA IS AN INDICATOR, NOT PROOF - Edges, text and re-saved or "
+        "screenshot images naturally show uneven error levels. "
+        "Manipulation must be confirmed by a human analyst."
+    ),
+
+    # Image analysis as a whole
+    'analyst_guidance': (
+        "═══════════════════════════════════════════════════════\n"
+        "                 OSINT ANALYST GUIDANCE                \n"
+        "═══════════════════════════════════════════════════════\n\n"
+        "⚠ HUMAN VALIDATION REQUIRED ⚠\n\n"
+        "This automated analysis provides INFORMATIONAL DATA ONLY.\n"
+        "The human analyst is the FINAL AUTHORITY on all findings.\n\n"
+        "CRITICAL REMINDERS:\n"
+        "• EXIF can be stripped, edited, or fabricated\n"
+        "• OCR accuracy is not guaranteed\n"
+        "• GPS coordinates may be spoofed\n"
+        "• Reverse search requires manual verification\n"
+        "• ELA highlights compression differences, not proof of editing\n"
+        "• Similar images ≠ confirmed source\n"
+        "• Cross-reference ALL findings with independent sources\n\n"
+        "DO NOT make conclusions based solely on this analysis.\n"
+        "Always corroborate findings through multiple OSINT methods.\n"
+        "═══════════════════════════════════════════════════════"
+    ),
+    'note_review_exif': "✓ Review EXIF data for inconsistencies",
+    'note_verify_ocr': "✓ Manually verify OCR-extracted text",
+    'note_reverse_search': "✓ Upload image to reverse search engines manually",
+    'note_cross_reference': "✓ Cross-reference location data with other intelligence",
+    'note_check_ela': "✓ Check for signs of editing or manipulation (review ELA heatmap)",
+    'note_document': "✓ Document findings in formal intelligence report",
+
+    # Domain scan limitations
+    'whois_limited': 'WHOIS data may be limited due to privacy protection',
+    'dns_basic': 'Basic DNS resolution only - advanced records require paid APIs',
+    'whois_privacy': 'WHOIS data may be protected by privacy services',
+
+    # IP scan limitations
+    'geo_accuracy': 'Geolocation accuracy varies (city-level typical)',
+    'asn_outdated': 'ISP/ASN data may be outdated',
+    'vpn_location': 'VPN/Proxy usage may show incorrect location',
+    'ip_api_rate_limit': 'Free API has rate limits (45 requests/minute)',
+
+    # Email checks
+    'email_smtp_limits': (
+        'Mail servers may accept every address (catch-all), defer or block '
+        'verification - an accepted address is not proof the mailbox is used'
+    ),
+    'email_not_verified': 'Mailbox existence not checked (syntax and mail servers only)',
+
+    # URL analysis
+    'url_single_fetch': (
+        'Pages are fetched once, without running scripts - content and redirects '
+        'can differ by visitor, device, location or time'
+    ),
+    'url_truncated': 'Page larger than the download limit - title and hash cover the downloaded part only',
+    'threat_intel_local': (
+        'Matched against local blocklists only - a listing can be stale or a false positive, '
+        'and no match does not mean the target is safe'
+    ),
+}
+
+# Result keys that hold only the texts above (or per-scan variants of them)
+BOILERPLATE_KEYS = {'disclaimer', 'timestamp_disclaimer', 'overall_disclaimer',
+                    'instructions', 'limitations', 'analyst_notes'}
+
+CODES = {text: code for code, text in DISCLAIMERS.items()}
+
+
+def disclaimer_code(text):
+    """The code for a standard text; other values (per-scan texts, None) unchanged"""
+    return CODES.get(text, text) if isinstance(text, str) else text
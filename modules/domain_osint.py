@@ -4,23 +4,197 @@ Performs basic domain reconnaissance using free/built-in tools
 """
 
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import dns.exception
 import dns.resolver
+import dns.reversename
 import whois
+from whois.parser import WhoisEntry
 from datetime import datetime
 
+from config import DNS_NAMESERVERS, WHOIS_SERVER, DOMAIN_LOOKUP_WORKERS
+from .metrics import timed, record_scan
+from .disclaimers import DISCLAIMERS
+from .threat_intel import annotate, iter_threat_intel_report
 
-def scan_domain(domain):
+_resolver = None
+
+# Normal "no such data" answers, not resolver failures (for upstream error counts)
+_DNS_NO_DATA = (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN)
+
+
+def _get_resolver():
     """
-    Perform OSINT scan on a domain
-    Returns basic information using free tools
+    DNS resolver for record lookups
+    Uses DNS_NAMESERVERS ('ip' or 'ip:port') when configured, else the system resolver
+    """
+    global _resolver
+    if _resolver is None:
+        if DNS_NAMESERVERS:
+            resolver = dns.resolver.Resolver(configure=False)
+            resolver.nameservers = []
+            for server in DNS_NAMESERVERS:
+                host, _, port = server.partition(':')
+                resolver.nameservers.append(host)
+                if port:
+                    resolver.nameserver_ports[host] = int(port)
+            _resolver = resolver
+        else:
+            _resolver = dns.resolver.get_default_resolver()
+    return _resolver
+
+
+def _resolve_ip(domain):
+    """
+    Primary IPv4 address of a domain
+    Goes through the system resolver unless DNS_NAMESERVERS is configured
     
-    Args:
-        domain (str): Target domain (e.g., example.com)
+    Raises:
+        socket.gaierror: If the domain does not resolve
+    """
+    if not DNS_NAMESERVERS:
+        return socket.gethostbyname(domain)
+    try:
+        return str(_get_resolver().resolve(domain, 'A')[0])
+    except dns.exception.DNSException as e:
+        raise socket.gaierror(str(e))
+
+
+def _whois_lookup(domain):
+    """
+    WHOIS lookup via python-whois, or directly against WHOIS_SERVER ('host:port')
+    """
+    if not WHOIS_SERVER:
+        return whois.whois(domain)
+    
+    host, _, port = WHOIS_SERVER.rpartition(':')
+    chunks = []
+    with socket.create_connection((host, int(port)), timeout=10) as sock:
+        sock.sendall(domain.encode('idna') + b'\r\n')
+        for chunk in iter(lambda: sock.recv(4096), b''):
+            chunks.append(chunk)
+    return WhoisEntry.load(domain, b''.join(chunks).decode('utf-8', errors='replace'))
+
+
+DNS_TYPES = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME']
+
+_lookup_pool = None
+_lookup_pool_lock = threading.Lock()
+
+
+def _get_lookup_pool():
+    """
+    Shared threads for the DNS and WHOIS lookups of all domain scans
+    """
+    global _lookup_pool
+    if _lookup_pool is None:
+        with _lookup_pool_lock:
+            if _lookup_pool is None:
+                _lookup_pool = ThreadPoolExecutor(max_workers=DOMAIN_LOOKUP_WORKERS,
+                                                  thread_name_prefix='domain-lookup')
+    return _lookup_pool
+
+
+def resolve_records(name, record_type, timings=None):
+    """
+    Records of one type and their TTL in seconds
     
     Returns:
-        dict: Domain intelligence data
+        tuple: (records, ttl) - ([], None) when the name has no such records
+    
+    Raises:
+        dns.exception.DNSException: The lookup failed
+    """
+    try:
+        with timed(timings, f'dns_{record_type}', upstream='dns', expected=_DNS_NO_DATA):
+            answers = _get_resolver().resolve(name, record_type)
+        return [str(rdata) for rdata in answers], answers.rrset.ttl
+    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
+        return [], None
+
+
+def _lookup_dns(domain, record_type, timings):
+    """
+    Records of one type, [] when there are none, or ['Error: ...']
     """
+    try:
+        return resolve_records(domain, record_type, timings)[0]
+    except Exception as e:
+        return [f'Error: {str(e)}']
+
+
+def reverse_lookup(ip_address, timings=None):
+    """
+    PTR hostname of an address (without the root dot) and its TTL, or (None, None)
     
+    Raises:
+        dns.exception.DNSException: The lookup failed
+    """
+    try:
+        with timed(timings, 'reverse_dns', upstream='ptr', expected=_DNS_NO_DATA):
+            answers = _get_resolver().resolve(dns.reversename.from_address(ip_address), 'PTR')
+        return str(answers[0]).rstrip('.'), answers.rrset.ttl
+    except _DNS_NO_DATA:
+        return None, None
+
+
+def lookup_whois(domain, timings=None):
+    """
+    WHOIS summary dict, or {'error': ...} when the lookup fails
+    """
+    try:
+        with timed(timings, 'whois', upstream='whois'):
+            w = _whois_lookup(domain)
+        
+        return {
+            'registrar': w.registrar if hasattr(w, 'registrar') else 'N/A',
+            'creation_date': str(w.creation_date) if hasattr(w, 'creation_date') else 'N/A',
+            'expiration_date': str(w.expiration_date) if hasattr(w, 'expiration_date') else 'N/A',
+            'name_servers': w.name_servers if hasattr(w, 'name_servers') else [],
+            'country': w.country if hasattr(w, 'country') else 'N/A',
+            'registrant': w.name if hasattr(w, 'name') else 'N/A'
+        }
+    except Exception as e:
+        return {'error': f'WHOIS lookup limited or failed: {str(e)}'}
+
+
+def _record_addresses(result):
+    """The resolved IP and A/AAAA record addresses of a scan result"""
+    records = result['dns_records']
+    return [result['ip_address']] + [
+        record for record_type in ('A', 'AAAA') for record in records.get(record_type, [])
+        if not record.startswith('Error:')
+    ]
+
+
+def _record_hosts(result):
+    """Host names in the MX, NS and CNAME records of a scan result"""
+    records = result['dns_records']
+    return [
+        record.split()[-1].rstrip('.') for record_type in ('MX', 'NS', 'CNAME')
+        for record in records.get(record_type, []) if not record.startswith('Error:')
+    ]
+
+
+def iter_scan_domain(domain):
+    """
+    Perform OSINT scan on a domain, yielding each section as it resolves
+    
+    The IP is resolved first; the DNS record lookups and WHOIS then run
+    concurrently and are yielded in completion order.
+    
+    Args:
+        domain (str): Target domain (e.g., example.com)
+    
+    Yields:
+        dict: {'event': 'ip', 'domain', 'ip_address', 'status'},
+              {'event': 'dns', 'type', 'records'} per record type,
+              {'event': 'whois', 'whois_info'},
+              and last {'event': 'result', 'result': full scan result}
+    """
+    start = time.perf_counter()
     result = {
         'domain': domain,
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -29,70 +203,86 @@ def scan_domain(domain):
         'whois_info': {},
         'status': 'Unknown',
         'errors': [],
-        'limitations': []
+        'limitations': [],
+        'timings': {}
     }
+    timings = result['timings']
     
     try:
         # 1. IP Resolution
         try:
-            ip = socket.gethostbyname(domain)
+            with timed(timings, 'resolve_ip', upstream='dns', expected=(socket.gaierror,)):
+                ip = _resolve_ip(domain)
             result['ip_address'] = ip
             result['status'] = 'Active'
         except socket.gaierror:
             result['errors'].append('Domain resolution failed')
             result['status'] = 'Resolution Failed'
-            return result
         
-        # 2. DNS Records (Basic)
-        dns_types = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME']
-        for record_type in dns_types:
-            try:
-                answers = dns.resolver.resolve(domain, record_type)
-                result['dns_records'][record_type] = [str(rdata) for rdata in answers]
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
-                result['dns_records'][record_type] = []
-            except Exception as e:
-                result['dns_records'][record_type] = [f'Error: {str(e)}']
+        yield {'event': 'ip', 'domain': domain, 'ip_address': result['ip_address'], 'status': result['status']}
         
-        # 3. WHOIS Information (Basic)
-        try:
-            w = whois.whois(domain)
+        if result['ip_address']:
+            # 2. DNS Records (Basic) and 3. WHOIS Information (Basic), concurrently
+            result['dns_records'] = {record_type: [] for record_type in DNS_TYPES}
+            pool = _get_lookup_pool()
+            lookups = {pool.submit(_lookup_dns, domain, record_type, timings): record_type
+                       for record_type in DNS_TYPES}
+            lookups[pool.submit(lookup_whois, domain, timings)] = None
+            
+            for future in as_completed(lookups):
+                record_type = lookups[future]
+                if record_type is not None:
+                    result['dns_records'][record_type] = future.result()
+                    yield {'event': 'dns', 'type': record_type, 'records': result['dns_records'][record_type]}
+                else:
+                    result['whois_info'] = future.result()
+                    if 'error' in result['whois_info']:
+                        result['limitations'].append(DISCLAIMERS['whois_limited'])
+                    yield {'event': 'whois', 'whois_info': result['whois_info']}
             
-            result['whois_info'] = {
-                'registrar': w.registrar if hasattr(w, 'registrar') else 'N/A',
-                'creation_date': str(w.creation_date) if hasattr(w, 'creation_date') else 'N/A',
-                'expiration_date': str(w.expiration_date) if hasattr(w, 'expiration_date') else 'N/A',
-                'name_servers': w.name_servers if hasattr(w, 'name_servers') else [],
-                'country': w.country if hasattr(w, 'country') else 'N/A',
-                'registrant': w.name if hasattr(w, 'name') else 'N/A'
-            }
-        except Exception as e:
-            result['whois_info'] = {'error': f'WHOIS lookup limited or failed: {str(e)}'}
-            result['limitations'].append('WHOIS data may be limited due to privacy protection')
+            # Add general limitations
+            result['limitations'].append(DISCLAIMERS['dns_basic'])
+            result['limitations'].append(DISCLAIMERS['whois_privacy'])
         
-        # Add general limitations
-        result['limitations'].append('Basic DNS resolution only - advanced records require paid APIs')
-        result['limitations'].append('WHOIS data may be protected by privacy services')
+        # 4. Local blocklists: the domain, its addresses and mail/name servers
+        annotate(result, ips=_record_addresses(result), domains=[domain] + _record_hosts(result))
         
     except Exception as e:
         result['errors'].append(f'Scan error: {str(e)}')
         result['status'] = 'Error'
     
-    return result
+    record_scan('domain', result, time.perf_counter() - start)
+    yield {'event': 'result', 'result': result}
 
 
-def format_domain_report(scan_result):
+def scan_domain(domain):
+    """
+    Perform OSINT scan on a domain
+    Returns basic information using free tools
+    
+    Args:
+        domain (str): Target domain (e.g., example.com)
+    
+    Returns:
+        dict: Domain intelligence data
+    """
+    for event in iter_scan_domain(domain):
+        if event['event'] == 'result':
+            return event['result']
+
+
+def iter_domain_report(scan_result):
     """
     Format domain scan results into a readable report
     
     Args:
         scan_result (dict): Result from scan_domain()
     
-    Returns:
-        str: Formatted text report
+    Yields:
+        str: Successive chunks of the formatted text report
     """
     
-    report = f"""
+    yield f"""
 ═══════════════════════════════════════════════════════
          DOMAIN OSINT SCAN REPORT
 ═══════════════════════════════════════════════════════
@@ -113,11 +303,11 @@ DNS RECORDS
     
     for record_type, records in scan_result['dns_records'].items():
         if records:
-            report += f"\n{record_type} Records:\n"
+            yield f"\n{record_type} Records:\n"
             for record in records:
-                report += f"  • {record}\n"
+                yield f"  • {record}\n"
     
-    report += f"""
+    yield f"""
 ─────────────────────────────────────────────────────
 WHOIS INFORMATION
 ─────────────────────────────────────────────────────
@@ -125,32 +315,45 @@ WHOIS INFORMATION
     
     if 'error' not in scan_result['whois_info']:
         for key, value in scan_result['whois_info'].items():
-            report += f"{key.replace('_', ' ').title()}: {value}\n"
+            yield f"{key.replace('_', ' ').title()}: {value}\n"
     else:
-        report += f"{scan_result['whois_info']['error']}\n"
+        yield f"{scan_result['whois_info']['error']}\n"
+    
+    yield from iter_threat_intel_report(scan_result)
     
     if scan_result['limitations']:
-        report += f"""
+        yield f"""
 ─────────────────────────────────────────────────────
 LIMITATIONS
 ─────────────────────────────────────────────────────
 """
         for limitation in scan_result['limitations']:
-            report += f"⚠ {limitation}\n"
+            yield f"⚠ {limitation}\n"
     
     if scan_result['errors']:
-        report += f"""
+        yield f"""
 ─────────────────────────────────────────────────────
 ERRORS
 ─────────────────────────────────────────────────────
 """
         for error in scan_result['errors']:
-            report += f"❌ {error}\n"
+            yield f"❌ {error}\n"
     
-    report += """
+    yield """
 ═══════════════════════════════════════════════════════
         Generated by I Pwned You OSINT Platform
 ═══════════════════════════════════════════════════════
 """
+
+
+def format_domain_report(scan_result):
+    """
+    Format domain scan results into a readable report
     
-    return report
\ No newline at end of file
+    Args:
+        scan_result (dict): Result from scan_domain()
+    
+    Returns:
+        str: Formatted text report
+    """
+    return ''.join(iter_domain_report(scan_result))
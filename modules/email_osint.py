@@ -0,0 +1,513 @@
+"""
+Email OSINT Module
+Checks email addresses: syntax, mail servers (MX) and, optionally,
+whether the mailbox exists, asked over SMTP without sending anything
+
+- Syntax: dot-atom local part, IDNA domain, RFC 5321 length limits;
+  role accounts (info@, admin@, ...) are flagged
+- MX records come from domain_osint.resolve_records() and are cached
+  for their TTL; a domain without MX falls back to its A record
+  (implicit MX) and a null MX ('0 .') means it accepts no mail
+- SMTP verification stops at RCPT TO: the answer to it says whether
+  the server takes mail for the address, then the transaction is reset
+- Connections are pooled per MX host and reused: one MAIL FROM serves
+  up to SMTP_RCPT_PER_TRANSACTION recipients, one connection up to
+  SMTP_CHECKS_PER_CONNECTION checks. At most SMTP_CONNECTIONS_PER_HOST
+  connections per MX host are open at once (per process), which is also
+  the concurrency limit for every domain that host serves
+- Each domain is probed once with a random address; a server that
+  accepts it accepts everything (catch-all), so its 'yes' means little
+- scan_emails() checks many addresses at once, grouped by domain so
+  each connection carries a run of recipients
+"""
+
+import os
+import re
+import smtplib
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import zip_longest
+
+import dns.exception
+
+from config import (
+    SMTP_SERVER, EMAIL_WORKERS, SMTP_HELO_NAME, SMTP_MAIL_FROM, SMTP_TIMEOUT,
+    SMTP_CONNECTIONS_PER_HOST, SMTP_RCPT_PER_TRANSACTION, SMTP_CHECKS_PER_CONNECTION,
+    SMTP_IDLE_TIMEOUT, EMAIL_DOMAIN_CACHE_TTL
+)
+from .domain_osint import resolve_records
+from .metrics import timed, timed_scan, inc, cache_lookup
+from .disclaimers import DISCLAIMERS
+
+SMTP_PORT = 25
+
+# RFC 5322 dot-atom (quoted local parts are legal but practically unused)
+_LOCAL_PART = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+_LABEL = re.compile(r'^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?$')
+
+ROLE_ACCOUNTS = {
+    'abuse', 'admin', 'administrator', 'billing', 'contact', 'help', 'hostmaster', 'hr', 'info',
+    'jobs', 'mail', 'marketing', 'no-reply', 'noreply', 'office', 'postmaster', 'root', 'sales',
+    'security', 'support', 'team', 'webmaster'
+}
+
+# Seconds a domain without usable MX data is remembered
+_NEGATIVE_TTL = 300
+# Domains kept in each per-domain cache before expired entries are swept
+_CACHE_MAX = 10000
+
+# Fields of each address in a bulk result
+BULK_FIELDS = ('email', 'status', 'role_account', 'mx_host', 'smtp_code', 'error')
+
+
+class SMTPCheckError(Exception):
+    """An MX host could not be asked (connection refused, dropped, MAIL FROM refused)"""
+
+
+# ═══════════════════════════════════════════════════════
+# SYNTAX AND MX
+# ═══════════════════════════════════════════════════════
+
+def parse_address(address):
+    """
+    Split and normalize an address
+
+    Returns:
+        tuple: (local part, ASCII domain, error message or None)
+    """
+    address = (address or '').strip()
+    local_part, at, domain = address.rpartition('@')
+    if not at or not local_part or not domain:
+        return local_part, domain, 'Missing local part or domain'
+    if len(local_part) > 64:
+        return local_part, domain, 'Local part longer than 64 characters'
+    if not _LOCAL_PART.match(local_part):
+        return local_part, domain, 'Invalid characters in local part'
+    try:
+        domain = domain.rstrip('.').encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return local_part, domain, 'Invalid domain name'
+    labels = domain.split('.')
+    if len(labels) < 2 or not all(_LABEL.match(label) for label in labels) or labels[-1].isdigit():
+        return local_part, domain, 'Invalid domain name'
+    if len(domain) > 253 or len(local_part) + 1 + len(domain) > 254:
+        return local_part, domain, 'Address longer than 254 characters'
+    return local_part, domain, None
+
+
+class _TTLCache:
+    """Per-domain values with their own expiry"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, key, value, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= _CACHE_MAX:
+                self._entries = {k: entry for k, entry in self._entries.items() if entry[0] >= now}
+            self._entries[key] = (now + ttl, value)
+
+
+_mx_cache = _TTLCache()
+_catch_all_cache = _TTLCache()
+
+
+def lookup_mx(domain, timings=None):
+    """
+    Mail servers of a domain, most preferred first
+
+    Returns:
+        tuple: (list of {'preference', 'host'}, implicit) - implicit is True
+        when the domain has no MX and its A record stands in; [] when it
+        accepts no mail (null MX, or no MX and no A)
+
+    Raises:
+        dns.exception.DNSException: The lookup failed
+    """
+    cached = _mx_cache.get(domain)
+    cache_lookup('mx', cached is not None)
+    if cached is not None:
+        return cached
+
+    with timed(timings, 'mx'):
+        records, ttl = resolve_records(domain, 'MX', timings)
+        implicit = False
+        servers = []
+        for record in records:
+            preference, _, host = record.partition(' ')
+            host = host.rstrip('.').lower()
+            if host:    # '0 .' is a null MX: no mail at all
+                servers.append({'preference': int(preference), 'host': host})
+        servers.sort(key=lambda server: server['preference'])
+        if not records:
+            addresses, ttl = resolve_records(domain, 'A', timings)
+            if addresses:
+                servers, implicit = [{'preference': 0, 'host': domain}], True
+
+    _mx_cache.put(domain, (servers, implicit), ttl or _NEGATIVE_TTL)
+    return servers, implicit
+
+
+# ═══════════════════════════════════════════════════════
+# SMTP CONNECTION POOL
+# ═══════════════════════════════════════════════════════
+
+class _Connection:
+    """A pooled SMTP session with its transaction state"""
+
+    def __init__(self, mx_host):
+        self.mx_host = mx_host
+        if SMTP_SERVER:
+            host, _, port = SMTP_SERVER.rpartition(':')
+            address = (host, int(port))
+        else:
+            address = (mx_host, SMTP_PORT)
+        self.smtp = smtplib.SMTP(timeout=SMTP_TIMEOUT, local_hostname=SMTP_HELO_NAME)
+        try:
+            code, message = self.smtp.connect(*address)
+            if code != 220:
+                raise SMTPCheckError(f'{mx_host} greeted with {code} {_text(message)}')
+            code, message = self.smtp.ehlo()
+            if code != 250:
+                code, message = self.smtp.helo()
+                if code != 250:
+                    raise SMTPCheckError(f'{mx_host} refused HELO: {code} {_text(message)}')
+        except BaseException:
+            self.close()
+            raise
+        inc('osint_smtp_connections_total')
+        self.in_transaction = False
+        self.recipients = 0
+        self.checks = 0
+        self.last_used = time.monotonic()
+
+    def rcpt(self, address):
+        """RCPT TO one address; returns (code, message)"""
+        if not self.in_transaction:
+            code, message = self.smtp.mail(SMTP_MAIL_FROM)
+            if code != 250:
+                raise SMTPCheckError(f'{self.mx_host} refused MAIL FROM: {code} {_text(message)}')
+            self.in_transaction = True
+        code, message = self.smtp.rcpt(address)
+        self.checks += 1
+        self.recipients += 1
+        if self.recipients >= SMTP_RCPT_PER_TRANSACTION:
+            self.reset()
+        return code, _text(message)
+
+    def reset(self):
+        self.smtp.rset()
+        self.in_transaction = False
+        self.recipients = 0
+
+    def reusable(self):
+        return (self.checks < SMTP_CHECKS_PER_CONNECTION
+                and time.monotonic() - self.last_used < SMTP_IDLE_TIMEOUT)
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class _SMTPPool:
+    """Idle connections and a connection limit per MX host"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._idle = defaultdict(list)
+        self._limits = {}
+
+    def _limit(self, mx_host):
+        with self._lock:
+            # A forked worker must not share its parent's sockets
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._idle = defaultdict(list)
+                self._limits = {}
+            limit = self._limits.get(mx_host)
+            if limit is None:
+                limit = self._limits[mx_host] = threading.BoundedSemaphore(SMTP_CONNECTIONS_PER_HOST)
+            return limit
+
+    def _take_idle(self, mx_host):
+        with self._lock:
+            idle = self._idle[mx_host]
+            while idle:
+                connection = idle.pop()
+                if connection.reusable():
+                    return connection
+                connection.close()
+        return None
+
+    @contextmanager
+    def connection(self, mx_host, timings=None):
+        """
+        Hold a connection to mx_host (waits while the host is at its limit)
+        A connection that saw an error is closed instead of returned
+        """
+        limit = self._limit(mx_host)
+        limit.acquire()
+        try:
+            connection = self._take_idle(mx_host)
+            if connection is None:
+                with timed(timings, 'smtp_connect', upstream='smtp'):
+                    connection = _Connection(mx_host)
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            connection.last_used = time.monotonic()
+            if connection.reusable():
+                with self._lock:
+                    self._idle[mx_host].append(connection)
+            else:
+                connection.close()
+        finally:
+            limit.release()
+
+
+_pool = _SMTPPool()
+
+
+def _text(message):
+    if isinstance(message, bytes):
+        message = message.decode('utf-8', errors='replace')
+    return ' '.join(message.split())
+
+
+def _rcpt_all(servers, addresses, timings=None):
+    """
+    Ask the domain's mail servers about each address (RCPT TO), trying
+    the two most preferred; a pooled connection that turns out to be
+    dead is replaced once
+
+    Returns:
+        tuple: ({address: (code, message, mx_host)}, error message or None
+        for the addresses left unanswered)
+    """
+    answers = {}
+    error = None
+    for server in servers[:2]:
+        mx_host = server['host']
+        for _ in range(2):
+            reused = False
+            try:
+                with _pool.connection(mx_host, timings) as connection:
+                    reused = connection.checks > 0
+                    for address in addresses:
+                        if address not in answers:
+                            with timed(timings, 'smtp_rcpt', upstream='smtp'):
+                                code, message = connection.rcpt(address)
+                            answers[address] = (code, message, mx_host)
+                return answers, None
+            except (SMTPCheckError, smtplib.SMTPException, OSError) as e:
+                error = f'SMTP check failed on {mx_host}: {str(e) or type(e).__name__}'
+                if not reused:
+                    break
+    return answers, error
+
+
+def _catch_all(domain, servers, timings=None):
+    """
+    True if the domain's server accepts a made-up address, False if it
+    refuses it, None if that could not be found out (not cached)
+    """
+    cached = _catch_all_cache.get(domain)
+    cache_lookup('catch_all', cached is not None)
+    if cached is not None:
+        return cached
+
+    probe = f'{uuid.uuid4().hex[:20]}@{domain}'
+    answers, _ = _rcpt_all(servers, [probe], timings)
+    code = answers.get(probe, (None,))[0]
+    if code is None or not (200 <= code < 300 or 500 <= code < 600):
+        return None
+    _catch_all_cache.put(domain, 200 <= code < 300, EMAIL_DOMAIN_CACHE_TTL)
+    return 200 <= code < 300
+
+
+# ═══════════════════════════════════════════════════════
+# CHECKS
+# ═══════════════════════════════════════════════════════
+
+def _new_result(address):
+    local_part, domain, error = parse_address(address)
+    result = {
+        'email': f'{local_part}@{domain}' if error is None else (address or '').strip(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'status': 'Unknown',
+        'syntax_valid': error is None,
+        'local_part': local_part,
+        'domain': domain,
+        'role_account': local_part.lower() in ROLE_ACCOUNTS,
+        'mx_records': [],
+        'mx_implicit': False,
+        'smtp': {'checked': False, 'mx_host': None, 'code': None, 'message': None, 'catch_all': None},
+        'errors': [],
+        'limitations': [],
+        'timings': {}
+    }
+    if error:
+        result['status'] = 'Invalid'
+        result['errors'].append(error)
+    return result
+
+
+def _check_domain(results, verify, timings=None):
+    """
+    MX lookup, then (verify) SMTP checks for valid addresses of one domain
+    Fills in each result in place
+    """
+    domain = results[0]['domain']
+    try:
+        servers, implicit = lookup_mx(domain, timings)
+    except dns.exception.DNSException as e:
+        for result in results:
+            result['status'] = 'Error'
+            result['errors'].append(f'MX lookup failed: {str(e)}')
+        return
+
+    for result in results:
+        result['mx_records'] = servers
+        result['mx_implicit'] = implicit
+        result['status'] = 'Valid domain' if servers else 'No mail server'
+    if not verify or not servers:
+        return
+
+    catch_all = _catch_all(domain, servers, timings)
+    answers, error = _rcpt_all(servers, [result['email'] for result in results], timings)
+    for result in results:
+        smtp = result['smtp']
+        smtp['catch_all'] = catch_all
+        if result['email'] not in answers:
+            result['status'] = 'Unknown'
+            result['errors'].append(error)
+            continue
+        code, message, mx_host = answers[result['email']]
+        smtp.update(checked=True, mx_host=mx_host, code=code, message=message)
+        if 200 <= code < 300:
+            result['status'] = 'Accept-all' if catch_all else 'Deliverable'
+        elif 500 <= code < 600:
+            result['status'] = 'Undeliverable'
+        else:
+            result['status'] = 'Unknown'    # Greylisting or a temporary failure
+
+
+def _finish(result, verify):
+    inc('osint_email_checks_total', status=result['status'])
+    if result['syntax_valid']:
+        result['limitations'].append(DISCLAIMERS['email_smtp_limits' if verify else 'email_not_verified'])
+    return result
+
+
+@timed_scan('email')
+def scan_email(address, verify=True):
+    """
+    Perform OSINT checks on an email address
+
+    Args:
+        address (str): Target email address
+        verify (bool): Ask the mail server whether the mailbox exists
+
+    Returns:
+        dict: Email intelligence data
+    """
+    result = _new_result(address)
+    if result['syntax_valid']:
+        try:
+            _check_domain([result], verify, result['timings'])
+        except Exception as e:
+            result['status'] = 'Error'
+            result['errors'].append(f'Scan error: {str(e)}')
+    return _finish(result, verify)
+
+
+def _bulk_entry(result):
+    return {
+        'email': result['email'],
+        'status': result['status'],
+        'role_account': result['role_account'],
+        'mx_host': result['smtp']['mx_host'] or next((server['host'] for server in result['mx_records']), None),
+        'smtp_code': result['smtp']['code'],
+        'error': result['errors'][0] if result['errors'] else None
+    }
+
+
+@timed_scan('email_bulk')
+def scan_emails(addresses, verify=True):
+    """
+    Check many email addresses at once
+
+    Duplicates are checked once. Addresses are grouped by domain in runs
+    of SMTP_RCPT_PER_TRANSACTION, and the runs of different domains are
+    interleaved so the worker threads spread over many mail servers
+    while each server sees at most SMTP_CONNECTIONS_PER_HOST connections
+
+    Args:
+        addresses (list): Email addresses
+        verify (bool): Ask the mail servers whether the mailboxes exist
+
+    Returns:
+        dict: Per-address results (BULK_FIELDS) in input order and a
+        count per status
+    """
+    results = {}
+    for address in addresses:
+        result = _new_result(address)
+        results.setdefault(result['email'], result)
+
+    by_domain = defaultdict(list)
+    for result in results.values():
+        if result['syntax_valid']:
+            by_domain[result['domain']].append(result)
+    runs = [
+        [domain_results[i:i + SMTP_RCPT_PER_TRANSACTION]
+         for i in range(0, len(domain_results), SMTP_RCPT_PER_TRANSACTION)]
+        for domain_results in by_domain.values()
+    ]
+    runs = [run for batch in zip_longest(*runs) for run in batch if run]
+
+    def check_run(run):
+        try:
+            _check_domain(run, verify)
+        except Exception as e:
+            for result in run:
+                result['status'] = 'Error'
+                result['errors'].append(f'Scan error: {str(e)}')
+
+    if runs:
+        with ThreadPoolExecutor(max_workers=min(EMAIL_WORKERS, len(runs)),
+                                thread_name_prefix='email-check') as executor:
+            list(executor.map(check_run, runs))
+
+    summary = defaultdict(int)
+    for result in results.values():
+        summary[_finish(result, verify)['status']] += 1
+    return {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'verify': verify,
+        'total': len(addresses),
+        'unique': len(results),
+        'summary': dict(summary),
+        'results': [_bulk_entry(result) for result in results.values()],
+        'limitations': [DISCLAIMERS['email_smtp_limits' if verify else 'email_not_verified']],
+        'timings': {}
+    }
@@ -0,0 +1,211 @@
+"""
+Image Forensics Module - Error Level Analysis (ELA)
+Highlights regions of an image that compress differently from the rest
+
+How ELA works:
+- The image is re-saved as JPEG at a known quality
+- Each pixel is compared with its re-compressed version
+- Regions pasted or edited after the last save often show a different
+  error level than their surroundings
+
+OSINT CONSTRAINTS:
+- ELA is an indicator, NOT proof of manipulation
+- Screenshots, PNGs and heavily re-saved images produce noisy results
+- High-contrast edges and text naturally show higher error levels
+- Human analyst interpretation of the heatmap is REQUIRED
+
+Implementation:
+- Tiles (aligned to the JPEG 8x8 grid) are processed in parallel threads;
+  Pillow's codecs and NumPy release the GIL while they work
+- Per-block statistics are computed with vectorized NumPy reductions
+- Working memory is reserved from the shared image decode budget
+"""
+
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+from config import (
+    FORENSICS_FOLDER,
+    ELA_QUALITY,
+    ELA_BLOCK_SIZE,
+    ELA_TILE_SIZE,
+    ELA_WORKERS,
+    ELA_HEATMAP_MAX_SIDE
+)
+from .image_loader import load_bounded, ImageBudgetError
+from .disclaimers import DISCLAIMERS
+
+# Heatmap colour ramp: black -> red -> yellow -> white
+_RAMP_STOPS = [0.0, 0.4, 0.8, 1.0]
+_RAMP_COLORS = np.array([
+    [0, 0, 0],
+    [220, 30, 30],
+    [255, 210, 0],
+    [255, 255, 255]
+], dtype=np.float32)
+
+
+# ═══════════════════════════════════════════════════════
+# TILE PROCESSING
+# ═══════════════════════════════════════════════════════
+
+def _tile_boxes(width, height, tile=ELA_TILE_SIZE):
+    """Split the image into tile boxes aligned to the block grid"""
+    return [
+        (left, top, min(left + tile, width), min(top + tile, height))
+        for top in range(0, height, tile)
+        for left in range(0, width, tile)
+    ]
+
+
+def _tile_block_errors(img, box, quality=ELA_QUALITY, block=ELA_BLOCK_SIZE):
+    """
+    Re-compress one tile and return its per-block mean error level
+
+    Partial blocks at the right/bottom image edge are dropped.
+
+    Returns:
+        tuple: (box, 2D float32 array of block means)
+    """
+    tile = img.crop(box)
+    if tile.mode != 'RGB':
+        tile = tile.convert('RGB')
+
+    buffer = io.BytesIO()
+    tile.save(buffer, 'JPEG', quality=quality)
+    buffer.seek(0)
+
+    original = np.asarray(tile, dtype=np.int16)
+    with Image.open(buffer) as recompressed:
+        resaved = np.asarray(recompressed, dtype=np.int16)
+
+    # Sum of absolute channel differences per pixel (0..765)
+    error = np.abs(original - resaved).sum(axis=2, dtype=np.uint16)
+
+    rows = error.shape[0] // block
+    cols = error.shape[1] // block
+    if rows == 0 or cols == 0:
+        return box, np.zeros((0, 0), dtype=np.float32)
+
+    trimmed = error[:rows * block, :cols * block]
+    means = trimmed.reshape(rows, block, cols, block).mean(axis=(1, 3), dtype=np.float32)
+    return box, means
+
+
+def _compute_block_grid(img):
+    """Run all tiles through the thread pool and assemble the block grid"""
+    block = ELA_BLOCK_SIZE
+    grid = np.zeros((img.height // block, img.width // block), dtype=np.float32)
+
+    boxes = _tile_boxes(img.width, img.height)
+    with ThreadPoolExecutor(max_workers=ELA_WORKERS) as pool:
+        for box, means in pool.map(lambda b: _tile_block_errors(img, b), boxes):
+            row, col = box[1] // block, box[0] // block
+            grid[row:row + means.shape[0], col:col + means.shape[1]] = means
+
+    return grid
+
+
+# ═══════════════════════════════════════════════════════
+# SCORING & HEATMAP
+# ═══════════════════════════════════════════════════════
+
+def _summarize(grid):
+    """Summary statistics over the block error grid"""
+    values = grid.ravel()
+    mean = float(values.mean())
+    std = float(values.std())
+    p99 = float(np.percentile(values, 99))
+    threshold = max(mean + 3 * std, 1.0)
+
+    return {
+        'mean_error': round(mean, 3),
+        'std_error': round(std, 3),
+        'p99_block_error': round(p99, 3),
+        'max_block_error': round(float(values.max()), 3),
+        'outlier_threshold': round(threshold, 3),
+        'outlier_block_ratio': round(float((values > threshold).mean()), 5),
+        'blocks_analyzed': int(values.size)
+    }
+
+
+def _render_heatmap(grid, output_path):
+    """Colour-map the block grid and save it as a PNG"""
+    scale = max(float(np.percentile(grid, 99.5)), 1.0)
+    normalized = np.clip(grid / scale, 0.0, 1.0)
+
+    rgb = np.empty(grid.shape + (3,), dtype=np.uint8)
+    for channel in range(3):
+        rgb[..., channel] = np.interp(normalized, _RAMP_STOPS, _RAMP_COLORS[:, channel])
+
+    heatmap = Image.fromarray(rgb, 'RGB')
+    factor = max(1, ELA_HEATMAP_MAX_SIDE // max(heatmap.width, heatmap.height))
+    if factor > 1:
+        heatmap = heatmap.resize((heatmap.width * factor, heatmap.height * factor), Image.NEAREST)
+    heatmap.save(output_path, 'PNG', optimize=True)
+
+
+# ═══════════════════════════════════════════════════════
+# MAIN ELA FUNCTION
+# ═══════════════════════════════════════════════════════
+
+def error_level_analysis(image_path, heatmap_name=None):
+    """
+    Perform Error Level Analysis on an image
+
+    Args:
+        image_path (str): Path to image file
+        heatmap_name (str): Filename for the heatmap PNG (saved in FORENSICS_FOLDER)
+
+    Returns:
+        dict: ELA scores, heatmap filename and disclaimers
+    """
+
+    ela_result = {
+        'performed': False,
+        'quality': ELA_QUALITY,
+        'block_size': ELA_BLOCK_SIZE,
+        'scores': {},
+        'heatmap_file': None,
+        'assessment': None,
+        'disclaimer': None
+    }
+
+    try:
+        # Working memory per in-flight tile: RGB copy, two int16 arrays, error map
+        tile_pixels = ELA_TILE_SIZE * ELA_TILE_SIZE
+        extra_bytes = ELA_WORKERS * tile_pixels * (3 + 6 + 6 + 2)
+
+        with load_bounded(image_path, extra_bytes) as img:
+            if img.width < ELA_BLOCK_SIZE or img.height < ELA_BLOCK_SIZE:
+                ela_result['disclaimer'] = DISCLAIMERS['ela_too_small']
+                return ela_result
+            grid = _compute_block_grid(img)
+
+        ela_result['scores'] = _summarize(grid)
+        ela_result['performed'] = True
+
+        if heatmap_name:
+            os.makedirs(FORENSICS_FOLDER, exist_ok=True)
+            _render_heatmap(grid, os.path.join(FORENSICS_FOLDER, heatmap_name))
+            ela_result['heatmap_file'] = heatmap_name
+
+        if ela_result['scores']['outlier_block_ratio'] > 0.01:
+            ela_result['assessment'] = (
+                "Localized regions with elevated error levels detected. "
+                "Inspect the heatmap for areas that differ from their surroundings."
+            )
+        else:
+            ela_result['assessment'] = "Error levels are broadly uniform across the image."
+
+        ela_result['disclaimer'] = DISCLAIMERS['ela_indicator']
+
+    except ImageBudgetError as e:
+        ela_result['disclaimer'] = f"⚠ ELA SKIPPED: {str(e)}."
+    except Exception as e:
+        ela_result['disclaimer'] = f"⚠ ELA FAILED: {str(e)}. File may be corrupted or unsupported format."
+
+    return ela_result
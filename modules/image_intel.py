@@ -13,18 +13,27 @@ IMPORTANT DISCLAIMERS:
 Tools Used:
 - ExifRead: EXIF metadata extraction
 - Tesseract OCR: Offline text extraction (English only)
+- Error Level Analysis: JPEG re-compression forensics (NumPy)
 - OpenStreetMap Nominatim: Reverse geocoding (free tier)
 - Manual reverse search links: Google, Yandex, Bing, TinEye
 """
 
 import os
+import sqlite3
 import exifread
-from PIL import Image
 import pytesseract
 from datetime import datetime
 import hashlib
 from geopy.geocoders import Nominatim
+import threading
 import time
+from urllib.parse import urlparse
+from config import NOMINATIM_API, NOMINATIM_MIN_INTERVAL, COORDINATION_DB
+from .image_loader import iter_ocr_regions, probe_image, ImageBudgetError
+from .image_forensics import error_level_analysis
+from .disclaimers import DISCLAIMERS
+from .metrics import timed, timed_scan
+from .threat_intel import annotate, iter_threat_intel_report
 
 
 # ═══════════════════════════════════════════════════════
@@ -63,11 +72,7 @@ def extract_exif_metadata(image_path):
             tags = exifread.process_file(f, details=False)
         
         if not tags:
-            exif_data['disclaimer'] = (
-                "⚠ NO EXIF METADATA FOUND - This is common and expected. "
-                "Reasons: Social media stripping, screenshot, edited image, or camera settings. "
-                "Missing EXIF is NOT suspicious."
-            )
+            exif_data['disclaimer'] = DISCLAIMERS['exif_missing']
             return exif_data
         
         exif_data['available'] = True
@@ -86,7 +91,7 @@ def extract_exif_metadata(image_path):
             exif_data['gps_coordinates'] = {
                 'latitude': lat,
                 'longitude': lon,
-                'disclaimer': "⚠ GPS coordinates can be edited or spoofed. Verify independently."
+                'disclaimer': DISCLAIMERS['gps_editable']
             }
         
         # Extract camera/device information
@@ -94,14 +99,14 @@ def extract_exif_metadata(image_path):
             'make': str(tags.get('Image Make', 'N/A')),
             'model': str(tags.get('Image Model', 'N/A')),
             'lens': str(tags.get('EXIF LensModel', 'N/A')),
-            'disclaimer': "⚠ Camera information can be modified or faked."
+            'disclaimer': DISCLAIMERS['camera_editable']
         }
         
         # Extract timestamp
         datetime_original = tags.get('EXIF DateTimeOriginal') or tags.get('Image DateTime')
         if datetime_original:
             exif_data['timestamp'] = str(datetime_original)
-            exif_data['timestamp_disclaimer'] = "⚠ Timestamps can be altered. Verify with other sources."
+            exif_data['timestamp_disclaimer'] = DISCLAIMERS['timestamp_editable']
         
         # Extract software/editing info
         software = tags.get('Image Software')
@@ -119,10 +124,7 @@ def extract_exif_metadata(image_path):
             if tag in tags:
                 exif_data['raw_tags'][tag] = str(tags[tag])
         
-        exif_data['disclaimer'] = (
-            "⚠ EXIF DATA FOUND - Remember: EXIF can be edited, deleted, or fabricated. "
-            "Use as informational guidance only. Verify all findings independently."
-        )
+        exif_data['disclaimer'] = DISCLAIMERS['exif_found']
         
     except Exception as e:
         exif_data['disclaimer'] = f"⚠ EXIF extraction error: {str(e)}. File may be corrupted or unsupported format."
@@ -192,15 +194,14 @@ def extract_text_ocr(image_path, tesseract_path=None):
         if tesseract_path and os.path.exists(tesseract_path):
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
         
-        # Open and process image
-        img = Image.open(image_path)
-        
-        # Convert to RGB if necessary
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Perform OCR
-        extracted_text = pytesseract.image_to_string(img, lang='eng')
+        # Decode within the memory budget (reduced resolution, bands, sampled frames)
+        # and OCR each region as it is produced, so only one region is alive at a time
+        texts = []
+        for region in iter_ocr_regions(image_path):
+            text = pytesseract.image_to_string(region, lang='eng').strip()
+            if text:
+                texts.append(text)
+        extracted_text = '\n'.join(texts)
         
         # Clean and process text
         extracted_text = extracted_text.strip()
@@ -208,18 +209,15 @@ def extract_text_ocr(image_path, tesseract_path=None):
         if extracted_text:
             ocr_result['text_found'] = True
             ocr_result['extracted_text'] = extracted_text
-            ocr_result['disclaimer'] = (
-                "⚠ OCR ACCURACY NOT GUARANTEED - Text extraction is informational only. "
-                "Results may contain errors, misreads, or artifacts. "
-                "Verify all extracted text manually. "
-                "Low-quality images produce unreliable results."
-            )
+            ocr_result['disclaimer'] = DISCLAIMERS['ocr_accuracy']
         else:
-            ocr_result['disclaimer'] = (
-                "⚠ NO TEXT DETECTED - Image may not contain readable text, "
-                "or text quality is too poor for OCR. This is common and not suspicious."
-            )
+            ocr_result['disclaimer'] = DISCLAIMERS['ocr_no_text']
         
+    except ImageBudgetError as e:
+        ocr_result['disclaimer'] = (
+            f"⚠ OCR SKIPPED: {str(e)}. "
+            "Resize or crop the image and upload it again."
+        )
     except Exception as e:
         ocr_result['disclaimer'] = (
             f"⚠ OCR FAILED: {str(e)}. "
@@ -234,6 +232,39 @@ def extract_text_ocr(image_path, tesseract_path=None):
 # REVERSE GEOCODING (GPS TO LOCATION)
 # ═══════════════════════════════════════════════════════
 
+_nominatim_local = threading.local()
+
+
+def _wait_for_nominatim_slot():
+    """
+    Sleep until this request's turn, keeping NOMINATIM_MIN_INTERVAL between
+    requests from all worker processes: each request reserves the next
+    free time in the shared coordination store (COORDINATION_DB)
+    """
+    conn = getattr(_nominatim_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(COORDINATION_DB), exist_ok=True)
+        conn = sqlite3.connect(COORDINATION_DB, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS rate_slots (name TEXT PRIMARY KEY, next_at REAL NOT NULL)')
+        _nominatim_local.conn = conn
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute("SELECT next_at FROM rate_slots WHERE name = 'nominatim'").fetchone()
+        slot = max(time.time(), row[0] if row else 0)
+        conn.execute("INSERT OR REPLACE INTO rate_slots (name, next_at) VALUES ('nominatim', ?)",
+                     (slot + NOMINATIM_MIN_INTERVAL,))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+    wait = slot - time.time()
+    if wait > 0:
+        time.sleep(wait)
+
+
 def reverse_geocode_location(latitude, longitude):
     """
     Convert GPS coordinates to approximate location using OpenStreetMap
@@ -263,13 +294,16 @@ def reverse_geocode_location(latitude, longitude):
     
     try:
         # Initialize Nominatim geocoder (free, no API key)
-        geolocator = Nominatim(user_agent="ipwnedyou_osint_v1")
+        endpoint = urlparse(NOMINATIM_API)
+        geolocator = Nominatim(user_agent="ipwnedyou_osint_v1",
+                               domain=endpoint.netloc, scheme=endpoint.scheme)
         
-        # Add delay to respect rate limits
-        time.sleep(1)
+        # Space requests to respect rate limits (only waits if the last one was recent)
+        _wait_for_nominatim_slot()
         
-        # Reverse geocode
-        location = geolocator.reverse(f"{latitude}, {longitude}", language='en', timeout=10)
+        # Reverse geocode (timed without the rate-limit wait above)
+        with timed(None, 'nominatim', upstream='nominatim'):
+            location = geolocator.reverse(f"{latitude}, {longitude}", language='en', timeout=10)
         
         if location and location.raw:
             address = location.raw.get('address', {})
@@ -283,14 +317,9 @@ def reverse_geocode_location(latitude, longitude):
             location_data['map_link'] = f"https://www.openstreetmap.org/?mlat={latitude}&mlon={longitude}#map=15/{latitude}/{longitude}"
             location_data['google_maps_link'] = f"https://www.google.com/maps?q={latitude},{longitude}"
             
-            location_data['disclaimer'] = (
-                "⚠ APPROXIMATE LOCATION - Geolocation accuracy varies. "
-                "GPS coordinates may be edited or spoofed. "
-                "Street-level accuracy is NOT guaranteed. "
-                "Verify location through multiple sources."
-            )
+            location_data['disclaimer'] = DISCLAIMERS['location_approximate']
         else:
-            location_data['disclaimer'] = "⚠ GEOCODING FAILED - Coordinates may be in remote area or invalid."
+            location_data['disclaimer'] = DISCLAIMERS['geocoding_failed']
         
     except Exception as e:
         location_data['disclaimer'] = (
@@ -327,13 +356,7 @@ def generate_reverse_search_links(image_path):
     file_hash = _calculate_file_hash(image_path)
     
     search_links = {
-        'instructions': (
-            "⚠ MANUAL VERIFICATION REQUIRED\n"
-            "Upload the image to each search engine manually.\n"
-            "Similar images DO NOT confirm original source.\n"
-            "Edited/cropped versions may appear.\n"
-            "Cross-reference results from multiple engines."
-        ),
+        'instructions': DISCLAIMERS['reverse_search_manual'],
         'search_engines': {
             'Google Lens': 'https://lens.google.com/',
             'Google Images': 'https://images.google.com/',
@@ -342,14 +365,7 @@ def generate_reverse_search_links(image_path):
             'TinEye': 'https://tineye.com/'
         },
         'file_hash_sha256': file_hash,
-        'disclaimer': (
-            "⚠ REVERSE SEARCH LIMITATIONS:\n"
-            "• This tool does NOT upload images automatically\n"
-            "• Analyst must manually upload to each search engine\n"
-            "• Similar ≠ Original source\n"
-            "• Platform identification requires additional OSINT\n"
-            "• Results may include unrelated but visually similar images"
-        )
+        'disclaimer': DISCLAIMERS['reverse_search_limits']
     }
     
     return search_links
@@ -371,6 +387,7 @@ def _calculate_file_hash(file_path):
 # MAIN IMAGE ANALYSIS FUNCTION
 # ═══════════════════════════════════════════════════════
 
+@timed_scan('image')
 def analyze_image(image_path, tesseract_path=None):
     """
     Complete image intelligence analysis following OSINT best practices
@@ -395,65 +412,66 @@ def analyze_image(image_path, tesseract_path=None):
         'ocr_results': {},
         'location_data': {},
         'reverse_search': {},
+        'forensics': {},
         'status': 'Analysis Complete',
         'overall_disclaimer': None,
-        'analyst_notes': []
+        'analyst_notes': [],
+        'timings': {}
     }
+    timings = analysis_result['timings']
     
     try:
-        # Get image dimensions
-        with Image.open(image_path) as img:
-            analysis_result['image_dimensions'] = f"{img.width} x {img.height} pixels"
+        # Get image dimensions (header only, no pixel decoding)
+        with timed(timings, 'probe'):
+            info = probe_image(image_path)
+        analysis_result['image_dimensions'] = f"{info['width']} x {info['height']} pixels"
+        if info['frames'] > 1:
+            analysis_result['image_dimensions'] += f" ({info['frames']} frames)"
         
         # 1. EXIF Metadata Extraction
-        analysis_result['exif_data'] = extract_exif_metadata(image_path)
+        with timed(timings, 'exif'):
+            analysis_result['exif_data'] = extract_exif_metadata(image_path)
         
         # 2. OCR Text Extraction
-        analysis_result['ocr_results'] = extract_text_ocr(image_path, tesseract_path)
+        with timed(timings, 'ocr'):
+            analysis_result['ocr_results'] = extract_text_ocr(image_path, tesseract_path)
         
         # 3. Reverse Geocoding (if GPS available)
         if analysis_result['exif_data'].get('gps_coordinates'):
             coords = analysis_result['exif_data']['gps_coordinates']
-            analysis_result['location_data'] = reverse_geocode_location(
-                coords['latitude'],
-                coords['longitude']
-            )
+            with timed(timings, 'geocode'):
+                analysis_result['location_data'] = reverse_geocode_location(
+                    coords['latitude'],
+                    coords['longitude']
+                )
         else:
             analysis_result['location_data'] = {
-                'disclaimer': '⚠ NO GPS DATA - Location cannot be determined from image metadata alone.'
+                'disclaimer': DISCLAIMERS['no_gps']
             }
         
         # 4. Generate Reverse Search Links
-        analysis_result['reverse_search'] = generate_reverse_search_links(image_path)
-        
-        # 5. Overall Professional Disclaimer
-        analysis_result['overall_disclaimer'] = (
-            "═══════════════════════════════════════════════════════\n"
-            "                 OSINT ANALYST GUIDANCE                \n"
-            "═══════════════════════════════════════════════════════\n\n"
-            "⚠ HUMAN VALIDATION REQUIRED ⚠\n\n"
-            "This automated analysis provides INFORMATIONAL DATA ONLY.\n"
-            "The human analyst is the FINAL AUTHORITY on all findings.\n\n"
-            "CRITICAL REMINDERS:\n"
-            "• EXIF can be stripped, edited, or fabricated\n"
-            "• OCR accuracy is not guaranteed\n"
-            "• GPS coordinates may be spoofed\n"
-            "• Reverse search requires manual verification\n"
-            "• Similar images ≠ confirmed source\n"
-            "• Cross-reference ALL findings with independent sources\n\n"
-            "DO NOT make conclusions based solely on this analysis.\n"
-            "Always corroborate findings through multiple OSINT methods.\n"
-            "═══════════════════════════════════════════════════════"
-        )
+        # (computes the SHA-256 of the file)
+        with timed(timings, 'hash'):
+            analysis_result['reverse_search'] = generate_reverse_search_links(image_path)
+        # Known-bad files in the local blocklists
+        annotate(analysis_result, hashes=[analysis_result['reverse_search']['file_hash_sha256']])
+        
+        # 5. Error Level Analysis (manipulation indicators)
+        heatmap_name = f"ela_{os.path.splitext(os.path.basename(image_path))[0]}.png"
+        with timed(timings, 'ela'):
+            analysis_result['forensics'] = error_level_analysis(image_path, heatmap_name)
+        
+        # 6. Overall Professional Disclaimer
+        analysis_result['overall_disclaimer'] = DISCLAIMERS['analyst_guidance']
         
-        # 6. Generate analyst action items
+        # 7. Generate analyst action items
         analysis_result['analyst_notes'] = [
-            "✓ Review EXIF data for inconsistencies",
-            "✓ Manually verify OCR-extracted text",
-            "✓ Upload image to reverse search engines manually",
-            "✓ Cross-reference location data with other intelligence",
-            "✓ Check for signs of editing or manipulation",
-            "✓ Document findings in formal intelligence report"
+            DISCLAIMERS['note_review_exif'],
+            DISCLAIMERS['note_verify_ocr'],
+            DISCLAIMERS['note_reverse_search'],
+            DISCLAIMERS['note_cross_reference'],
+            DISCLAIMERS['note_check_ela'],
+            DISCLAIMERS['note_document']
         ]
         
     except Exception as e:
@@ -467,18 +485,18 @@ def analyze_image(image_path, tesseract_path=None):
 # REPORT FORMATTING
 # ═══════════════════════════════════════════════════════
 
-def format_image_intel_report(analysis_result):
+def iter_image_intel_report(analysis_result):
     """
     Format image intelligence results into professional OSINT report
     
     Args:
         analysis_result (dict): Result from analyze_image()
     
-    Returns:
-        str: Formatted text report following SOC standards
+    Yields:
+        str: Successive chunks of the formatted text report following SOC standards
     """
     
-    report = f"""
+    yield f"""
 ═══════════════════════════════════════════════════════
       IMAGE INTELLIGENCE ANALYSIS REPORT
 ═══════════════════════════════════════════════════════
@@ -495,61 +513,61 @@ EXIF METADATA ANALYSIS
 """
     
     exif = analysis_result['exif_data']
-    report += f"EXIF Available: {'Yes' if exif.get('available') else 'No'}\n"
+    yield f"EXIF Available: {'Yes' if exif.get('available') else 'No'}\n"
     
     if exif.get('available'):
         # GPS Data
         if exif.get('gps_coordinates'):
             gps = exif['gps_coordinates']
-            report += f"\n📍 GPS COORDINATES FOUND:\n"
-            report += f"  Latitude: {gps['latitude']}\n"
-            report += f"  Longitude: {gps['longitude']}\n"
-            report += f"  {gps['disclaimer']}\n"
+            yield f"\n📍 GPS COORDINATES FOUND:\n"
+            yield f"  Latitude: {gps['latitude']}\n"
+            yield f"  Longitude: {gps['longitude']}\n"
+            yield f"  {gps['disclaimer']}\n"
         
         # Camera Info
         if exif.get('camera_info'):
             cam = exif['camera_info']
-            report += f"\n📷 CAMERA INFORMATION:\n"
-            report += f"  Make: {cam.get('make', 'N/A')}\n"
-            report += f"  Model: {cam.get('model', 'N/A')}\n"
-            report += f"  Lens: {cam.get('lens', 'N/A')}\n"
-            report += f"  {cam.get('disclaimer', '')}\n"
+            yield f"\n📷 CAMERA INFORMATION:\n"
+            yield f"  Make: {cam.get('make', 'N/A')}\n"
+            yield f"  Model: {cam.get('model', 'N/A')}\n"
+            yield f"  Lens: {cam.get('lens', 'N/A')}\n"
+            yield f"  {cam.get('disclaimer', '')}\n"
         
         # Timestamp
         if exif.get('timestamp'):
-            report += f"\n🕐 TIMESTAMP:\n"
-            report += f"  Original: {exif['timestamp']}\n"
+            yield f"\n🕐 TIMESTAMP:\n"
+            yield f"  Original: {exif['timestamp']}\n"
             if exif.get('timestamp_disclaimer'):
-                report += f"  {exif['timestamp_disclaimer']}\n"
+                yield f"  {exif['timestamp_disclaimer']}\n"
         
         # Software
         if exif.get('software'):
-            report += f"\n💾 SOFTWARE:\n"
-            report += f"  {exif['software']}\n"
+            yield f"\n💾 SOFTWARE:\n"
+            yield f"  {exif['software']}\n"
     
-    report += f"\n{exif.get('disclaimer', '')}\n"
+    yield f"\n{exif.get('disclaimer', '')}\n"
     
     # OCR Results
-    report += f"""
+    yield f"""
 ─────────────────────────────────────────────────────
 OCR TEXT EXTRACTION
 ─────────────────────────────────────────────────────
 """
     
     ocr = analysis_result['ocr_results']
-    report += f"Method: {ocr.get('method', 'Unknown')}\n"
-    report += f"Text Found: {'Yes' if ocr.get('text_found') else 'No'}\n"
+    yield f"Method: {ocr.get('method', 'Unknown')}\n"
+    yield f"Text Found: {'Yes' if ocr.get('text_found') else 'No'}\n"
     
     if ocr.get('text_found'):
-        report += f"\n📝 EXTRACTED TEXT:\n"
-        report += f"{'-' * 50}\n"
-        report += f"{ocr['extracted_text']}\n"
-        report += f"{'-' * 50}\n"
+        yield f"\n📝 EXTRACTED TEXT:\n"
+        yield f"{'-' * 50}\n"
+        yield f"{ocr['extracted_text']}\n"
+        yield f"{'-' * 50}\n"
     
-    report += f"\n{ocr.get('disclaimer', '')}\n"
+    yield f"\n{ocr.get('disclaimer', '')}\n"
     
     # Location Data
-    report += f"""
+    yield f"""
 ─────────────────────────────────────────────────────
 GEOLOCATION ANALYSIS
 ─────────────────────────────────────────────────────
@@ -557,51 +575,85 @@ GEOLOCATION ANALYSIS
     
     loc = analysis_result['location_data']
     if loc.get('city'):
-        report += f"City: {loc.get('city', 'N/A')}\n"
-        report += f"State/Region: {loc.get('state', 'N/A')}\n"
-        report += f"Country: {loc.get('country', 'N/A')}\n"
-        report += f"Full Address: {loc.get('full_address', 'N/A')}\n"
-        report += f"\n🗺️ MAP LINKS:\n"
-        report += f"  OpenStreetMap: {loc.get('map_link', 'N/A')}\n"
-        report += f"  Google Maps: {loc.get('google_maps_link', 'N/A')}\n"
+        yield f"City: {loc.get('city', 'N/A')}\n"
+        yield f"State/Region: {loc.get('state', 'N/A')}\n"
+        yield f"Country: {loc.get('country', 'N/A')}\n"
+        yield f"Full Address: {loc.get('full_address', 'N/A')}\n"
+        yield f"\n🗺️ MAP LINKS:\n"
+        yield f"  OpenStreetMap: {loc.get('map_link', 'N/A')}\n"
+        yield f"  Google Maps: {loc.get('google_maps_link', 'N/A')}\n"
     
-    report += f"\n{loc.get('disclaimer', '')}\n"
+    yield f"\n{loc.get('disclaimer', '')}\n"
     
     # Reverse Search
-    report += f"""
+    yield f"""
 ─────────────────────────────────────────────────────
 REVERSE IMAGE SEARCH (MANUAL VERIFICATION)
 ─────────────────────────────────────────────────────
 """
     
     rev_search = analysis_result['reverse_search']
-    report += f"{rev_search.get('instructions', '')}\n\n"
-    report += f"🔍 SEARCH ENGINES:\n"
+    yield f"{rev_search.get('instructions', '')}\n\n"
+    yield f"🔍 SEARCH ENGINES:\n"
     
     for engine, link in rev_search.get('search_engines', {}).items():
-        report += f"  • {engine}: {link}\n"
+        yield f"  • {engine}: {link}\n"
+    
+    yield f"\nFile Hash (SHA-256): {rev_search.get('file_hash_sha256', 'N/A')}\n"
+    yield f"\n{rev_search.get('disclaimer', '')}\n"
+    
+    # Forensics (ELA)
+    yield f"""
+─────────────────────────────────────────────────────
+IMAGE FORENSICS (ERROR LEVEL ANALYSIS)
+─────────────────────────────────────────────────────
+"""
+    
+    ela = analysis_result.get('forensics', {})
+    yield f"ELA Performed: {'Yes' if ela.get('performed') else 'No'}\n"
+    
+    if ela.get('performed'):
+        yield f"Re-compression Quality: {ela.get('quality')}\n"
+        yield f"Block Size: {ela.get('block_size')} px\n"
+        for key, value in ela.get('scores', {}).items():
+            yield f"  {key.replace('_', ' ').title()}: {value}\n"
+        yield f"\nAssessment: {ela.get('assessment')}\n"
+        if ela.get('heatmap_file'):
+            yield f"Heatmap: {ela['heatmap_file']}\n"
     
-    report += f"\nFile Hash (SHA-256): {rev_search.get('file_hash_sha256', 'N/A')}\n"
-    report += f"\n{rev_search.get('disclaimer', '')}\n"
+    yield f"\n{ela.get('disclaimer', '')}\n"
+    
+    yield from iter_threat_intel_report(analysis_result)
     
     # Analyst Notes
-    report += f"""
+    yield f"""
 ─────────────────────────────────────────────────────
 ANALYST ACTION ITEMS
 ─────────────────────────────────────────────────────
 """
     
     for note in analysis_result.get('analyst_notes', []):
-        report += f"{note}\n"
+        yield f"{note}\n"
     
     # Overall Disclaimer
-    report += f"\n{analysis_result.get('overall_disclaimer', '')}\n"
+    yield f"\n{analysis_result.get('overall_disclaimer', '')}\n"
     
-    report += """
+    yield """
 ═══════════════════════════════════════════════════════
      Generated by I Pwned You OSINT Platform
           Professional Image Intelligence Tool
 ═══════════════════════════════════════════════════════
 """
+
+
+def format_image_intel_report(analysis_result):
+    """
+    Format image intelligence results into professional OSINT report
+    
+    Args:
+        analysis_result (dict): Result from analyze_image()
     
-    return report
\ No newline at end of file
+    Returns:
+        str: Formatted text report following SOC standards
+    """
+    return ''.join(iter_image_intel_report(analysis_result))
@@ -0,0 +1,246 @@
+"""
+Memory-Bounded Image Loader
+Decodes uploaded images for analysis without letting a single upload
+(or a burst of concurrent uploads) blow up worker memory
+
+Techniques used:
+- Header-only probing before any pixel data is decoded
+- Reduced-resolution JPEG decoding via Image.draft (DCT scaling)
+- Grayscale, band-by-band conversion instead of a full-size RGB copy
+- Frame sampling for animated GIFs instead of decoding every frame
+- A per-process byte budget shared by all threads of a worker
+"""
+
+import threading
+from contextlib import contextmanager
+from PIL import Image
+
+from config import (
+    IMAGE_MAX_PIXELS,
+    IMAGE_OCR_MAX_PIXELS,
+    IMAGE_MEMORY_BUDGET,
+    IMAGE_BUDGET_WAIT,
+    IMAGE_TILE_SIZE,
+    IMAGE_TILE_OVERLAP,
+    IMAGE_MAX_FRAMES
+)
+
+# Let Pillow enforce the same ceiling for any code path that bypasses this module
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+# Largest grayscale range (max - min) of a row that still counts as blank
+_BLANK_ROW_RANGE = 24
+
+# Bytes per pixel for the modes we expect to decode
+_MODE_BYTES = {'1': 1, 'L': 1, 'P': 1, 'LA': 2, 'RGB': 3, 'YCbCr': 3,
+               'RGBA': 4, 'RGBX': 4, 'CMYK': 4, 'I': 4, 'F': 4, 'I;16': 2}
+
+
+class ImageBudgetError(Exception):
+    """Raised when an image exceeds the configured pixel or memory ceiling"""
+
+
+# ═══════════════════════════════════════════════════════
+# DECODE BUDGET
+# ═══════════════════════════════════════════════════════
+
+class _DecodeBudget:
+    """
+    Byte budget shared by all decoding threads in this process
+
+    Each decode reserves its estimated footprint up front. Requests that
+    would push the worker past the budget wait for others to finish, so
+    peak decoded memory per worker stays at roughly IMAGE_MEMORY_BUDGET.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes, timeout=IMAGE_BUDGET_WAIT):
+        if nbytes > self.limit:
+            raise ImageBudgetError(
+                f"Decoding needs ~{nbytes // (1024 * 1024)}MB, "
+                f"above the {self.limit // (1024 * 1024)}MB per-worker image budget"
+            )
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_use + nbytes <= self.limit, timeout):
+                raise ImageBudgetError(
+                    "Image decoder is busy with other uploads. Retry in a few seconds."
+                )
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= nbytes
+                self._cond.notify_all()
+
+
+_budget = _DecodeBudget(IMAGE_MEMORY_BUDGET)
+
+
+# ═══════════════════════════════════════════════════════
+# PROBING
+# ═══════════════════════════════════════════════════════
+
+def probe_image(image_path):
+    """
+    Read image header information without decoding pixel data
+
+    Args:
+        image_path (str): Path to image file
+
+    Returns:
+        dict: width, height, mode, format and frame count
+    """
+    with Image.open(image_path) as img:
+        return {
+            'width': img.width,
+            'height': img.height,
+            'mode': img.mode,
+            'format': img.format,
+            'frames': getattr(img, 'n_frames', 1)
+        }
+
+
+def _check_pixels(width, height):
+    """Enforce the absolute pixel ceiling"""
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ImageBudgetError(
+            f"Image is {width} x {height} pixels, above the "
+            f"{IMAGE_MAX_PIXELS // 1000000} megapixel limit"
+        )
+
+
+def _estimate_bytes(width, height, mode):
+    """Decoded size of one frame plus one grayscale band for OCR"""
+    band = width * min(height, IMAGE_TILE_SIZE)
+    return width * height * _MODE_BYTES.get(mode, 4) + band
+
+
+def _sample_frames(frame_count):
+    """Pick evenly spaced frame indexes (always including the first)"""
+    if frame_count <= IMAGE_MAX_FRAMES:
+        return list(range(frame_count))
+    step = (frame_count - 1) / (IMAGE_MAX_FRAMES - 1)
+    return sorted({round(i * step) for i in range(IMAGE_MAX_FRAMES)})
+
+
+# ═══════════════════════════════════════════════════════
+# BOUNDED DECODING
+# ═══════════════════════════════════════════════════════
+
+@contextmanager
+def load_bounded(image_path, extra_bytes=0, draft_size=None):
+    """
+    Fully decode the first frame of an image within the memory budget
+
+    Used by analysis stages that need whole frames (forensics, thumbnails).
+    The reservation covers the decoded frame plus extra_bytes of working
+    memory declared by the caller, and is released on exit.
+
+    Args:
+        image_path (str): Path to image file
+        extra_bytes (int): Additional working memory the caller will use
+        draft_size (tuple): Smallest (width, height) the caller needs; JPEGs
+            are then decoded at the coarsest DCT scale that still covers it
+
+    Yields:
+        PIL.Image.Image: Loaded image
+
+    Raises:
+        ImageBudgetError: If the image exceeds the pixel or memory ceiling
+    """
+    with Image.open(image_path) as img:
+        _check_pixels(img.width, img.height)
+        if draft_size and img.format == 'JPEG':
+            img.draft('RGB', draft_size)
+        needed = img.width * img.height * _MODE_BYTES.get(img.mode, 4) + extra_bytes
+        with _budget.reserve(needed):
+            img.load()
+            yield img
+
+
+def _blank_row(img, start, stop):
+    """The lowest row in [start, stop) with no text on it, or None"""
+    window = img.crop((0, start, img.width, stop)).convert('L')
+    for y in range(stop - start - 1, -1, -1):
+        low, high = window.crop((0, y, img.width, y + 1)).getextrema()
+        if high - low <= _BLANK_ROW_RANGE:
+            return start + y
+    return None
+
+
+def _bands(img):
+    """
+    (top, bottom) rows of the OCR bands of a tall image, at most
+    IMAGE_TILE_SIZE high; each is cut at a blank row near its end so no
+    text line is split, or overlaps the next one when there is none
+    """
+    top = 0
+    while top + IMAGE_TILE_SIZE < img.height:
+        bottom = top + IMAGE_TILE_SIZE
+        cut = _blank_row(img, bottom - IMAGE_TILE_OVERLAP, bottom)
+        if cut is not None:
+            yield top, cut
+            top = cut
+        else:
+            yield top, bottom
+            top = bottom - IMAGE_TILE_OVERLAP
+    yield top, img.height
+
+
+def iter_ocr_regions(image_path):
+    """
+    Yield grayscale image regions ready for OCR within the memory budget
+
+    - Large JPEGs are decoded at 1/2, 1/4 or 1/8 scale so the result
+      stays under IMAGE_OCR_MAX_PIXELS
+    - Images taller than IMAGE_TILE_SIZE are yielded as horizontal bands,
+      so only one band-sized grayscale copy exists at a time; bands end
+      at blank rows (or overlap by IMAGE_TILE_OVERLAP), so text lines
+      are not cut in half
+    - Multi-frame GIFs yield at most IMAGE_MAX_FRAMES sampled frames
+
+    The budget reservation is held until the generator is exhausted or
+    closed, so callers should finish OCR on each region before moving on.
+
+    Args:
+        image_path (str): Path to image file
+
+    Yields:
+        PIL.Image.Image: Grayscale ('L') region
+
+    Raises:
+        ImageBudgetError: If the image exceeds the pixel or memory ceiling
+    """
+    with Image.open(image_path) as img:
+        _check_pixels(img.width, img.height)
+
+        if img.format == 'JPEG' and img.width * img.height > IMAGE_OCR_MAX_PIXELS:
+            # draft() only reduces by 1/2, 1/4 or 1/8 and never below the requested size
+            scale = 2
+            while scale < 8 and img.width * img.height / (scale * scale) > IMAGE_OCR_MAX_PIXELS:
+                scale *= 2
+            img.draft('L', (img.width // scale, img.height // scale))
+
+        frames = _sample_frames(getattr(img, 'n_frames', 1))
+        # Pillow expands GIF frames after the first to RGB/RGBA
+        mode = img.mode if len(frames) == 1 else 'RGBA'
+        needed = _estimate_bytes(img.width, img.height, mode)
+
+        with _budget.reserve(needed):
+            for frame in frames:
+                if frame:
+                    img.seek(frame)
+                img.load()
+
+                if img.height <= IMAGE_TILE_SIZE:
+                    yield img.convert('L')
+                    continue
+
+                for top, bottom in _bands(img):
+                    yield img.crop((0, top, img.width, bottom)).convert('L')
@@ -7,7 +7,59 @@ import requests
 import socket
 from datetime import datetime
 
+from config import IP_GEOLOCATION_API
+from .metrics import timed, timed_scan, upstream_error
+from .disclaimers import DISCLAIMERS
+from .threat_intel import annotate, iter_threat_intel_report
 
+
+def lookup_geolocation(ip_address, timings=None):
+    """
+    Geolocation and ASN data from ip-api.com
+    
+    Args:
+        ip_address (str): Target IP address
+        timings (dict): Scan timings breakdown, if any
+    
+    Returns:
+        tuple: (geolocation dict ({} on failure), status, error message or None)
+    """
+    try:
+        api_url = f'{IP_GEOLOCATION_API}{ip_address}'
+        with timed(timings, 'geolocation', upstream='ip_api'):
+            response = requests.get(api_url, timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            
+            if data.get('status') == 'success':
+                return {
+                    'country': data.get('country', 'N/A'),
+                    'country_code': data.get('countryCode', 'N/A'),
+                    'region': data.get('regionName', 'N/A'),
+                    'region_code': data.get('region', 'N/A'),
+                    'city': data.get('city', 'N/A'),
+                    'zip_code': data.get('zip', 'N/A'),
+                    'latitude': data.get('lat', 'N/A'),
+                    'longitude': data.get('lon', 'N/A'),
+                    'timezone': data.get('timezone', 'N/A'),
+                    'isp': data.get('isp', 'N/A'),
+                    'organization': data.get('org', 'N/A'),
+                    'asn': data.get('as', 'N/A')
+                }, 'Active', None
+            upstream_error('ip_api')
+            return {}, 'Lookup Failed', f"Geolocation failed: {data.get('message', 'Unknown error')}"
+        
+        upstream_error('ip_api')
+        return {}, 'API Error', f'API request failed: HTTP {response.status_code}'
+    
+    except requests.exceptions.Timeout:
+        return {}, 'Timeout', 'API request timed out'
+    except requests.exceptions.RequestException as e:
+        return {}, 'Error', f'API request error: {str(e)}'
+
+
+@timed_scan('ip')
 def scan_ip(ip_address):
     """
     Perform OSINT scan on an IP address
@@ -27,7 +79,8 @@ def scan_ip(ip_address):
         'reverse_dns': None,
         'status': 'Unknown',
         'errors': [],
-        'limitations': []
+        'limitations': [],
+        'timings': {}
     }
     
     try:
@@ -40,57 +93,31 @@ def scan_ip(ip_address):
             return result
         
         # 2. Geolocation lookup using ip-api.com (free, no key required)
-        try:
-            api_url = f'http://ip-api.com/json/{ip_address}'
-            response = requests.get(api_url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') == 'success':
-                    result['geolocation'] = {
-                        'country': data.get('country', 'N/A'),
-                        'country_code': data.get('countryCode', 'N/A'),
-                        'region': data.get('regionName', 'N/A'),
-                        'region_code': data.get('region', 'N/A'),
-                        'city': data.get('city', 'N/A'),
-                        'zip_code': data.get('zip', 'N/A'),
-                        'latitude': data.get('lat', 'N/A'),
-                        'longitude': data.get('lon', 'N/A'),
-                        'timezone': data.get('timezone', 'N/A'),
-                        'isp': data.get('isp', 'N/A'),
-                        'organization': data.get('org', 'N/A'),
-                        'asn': data.get('as', 'N/A')
-                    }
-                    result['status'] = 'Active'
-                else:
-                    result['errors'].append(f"Geolocation failed: {data.get('message', 'Unknown error')}")
-                    result['status'] = 'Lookup Failed'
-            else:
-                result['errors'].append(f'API request failed: HTTP {response.status_code}')
-                result['status'] = 'API Error'
-        
-        except requests.exceptions.Timeout:
-            result['errors'].append('API request timed out')
-            result['status'] = 'Timeout'
-        except requests.exceptions.RequestException as e:
-            result['errors'].append(f'API request error: {str(e)}')
-            result['status'] = 'Error'
+        geolocation, status, error = lookup_geolocation(ip_address, result['timings'])
+        result['geolocation'] = geolocation
+        result['status'] = status
+        if error:
+            result['errors'].append(error)
         
         # 3. Reverse DNS lookup
+        hostname = None
         try:
-            hostname = socket.gethostbyaddr(ip_address)
+            with timed(result['timings'], 'reverse_dns', upstream='ptr', expected=(socket.herror,)):
+                hostname = socket.gethostbyaddr(ip_address)
             result['reverse_dns'] = hostname[0]
         except socket.herror:
             result['reverse_dns'] = 'No PTR record'
         except Exception as e:
             result['reverse_dns'] = f'Lookup failed: {str(e)}'
         
+        # 4. Local blocklists: the address and its PTR host name
+        annotate(result, ips=[ip_address], domains=[hostname[0]] if hostname else [])
+        
         # Add limitations
-        result['limitations'].append('Geolocation accuracy varies (city-level typical)')
-        result['limitations'].append('ISP/ASN data may be outdated')
-        result['limitations'].append('VPN/Proxy usage may show incorrect location')
-        result['limitations'].append('Free API has rate limits (45 requests/minute)')
+        result['limitations'].append(DISCLAIMERS['geo_accuracy'])
+        result['limitations'].append(DISCLAIMERS['asn_outdated'])
+        result['limitations'].append(DISCLAIMERS['vpn_location'])
+        result['limitations'].append(DISCLAIMERS['ip_api_rate_limit'])
         
     except Exception as e:
         result['errors'].append(f'Scan error: {str(e)}')
@@ -99,18 +126,18 @@ def scan_ip(ip_address):
     return result
 
 
-def format_ip_report(scan_result):
+def iter_ip_report(scan_result):
     """
     Format IP scan results into a readable report
     
     Args:
         scan_result (dict): Result from scan_ip()
     
-    Returns:
-        str: Formatted text report
+    Yields:
+        str: Successive chunks of the formatted text report
     """
     
-    report = f"""
+    yield f"""
 ═══════════════════════════════════════════════════════
            IP OSINT SCAN REPORT
 ═══════════════════════════════════════════════════════
@@ -126,39 +153,52 @@ GEOLOCATION INFORMATION
     
     if scan_result['geolocation']:
         for key, value in scan_result['geolocation'].items():
-            report += f"{key.replace('_', ' ').title()}: {value}\n"
+            yield f"{key.replace('_', ' ').title()}: {value}\n"
     else:
-        report += "No geolocation data available\n"
+        yield "No geolocation data available\n"
     
-    report += f"""
+    yield f"""
 ─────────────────────────────────────────────────────
 REVERSE DNS
 ─────────────────────────────────────────────────────
 Hostname: {scan_result['reverse_dns'] or 'Not available'}
 """
     
+    yield from iter_threat_intel_report(scan_result)
+    
     if scan_result['limitations']:
-        report += f"""
+        yield f"""
 ─────────────────────────────────────────────────────
 LIMITATIONS
 ─────────────────────────────────────────────────────
 """
         for limitation in scan_result['limitations']:
-            report += f"⚠ {limitation}\n"
+            yield f"⚠ {limitation}\n"
     
     if scan_result['errors']:
-        report += f"""
+        yield f"""
 ─────────────────────────────────────────────────────
 ERRORS
 ─────────────────────────────────────────────────────
 """
         for error in scan_result['errors']:
-            report += f"❌ {error}\n"
+            yield f"❌ {error}\n"
     
-    report += """
+    yield """
 ═══════════════════════════════════════════════════════
         Generated by I Pwned You OSINT Platform
 ═══════════════════════════════════════════════════════
 """
+
+
+def format_ip_report(scan_result):
+    """
+    Format IP scan results into a readable report
     
-    return report
\ No newline at end of file
+    Args:
+        scan_result (dict): Result from scan_ip()
+    
+    Returns:
+        str: Formatted text report
+    """
+    return ''.join(iter_ip_report(scan_result))
@@ -0,0 +1,387 @@
+"""
+Metrics Module
+Low-overhead stage timing, counters and histograms, exposed in
+Prometheus text format
+
+- timed() times one scan stage: the duration goes into the scan
+  result's 'timings' breakdown (milliseconds) and into a histogram;
+  stages that call an upstream also count its requests and errors
+- timed_scan() adds the end-to-end 'total' and a per-scan-type histogram
+- Each process keeps its metrics in memory and a background thread
+  snapshots them to METRICS_FOLDER/<pid>.json every few seconds
+- render_prometheus() merges the snapshots of every live process, so
+  /metrics reports the whole gunicorn worker pool whichever worker
+  serves the scrape
+- When a worker exits (recycled, restarted), its counters and histograms
+  are folded into METRICS_FOLDER/dead.json and its gauges dropped, so the
+  summed counters never go down (a decrease would read as a reset)
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from config import METRICS_FOLDER, METRICS_FLUSH_INTERVAL, COORDINATION_DB
+from .processes import pid_alive
+
+# Counters and histograms of exited processes
+DEAD_FILE = 'dead.json'
+# Folded snapshots remembered, so one folded twice (crash mid-fold) is not counted twice
+_FOLDED_KEEP = 1000
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (type, help); everything recorded must be declared here
+METRICS = {
+    'osint_http_requests_total': ('counter', 'HTTP requests by endpoint and status code'),
+    'osint_http_request_duration_seconds': ('histogram', 'HTTP request handling time by endpoint'),
+    'osint_scan_duration_seconds': ('histogram', 'End-to-end scan time by scan type'),
+    'osint_stage_duration_seconds': ('histogram', 'Scan stage time by stage'),
+    'osint_upstream_requests_total': ('counter', 'Requests to external services by upstream'),
+    'osint_upstream_errors_total': ('counter', 'Failed requests to external services by upstream'),
+    'osint_cache_hits_total': ('counter', 'Cache hits by cache'),
+    'osint_cache_misses_total': ('counter', 'Cache misses by cache'),
+    'osint_report_write_errors_total': ('counter', 'Background report writes that failed'),
+    'osint_report_queue_depth': ('gauge', 'Reports queued or being written'),
+    'osint_scan_executions_total': ('counter', 'Scans executed by single-flight leaders by scan type'),
+    'osint_scans_coalesced_total': ('counter', 'Scan requests served by another in-flight execution by scan type and scope'),
+    'osint_jobs_total': ('counter', 'Finished scan jobs by scan type, priority and status'),
+    'osint_job_wait_seconds': ('histogram', 'Time scan jobs spent queued by pool and priority'),
+    'osint_jobs_running': ('gauge', 'Scan jobs running in worker pools'),
+    'osint_watch_checks_total': ('counter', 'Watchlist facet re-checks by upstream and outcome'),
+    'osint_watch_changes_total': ('counter', 'Watchlist change events by target type and facet'),
+    'osint_watch_due_facets': ('gauge', 'Watchlist facets due for a re-check'),
+    'osint_admission_decisions_total': ('counter', 'Scan API admission decisions by scan type and decision'),
+    'osint_admission_in_flight': ('gauge', 'Admitted scan requests being handled by scan type'),
+    'osint_smtp_connections_total': ('counter', 'SMTP connections opened for mailbox checks'),
+    'osint_email_checks_total': ('counter', 'Email address checks by status'),
+    'osint_url_scans_total': ('counter', 'URL analyses by status'),
+    'osint_threat_intel_matches_total': ('counter', 'Blocklist matches in scan results by indicator type'),
+    'osint_threat_intel_reloads_total': ('counter', 'Blocklist reloads by outcome'),
+}
+
+
+class _Registry:
+    """In-process metric values, keyed by (name, sorted label items)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        # Tells this process's snapshots from those of an earlier process with the same pid
+        self.started = time.time()
+        self.claimed = False
+        self.counters = {}
+        self.histograms = {}
+        self.gauge_functions = getattr(self, 'gauge_functions', {})
+        self.dirty = False
+        self._thread = None
+
+    def _check_process(self):
+        # A forked worker starts with a copy of the parent's values; start clean
+        if self.pid != os.getpid():
+            self._reset()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self._flush_at_exit, self.pid)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_process()
+            self.counters[key] = self.counters.get(key, 0) + amount
+            self.dirty = True
+
+    def observe(self, name, labels, seconds):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_process()
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            entry[0][bisect_left(BUCKETS, seconds)] += 1
+            entry[1] += seconds
+            entry[2] += 1
+            self.dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            self.dirty = False
+            counters = [[name, dict(labels), value] for (name, labels), value in self.counters.items()]
+            histograms = [[name, dict(labels), list(buckets), total, count]
+                          for (name, labels), (buckets, total, count) in self.histograms.items()]
+            functions = list(self.gauge_functions.items())
+        gauges = []
+        for (name, labels), function in functions:
+            try:
+                gauges.append([name, dict(labels), function()])
+            except Exception:
+                pass
+        return {'pid': os.getpid(), 'started': self.started, 'counters': counters,
+                'histograms': histograms, 'gauges': gauges}
+
+    def write_snapshot(self):
+        os.makedirs(METRICS_FOLDER, exist_ok=True)
+        path = os.path.join(METRICS_FOLDER, f'{os.getpid()}.json')
+        if not self.claimed:
+            previous = _read_json(path)
+            if previous is not None and previous.get('started') != self.started:
+                # Left by an exited process that had this pid
+                _fold_dead(path)
+            self.claimed = True
+        _write_json(path, self.snapshot())
+
+    def _flush_at_exit(self, pid):
+        # Counted since the last flush; a worker that exits cleanly loses nothing
+        if pid == os.getpid() and self.dirty:
+            try:
+                self.write_snapshot()
+            except (OSError, sqlite3.Error):
+                pass
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            # Gauges change without recording anything, so always refresh when there are any
+            if self.dirty or self.gauge_functions:
+                try:
+                    self.write_snapshot()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Error writing metrics snapshot: {str(e)}")
+
+
+_registry = _Registry()
+
+
+# ═══════════════════════════════════════════════════════
+# RECORDING
+# ═══════════════════════════════════════════════════════
+
+def inc(name, amount=1, **labels):
+    """Increment a counter"""
+    _registry.inc(name, labels, amount)
+
+
+def observe(name, seconds, **labels):
+    """Record one histogram observation"""
+    _registry.observe(name, labels, seconds)
+
+
+def register_gauge(name, function, **labels):
+    """Report function() as the gauge's value for this process (summed across processes)"""
+    _registry.gauge_functions[(name, tuple(sorted(labels.items())))] = function
+
+
+def cache_lookup(cache, hit):
+    """Count a hit or miss for a named cache"""
+    inc('osint_cache_hits_total' if hit else 'osint_cache_misses_total', cache=cache)
+
+
+@contextmanager
+def timed(timings, stage, upstream=None, expected=()):
+    """
+    Time one scan stage
+
+    Args:
+        timings (dict): The result's 'timings' breakdown (None: histogram only)
+        stage (str): Stage name; repeated stages accumulate
+        upstream (str): External service called in this stage, if any
+        expected (tuple): Exception types that are normal answers (e.g. NXDOMAIN),
+            not upstream failures
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except expected:
+        raise
+    except Exception:
+        if upstream:
+            inc('osint_upstream_errors_total', upstream=upstream)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0) + elapsed * 1000, 2)
+        observe('osint_stage_duration_seconds', elapsed, stage=stage)
+        if upstream:
+            inc('osint_upstream_requests_total', upstream=upstream)
+
+
+def upstream_error(upstream):
+    """Count an upstream failure that did not raise (e.g. an HTTP error status)"""
+    inc('osint_upstream_errors_total', upstream=upstream)
+
+
+def record_scan(scan_type, result, elapsed):
+    """Add timings['total'] (milliseconds) and the scan duration histogram for a finished scan"""
+    result.setdefault('timings', {})['total'] = round(elapsed * 1000, 2)
+    observe('osint_scan_duration_seconds', elapsed, scan_type=scan_type)
+
+
+def timed_scan(scan_type):
+    """
+    Decorator for scan functions returning a result dict with 'timings'
+    Adds timings['total'] (milliseconds) and the scan duration histogram
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            record_scan(scan_type, result, time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+
+# ═══════════════════════════════════════════════════════
+# EXPOSITION
+# ═══════════════════════════════════════════════════════
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _fold_dead(path):
+    """
+    Add an exited process's counters and histograms to DEAD_FILE, then
+    delete its snapshot (its gauges went with it)
+
+    Folds are serialized across processes by a BEGIN IMMEDIATE
+    transaction on the coordination store, so none is lost or doubled.
+    """
+    os.makedirs(os.path.dirname(COORDINATION_DB), exist_ok=True)
+    conn = sqlite3.connect(COORDINATION_DB, timeout=30, isolation_level=None)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                dead_path = os.path.join(METRICS_FOLDER, DEAD_FILE)
+                dead = _read_json(dead_path) or {'folded': []}
+                folded = f"{snapshot.get('pid')}:{snapshot.get('started')}"
+                if folded not in dead['folded']:
+                    counters, _, histograms = _merge([dead, snapshot])
+                    _write_json(dead_path, {
+                        'folded': (dead['folded'] + [folded])[-_FOLDED_KEEP:],
+                        'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+                        'histograms': [[name, dict(labels), buckets, total, count]
+                                       for (name, labels), (buckets, total, count) in histograms.items()]
+                    })
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        finally:
+            conn.execute('COMMIT')
+    finally:
+        conn.close()
+
+
+def _load_snapshots():
+    """Snapshots of every live process (this one freshly taken) and the exited processes' totals"""
+    snapshots = [_registry.snapshot()]
+    if not os.path.isdir(METRICS_FOLDER):
+        return snapshots
+
+    for entry in os.listdir(METRICS_FOLDER):
+        stem, ext = os.path.splitext(entry)
+        if ext != '.json' or not stem.isdigit() or int(stem) == os.getpid():
+            continue
+        path = os.path.join(METRICS_FOLDER, entry)
+        if not pid_alive(int(stem)):
+            try:
+                _fold_dead(path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error folding metrics of exited process {stem}: {str(e)}")
+            continue
+        snapshot = _read_json(path)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+
+    dead = _read_json(os.path.join(METRICS_FOLDER, DEAD_FILE))
+    if dead is not None:
+        snapshots.append(dead)
+    return snapshots
+
+
+def _merge(snapshots):
+    """Sum snapshots; returns (counters, gauges, histograms) keyed by (name, label items)"""
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(sorted(labels.items())))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot.get('gauges', []):
+            key = (name, tuple(sorted(labels.items())))
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot.get('histograms', []):
+            key = (name, tuple(sorted(labels.items())))
+            entry = histograms.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+            entry[1] += total
+            entry[2] += count
+    return counters, gauges, histograms
+
+
+def _format_labels(labels, extra=None):
+    items = sorted(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in items)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """
+    All metrics in Prometheus text format (0.0.4): counters and histograms
+    summed over every process that ever ran, gauges over live processes
+    """
+    counters, gauges, histograms = _merge(_load_snapshots())
+
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        values = counters if metric_type == 'counter' else gauges if metric_type == 'gauge' else histograms
+        series = sorted((key, value) for key, value in values.items() if key[0] == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+
+        for (_, label_items), value in series:
+            labels = dict(label_items)
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            buckets, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + ('+Inf',), buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", bound))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(total))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,68 @@
+"""
+Processes Module
+Portable check whether another worker process is still running
+
+Shared state in the storage folder (metrics snapshots, admission slots,
+single-flight claims, scheduler jobs) records the pid of the process
+that owns it; pid_alive() tells whether that owner still exists, so
+state left by exited workers can be taken over.
+
+- Windows: the process is opened and its exit code read
+  (os.kill(pid, 0) is not a probe there: signal 0 is CTRL_C_EVENT)
+- Elsewhere: signal 0 is sent, which checks without delivering anything
+- When the answer cannot be determined the owner is treated as alive;
+  callers also expire old state, so nothing is held forever
+"""
+
+import os
+import sys
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    _kernel32.GetExitCodeProcess.restype = wintypes.BOOL
+    _kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    _kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _ERROR_ACCESS_DENIED = 5
+    _STILL_ACTIVE = 259
+
+
+def _windows_pid_alive(pid):
+    handle = _kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied: it exists but belongs to another user; otherwise it is gone
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        exit_code = wintypes.DWORD()
+        if not _kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == _STILL_ACTIVE
+    finally:
+        _kernel32.CloseHandle(handle)
+
+
+def pid_alive(pid):
+    """
+    True if a process with this pid is running (or its state is unknown)
+
+    Args:
+        pid (int): Process ID recorded by the owner (None: no owner)
+    """
+    if pid is None or pid <= 0:
+        return False
+    if sys.platform == 'win32':
+        return _windows_pid_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # PermissionError: it exists but belongs to another user
+        pass
+    return True
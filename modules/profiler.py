@@ -0,0 +1,138 @@
+"""
+Profiler Module
+On-demand sampling profiler for individual requests
+
+- A sampler thread reads the profiled thread's stack every
+  PROFILE_INTERVAL seconds (sys._current_frames), so the profiled code
+  runs unmodified and other requests are not slowed
+- Samples are aggregated into collapsed-stack format ('a;b;c 42' per
+  line), which flamegraph.pl, speedscope and inferno read directly
+- Each profile is stored in PROFILE_FOLDER as <id>.folded plus <id>.json
+  metadata (request ID, scan/report ID, endpoint, duration, timings);
+  only the newest PROFILE_KEEP are kept
+- Work handed to other threads (e.g. the ELA tile pool) appears as time
+  spent waiting for their results
+"""
+
+import json
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from config import PROFILE_FOLDER, PROFILE_INTERVAL, PROFILE_KEEP
+
+_PROFILE_ID = 'prof_'
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != __file__:
+                    names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Collapsed-stack text, heaviest stacks first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def start_profile():
+    """Start sampling the calling thread"""
+    return StackSampler(threading.get_ident()).start()
+
+
+def save_profile(sampler, metadata):
+    """
+    Stop the sampler and store the profile
+
+    Args:
+        sampler (StackSampler): From start_profile()
+        metadata (dict): Request details (request_id, endpoint, path,
+            report_file, duration_ms, timings, trigger)
+
+    Returns:
+        str: Profile ID
+    """
+    sampler.stop()
+    profile_id = f"{_PROFILE_ID}{datetime.now().strftime('%Y%m%d_%H%M%S')}_{metadata['request_id']}"
+    record = dict(metadata, profile_id=profile_id,
+                  created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                  samples=sampler.samples, interval_ms=round(sampler.interval * 1000, 3))
+
+    os.makedirs(PROFILE_FOLDER, exist_ok=True)
+    with open(os.path.join(PROFILE_FOLDER, f'{profile_id}.folded'), 'w', encoding='utf-8') as f:
+        f.write(sampler.collapsed())
+    with open(os.path.join(PROFILE_FOLDER, f'{profile_id}.json'), 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2, default=str)
+
+    _prune()
+    return profile_id
+
+
+def _prune():
+    """Keep only the newest PROFILE_KEEP profiles"""
+    names = sorted((name for name in os.listdir(PROFILE_FOLDER) if name.endswith('.json')), reverse=True)
+    for name in names[PROFILE_KEEP:]:
+        stem = name[:-len('.json')]
+        for ext in ('.json', '.folded'):
+            try:
+                os.remove(os.path.join(PROFILE_FOLDER, stem + ext))
+            except OSError:
+                pass
+
+
+def list_profiles(limit=50):
+    """Metadata of the most recent profiles, newest first"""
+    if not os.path.isdir(PROFILE_FOLDER):
+        return []
+    profiles = []
+    names = sorted((name for name in os.listdir(PROFILE_FOLDER) if name.endswith('.json')), reverse=True)
+    for name in names[:limit]:
+        try:
+            with open(os.path.join(PROFILE_FOLDER, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(profile_id):
+    """Path of a stored collapsed-stack file, or None for unknown/invalid IDs"""
+    if not profile_id.startswith(_PROFILE_ID) or not profile_id.replace('_', '').isalnum():
+        return None
+    path = os.path.join(PROFILE_FOLDER, f'{profile_id}.folded')
+    return path if os.path.isfile(path) else None
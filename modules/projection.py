@@ -0,0 +1,77 @@
+"""
+Projection Module
+Sparse field selection and compact form of scan API responses
+
+- parse_fields('ip,geolocation.city') -> field paths; a path selects a
+  key and everything under it, dotted paths select nested keys (inside
+  lists, the rest of the path applies to every dict item)
+- project() keeps only the selected fields of a result
+- compact() replaces the standard disclaimers, limitations and analyst
+  notes (disclaimers.DISCLAIMERS) with their codes and drops empty
+  sections (None, '', [], {}); per-scan texts are kept in full
+- dumps_compact() serializes without indentation, key sorting or
+  ASCII escaping
+"""
+
+import json
+
+from .disclaimers import BOILERPLATE_KEYS, disclaimer_code
+
+_EMPTY = (None, '', [], {})
+
+
+def parse_fields(text):
+    """
+    Field paths from a 'fields' query parameter
+
+    Returns:
+        dict: Selection tree (None under a key = the whole value), or None
+        when no fields were given
+    """
+    paths = {tuple(part.strip() for part in path.split('.')) for path in (text or '').split(',')}
+    paths = sorted((parts for parts in paths if all(parts)), key=len)
+    if not paths:
+        return None
+
+    tree = {}
+    # Shorter paths first, so a whole-value selection wins over paths below it
+    for parts in paths:
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is None:
+                break
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def project(value, tree):
+    """Keep only the fields selected by tree (from parse_fields)"""
+    if tree is None:
+        return value
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    return value
+
+
+def compact(value, boilerplate=False):
+    """Standard texts as codes, empty sections left out"""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = compact(item, key in BOILERPLATE_KEYS)
+            if item not in _EMPTY:
+                result[key] = item
+        return result
+    if isinstance(value, list):
+        items = (compact(item, boilerplate) for item in value)
+        return [item for item in items if item not in _EMPTY]
+    return disclaimer_code(value) if boilerplate else value
+
+
+def dumps_compact(value):
+    """Serialize a (compacted) result as tightly as json allows"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
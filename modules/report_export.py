@@ -0,0 +1,105 @@
+"""
+Report Export Module
+Streams many reports to the client as a single ZIP archive
+
+The archive is written straight into the HTTP response: ZipFile writes
+into a small unseekable sink that is drained after every chunk, so the
+archive never exists in memory or in a temp file. Members use data
+descriptors (sizes after the data), which is what ZipFile does
+automatically on an unseekable stream.
+"""
+
+import zipfile
+from datetime import datetime
+
+from .report_store import has_structured, iter_render, read_legacy_text, report_stem
+
+
+class _StreamSink:
+    """Write-only, unseekable file object that collects ZipFile output until drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _member_chunks(report_filename, fmt):
+    """Encoded content chunks of one report, or None if it has no such format"""
+    if has_structured(report_filename):
+        return (chunk.encode('utf-8') for chunk in iter_render(report_filename, fmt))
+    if fmt == 'txt':
+        text = read_legacy_text(report_filename)
+        if text is not None:
+            return iter((text.encode('utf-8'),))
+    return None
+
+
+def _member_info(report, fmt):
+    name = f"{report['report_type']}/{report_stem(report['filename'])}.{fmt}"
+    try:
+        date_time = datetime.strptime(report['created_at'], '%Y-%m-%d %H:%M:%S').timetuple()[:6]
+    except (TypeError, ValueError):
+        date_time = datetime.now().timetuple()[:6]
+    info = zipfile.ZipInfo(name, date_time=date_time)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_zip_export(reports, fmt='txt'):
+    """
+    Stream a ZIP archive of reports
+
+    Reports are grouped into one folder per report type. Reports that
+    cannot be rendered in the requested format (legacy text-only reports
+    for JSON/CSV) are skipped and counted in EXPORT_INFO.txt.
+
+    Args:
+        reports (iterable): Indexed report dicts (e.g. from iter_reports())
+        fmt (str): One of REPORT_FORMATS
+
+    Yields:
+        bytes: Archive chunks, in order
+    """
+    sink = _StreamSink()
+    exported = skipped = 0
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for report in reports:
+            chunks = _member_chunks(report['filename'], fmt)
+            if chunks is None:
+                skipped += 1
+                continue
+
+            with archive.open(_member_info(report, fmt), 'w') as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            exported += 1
+
+            data = sink.drain()
+            if data:
+                yield data
+
+        archive.writestr(
+            'EXPORT_INFO.txt',
+            f"I Pwned You - Report Export\n"
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"Format: {fmt}\n"
+            f"Reports exported: {exported}\n"
+            f"Reports skipped (not available as {fmt}): {skipped}\n"
+        )
+
+    yield sink.drain()
@@ -0,0 +1,422 @@
+"""
+Report Index Module
+SQLite catalog of generated reports, updated whenever a report is written
+
+The reports page used to list the reports folder and stat every file on
+each request. The index answers paginated, filtered and sorted queries
+from B-tree indexes instead, so listing cost does not grow with the
+number of reports on disk: every sort order has a matching index, the
+target filter is an index range and pages continue from a cursor (the
+last row's sort key) rather than an OFFSET.
+"""
+
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from config import REPORT_INDEX_DB, REPORTS_PER_PAGE
+from .report_store import iter_stored_reports, load_record, read_legacy_text
+
+REPORT_TYPES = ('domain', 'ip', 'image')
+
+# Allowed sort orders: (column, descending) pairs ending in the unique
+# filename, each served by an index below (never interpolate user input into SQL)
+SORT_OPTIONS = {
+    'newest': (('created_at', True), ('filename', True)),
+    'oldest': (('created_at', False), ('filename', False)),
+    'target': (('target', False), ('created_at', True), ('filename', True)),
+    'size': (('size', True), ('created_at', True), ('filename', True))
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    filename    TEXT PRIMARY KEY,
+    report_type TEXT NOT NULL,
+    target      TEXT,
+    created_at  TEXT NOT NULL,
+    size        INTEGER NOT NULL DEFAULT 0,
+    status      TEXT
+);
+DROP INDEX IF EXISTS idx_reports_created;
+DROP INDEX IF EXISTS idx_reports_type_created;
+DROP INDEX IF EXISTS idx_reports_target_created;
+CREATE INDEX IF NOT EXISTS idx_reports_created_name ON reports (created_at, filename);
+CREATE INDEX IF NOT EXISTS idx_reports_type_created_name ON reports (report_type, created_at, filename);
+CREATE INDEX IF NOT EXISTS idx_reports_target_sort ON reports (target, created_at DESC, filename DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_target_nocase ON reports (target COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS idx_reports_size ON reports (size, created_at, filename);
+CREATE INDEX IF NOT EXISTS idx_reports_snapshots ON reports (report_type, target, created_at, filename);
+"""
+
+# Upper bound for target prefix ranges: sorts after any text starting with the prefix
+_PREFIX_END = '\U0010ffff'
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# Legacy filenames: domain_<name>_<YYYYmmdd>_<HHMMSS>.txt, ip_<a-b-c-d>_..., image_intel_...
+_FILENAME_PATTERN = re.compile(
+    r'^(?P<type>domain|ip|image_intel)_(?:(?P<target>.+)_)?(?P<ts>\d{8}_\d{6})\.txt$'
+)
+
+_local = threading.local()
+
+
+def _connect():
+    """Return this thread's connection (SQLite connections are not shareable)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(REPORT_INDEX_DB), exist_ok=True)
+        conn = sqlite3.connect(REPORT_INDEX_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        # Cursors compare targets, which NULL would never satisfy
+        with conn:
+            conn.execute("UPDATE reports SET target = '' WHERE target IS NULL")
+        _local.conn = conn
+    return conn
+
+
+# ═══════════════════════════════════════════════════════
+# WRITING
+# ═══════════════════════════════════════════════════════
+
+def record_report(filename, report_type, target, created_at, size, status):
+    """
+    Add or update one report in the index
+
+    Args:
+        filename (str): Report filename in REPORTS_FOLDER
+        report_type (str): 'domain', 'ip' or 'image'
+        target (str): Scanned domain, IP or uploaded image name
+        created_at (str): 'YYYY-MM-DD HH:MM:SS'
+        size (int): Report size in bytes
+        status (str): Scan status
+    """
+    conn = _connect()
+    with conn:
+        # An upsert, not REPLACE, keeps columns owned by other indexes (search_rowid)
+        conn.execute(
+            'INSERT INTO reports '
+            '(filename, report_type, target, created_at, size, status) '
+            'VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (filename) DO UPDATE SET report_type = excluded.report_type, '
+            'target = excluded.target, created_at = excluded.created_at, '
+            'size = excluded.size, status = excluded.status',
+            (filename, report_type, target or '', created_at, size, status)
+        )
+
+
+def remove_report(filename):
+    """Drop a report from the index"""
+    conn = _connect()
+    with conn:
+        conn.execute('DELETE FROM reports WHERE filename = ?', (filename,))
+
+
+def _parse_legacy_report(filename, size):
+    """Recover index fields from a text-only report written before structured storage"""
+    match = _FILENAME_PATTERN.match(filename)
+    if not match:
+        return None
+
+    report_type = 'image' if match.group('type') == 'image_intel' else match.group('type')
+    created_at = datetime.strptime(match.group('ts'), '%Y%m%d_%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    target = match.group('target') or ''
+    if report_type == 'domain':
+        target = target.replace('_', '.')
+    elif report_type == 'ip':
+        target = target.replace('-', '.')
+
+    status = None
+    text = read_legacy_text(filename) or ''
+    for line in text.splitlines()[:15]:
+        if line.startswith('Status:'):
+            status = line.split(':', 1)[1].strip()
+        elif report_type == 'image' and line.startswith('Filename:'):
+            target = line.split(':', 1)[1].strip()
+
+    return (filename, report_type, target, created_at, size, status)
+
+
+def _parse_structured_report(filename, size):
+    """Index fields from a stored structured record"""
+    record = load_record(filename)
+    if record is None:
+        return None
+    result = record.get('result') or {}
+    return (filename, record.get('report_type'), record.get('target') or '',
+            result.get('timestamp') or '', size, result.get('status'))
+
+
+def rebuild_index():
+    """
+    Scan report storage once and index every report not yet in the catalog
+
+    Only needed for reports created before the index existed (or when the
+    database was deleted); normal report writes call record_report() directly.
+
+    Returns:
+        int: Number of reports added
+    """
+    conn = _connect()
+    known = {row[0] for row in conn.execute('SELECT filename FROM reports')}
+
+    rows = []
+    for filename, kind, size in iter_stored_reports():
+        if filename in known:
+            continue
+        if kind == 'structured':
+            parsed = _parse_structured_report(filename, size)
+        else:
+            parsed = _parse_legacy_report(filename, size)
+        if parsed:
+            rows.append(parsed)
+
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO reports '
+            '(filename, report_type, target, created_at, size, status) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            rows
+        )
+    return len(rows)
+
+
+def ensure_index():
+    """Populate the index from disk on first run (when it is still empty)"""
+    if _connect().execute('SELECT 1 FROM reports LIMIT 1').fetchone() is None:
+        return rebuild_index()
+    return 0
+
+
+# ═══════════════════════════════════════════════════════
+# QUERYING
+# ═══════════════════════════════════════════════════════
+
+def _filter_clauses(report_type=None, target=None, date_from=None, date_to=None):
+    """
+    Build WHERE clauses for the shared report filters
+
+    Dates are 'YYYY-MM-DD' and inclusive; date_to covers the whole day.
+
+    Raises:
+        ValueError: If a date is malformed
+    """
+    clauses, params = [], []
+
+    if report_type in REPORT_TYPES:
+        clauses.append('report_type = ?')
+        params.append(report_type)
+    if target:
+        # Case-insensitive prefix as a range on idx_reports_target_nocase
+        # (NOCASE folds ASCII only, so only ASCII is lowered)
+        prefix = target.translate(_ASCII_LOWER)
+        clauses.append('target >= ? COLLATE NOCASE AND target < ? COLLATE NOCASE')
+        params += [prefix, prefix + _PREFIX_END]
+    if date_from:
+        clauses.append('created_at >= ?')
+        params.append(datetime.strptime(date_from, '%Y-%m-%d').strftime('%Y-%m-%d'))
+    if date_to:
+        clauses.append('created_at < ?')
+        end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+        params.append(end.strftime('%Y-%m-%d'))
+
+    return clauses, params
+
+
+def _encode_cursor(row, keys):
+    """Opaque page cursor: the sort key of a row"""
+    values = [row[column] for column, _ in keys]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, keys):
+    """
+    Raises:
+        ValueError: If the cursor is malformed or from another sort order
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid page cursor') from e
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError('Invalid page cursor')
+    return values
+
+
+def _after_clause(keys, values, forward):
+    """
+    WHERE clause for the rows after (forward) or before a cursor in sort order
+
+    Runs of columns sorted the same way compare as one row value, so a
+    single-direction order is one index range. A mixed order (target)
+    adds a bound on its first column for the index to seek to.
+    """
+    runs, start = [], 0
+    for descending, group in groupby(keys, key=lambda key: key[1]):
+        columns = [column for column, _ in group]
+        op = '<' if descending == forward else '>'
+        runs.append((columns, op, values[start:start + len(columns)]))
+        start += len(columns)
+
+    def row(columns):
+        return columns[0] if len(columns) == 1 else f"({', '.join(columns)})"
+
+    def marks(count):
+        return '?' if count == 1 else f"({', '.join('?' * count)})"
+
+    alternatives, params = [], []
+    for index, (columns, op, run_values) in enumerate(runs):
+        terms = [f'{row(c)} = {marks(len(c))}' for c, _, _ in runs[:index]]
+        terms.append(f'{row(columns)} {op} {marks(len(columns))}')
+        alternatives.append(' AND '.join(terms))
+        for _, _, previous in runs[:index]:
+            params += previous
+        params += run_values
+    if len(runs) == 1:
+        return alternatives[0], params
+
+    first_column, first_op, first_values = runs[0][0][0], runs[0][1], runs[0][2]
+    clause = f"{first_column} {first_op}= ? AND ({' OR '.join(f'({a})' for a in alternatives)})"
+    return clause, [first_values[0]] + params
+
+
+def query_reports(per_page=REPORTS_PER_PAGE, report_type=None, target=None, sort='newest',
+                  date_from=None, date_to=None, after=None, before=None):
+    """
+    Fetch one page of reports
+
+    Pages are keyset-paginated: 'after' continues from the last row of a
+    page and 'before' goes back from the first, so each page is one index
+    range scan however deep it is. One extra row is fetched to detect
+    more pages, so no full COUNT(*) scan is needed.
+
+    Args:
+        per_page (int): Reports per page
+        report_type (str): Optional type filter
+        target (str): Optional target prefix filter (case-insensitive)
+        sort (str): Key from SORT_OPTIONS
+        date_from (str): Optional first day, 'YYYY-MM-DD'
+        date_to (str): Optional last day, 'YYYY-MM-DD'
+        after (str): next_cursor of the previous page
+        before (str): prev_cursor of the following page
+
+    Returns:
+        dict: {'reports': [...], 'has_next': bool, 'has_prev': bool,
+               'next_cursor': str or None, 'prev_cursor': str or None}
+
+    Raises:
+        ValueError: If a date or cursor is malformed
+    """
+    keys = SORT_OPTIONS.get(sort, SORT_OPTIONS['newest'])
+    clauses, params = _filter_clauses(report_type, target, date_from, date_to)
+    forward = not before
+    cursor = after if forward else before
+    if cursor:
+        clause, cursor_params = _after_clause(keys, _decode_cursor(cursor, keys), forward)
+        clauses.append(clause)
+        params += cursor_params
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    order = ', '.join(f"{column} {'DESC' if descending == forward else 'ASC'}"
+                      for column, descending in keys)
+
+    rows = _connect().execute(
+        f'SELECT filename, report_type, target, created_at, size, status '
+        f'FROM reports {where} ORDER BY {order} LIMIT ?',
+        params + [per_page + 1]
+    ).fetchall()
+    more = len(rows) > per_page
+    rows = rows[:per_page] if forward else rows[:per_page][::-1]
+
+    has_next, has_prev = (more, bool(cursor)) if forward else (True, more)
+    return {
+        'reports': [dict(row) for row in rows],
+        'has_next': has_next and bool(rows),
+        'has_prev': has_prev and bool(rows),
+        'next_cursor': _encode_cursor(rows[-1], keys) if has_next and rows else None,
+        'prev_cursor': _encode_cursor(rows[0], keys) if has_prev and rows else None
+    }
+
+
+def iter_reports(report_type=None, target=None, date_from=None, date_to=None, filenames=None):
+    """
+    Yield every matching report, oldest first, one row at a time
+
+    The cursor is consumed lazily, so memory does not grow with the
+    number of matches (used for bulk export).
+
+    Args:
+        report_type, target, date_from, date_to: Same filters as query_reports()
+        filenames (list): Optional explicit report names; filters still apply
+
+    Yields:
+        dict: Indexed report
+
+    Raises:
+        ValueError: If a date is malformed
+    """
+    clauses, params = _filter_clauses(report_type, target, date_from, date_to)
+    conn = _connect()
+    columns = 'filename, report_type, target, created_at, size, status'
+
+    if filenames is None:
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        for row in conn.execute(f'SELECT {columns} FROM reports {where} '
+                                f'ORDER BY created_at ASC, filename ASC', params):
+            yield dict(row)
+        return
+
+    # Explicit list: look names up in batches (SQLite caps bound parameters)
+    names = list(dict.fromkeys(filenames))
+    for start in range(0, len(names), 500):
+        batch = names[start:start + 500]
+        where = ' AND '.join([f"filename IN ({', '.join('?' * len(batch))})"] + clauses)
+        for row in conn.execute(f'SELECT {columns} FROM reports WHERE {where} '
+                                f'ORDER BY created_at ASC, filename ASC', batch + params):
+            yield dict(row)
+
+
+def target_snapshots(report_type, target, before=None, limit=2):
+    """
+    Most recent reports of one exact target, newest first
+
+    Served by idx_reports_snapshots as a single index range scan, so
+    "latest vs previous" costs the same however many reports exist.
+
+    Args:
+        report_type (str): 'domain', 'ip' or 'image'
+        target (str): Exact scan target
+        before (dict): Optional report row; only reports older than it are returned
+        limit (int): Maximum reports
+
+    Returns:
+        list: Report dicts
+    """
+    clauses, params = ['report_type = ?', 'target = ?'], [report_type, target]
+    if before:
+        clauses.append('(created_at, filename) < (?, ?)')
+        params += [before['created_at'], before['filename']]
+
+    rows = _connect().execute(
+        f"SELECT filename, report_type, target, created_at, size, status FROM reports "
+        f"WHERE {' AND '.join(clauses)} ORDER BY created_at DESC, filename DESC LIMIT ?",
+        params + [limit]
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_report(filename):
+    """Return one indexed report as a dict, or None"""
+    row = _connect().execute(
+        'SELECT filename, report_type, target, created_at, size, status '
+        'FROM reports WHERE filename = ?',
+        (filename,)
+    ).fetchone()
+    return dict(row) if row else None
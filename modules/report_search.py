@@ -0,0 +1,336 @@
+"""
+Report Search Module
+Full-text search across every generated report (SQLite FTS5)
+
+Each report is split into searchable fields when it is written, so the
+inverted index is updated incrementally and queries never touch the
+report files themselves. The catalog row of each report keeps the rowid
+of its full-text row (reports.search_rowid): FTS5 cannot look rows up by
+the UNINDEXED filename, so replacing, removing and finding unindexed
+reports go through that column instead.
+
+Query syntax:
+- github.com                 word or dotted value anywhere in the report
+- "let's encrypt"            exact phrase
+- target:github.com          field-scoped (see SEARCH_FIELDS)
+- mx:google  dns:cloudflare  one DNS record type, or all of them
+- ocr:"invoice number"       OCR text of image reports
+- a OR b,  -term             alternatives and exclusions
+"""
+
+import os
+import re
+import sqlite3
+import threading
+
+from config import REPORT_INDEX_DB
+from .report_index import _connect as _connect_catalog
+from .report_store import load_record, read_legacy_text, searchable_text
+
+DNS_COLUMNS = ('a', 'aaaa', 'mx', 'ns', 'txt', 'cname')
+
+# User-facing field name -> FTS5 columns
+SEARCH_FIELDS = {
+    'target': ('target',),
+    'ip': ('ip',),
+    'dns': DNS_COLUMNS,
+    'whois': ('whois',),
+    'registrar': ('whois',),
+    'geo': ('geo',),
+    'ocr': ('ocr',),
+    'text': ('content',),
+}
+SEARCH_FIELDS.update({column: (column,) for column in DNS_COLUMNS})
+
+_COLUMNS = ('target', 'ip') + DNS_COLUMNS + ('whois', 'geo', 'ocr', 'content')
+
+_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    filename UNINDEXED,
+    {', '.join(_COLUMNS)},
+    tokenize = 'unicode61',
+    prefix = '3'
+);
+"""
+
+# Catalogued reports missing from the full-text index (empty once backfilled)
+_UNSEARCHED_INDEX = ('CREATE INDEX IF NOT EXISTS idx_reports_unsearched '
+                     'ON reports (filename) WHERE search_rowid IS NULL')
+
+# field:"phrase" | field:word | "phrase" | word | OR | -word
+_TOKEN_PATTERN = re.compile(r'(-?)(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+
+_local = threading.local()
+
+
+class SearchQueryError(ValueError):
+    """Raised when a search query cannot be parsed"""
+
+
+def _connect():
+    """Return this thread's connection to the shared index database"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(REPORT_INDEX_DB), exist_ok=True)
+        conn = sqlite3.connect(REPORT_INDEX_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(_SCHEMA)
+        _connect_catalog()      # Creates the reports table
+        if 'search_rowid' not in {row['name'] for row in conn.execute('PRAGMA table_info(reports)')}:
+            _add_search_rowid(conn)
+        conn.execute(_UNSEARCHED_INDEX)
+        _local.conn = conn
+    return conn
+
+
+def _add_search_rowid(conn):
+    """Add reports.search_rowid, filled in from an existing full-text index in one pass"""
+    with conn:
+        conn.execute('ALTER TABLE reports ADD COLUMN search_rowid INTEGER')
+        conn.executemany('UPDATE reports SET search_rowid = ? WHERE filename = ?',
+                         conn.execute('SELECT rowid, filename FROM reports_fts').fetchall())
+
+
+# ═══════════════════════════════════════════════════════
+# FIELD EXTRACTION
+# ═══════════════════════════════════════════════════════
+
+def _join(values):
+    return '\n'.join(str(v) for v in values if v not in (None, '', 'N/A'))
+
+
+def _fields_from_result(report_type, target, scan_result):
+    """Build searchable fields from a structured scan result"""
+    fields = dict.fromkeys(_COLUMNS, '')
+    fields['target'] = target or ''
+
+    if report_type == 'domain':
+        fields['ip'] = scan_result.get('ip_address') or ''
+        for record_type, records in (scan_result.get('dns_records') or {}).items():
+            column = record_type.lower()
+            if column in DNS_COLUMNS:
+                fields[column] = _join(records)
+        whois_info = scan_result.get('whois_info') or {}
+        fields['whois'] = _join(
+            _join(v) if isinstance(v, (list, tuple)) else v for v in whois_info.values()
+        )
+    elif report_type == 'ip':
+        fields['ip'] = scan_result.get('ip') or ''
+        fields['geo'] = _join((scan_result.get('geolocation') or {}).values())
+        fields['ip'] += '\n' + (scan_result.get('reverse_dns') or '')
+    elif report_type == 'image':
+        ocr = scan_result.get('ocr_results') or {}
+        fields['ocr'] = ocr.get('extracted_text') or ''
+        location = scan_result.get('location_data') or {}
+        fields['geo'] = _join(location.get(k) for k in ('city', 'state', 'country', 'full_address'))
+
+    return fields
+
+
+def _fields_from_text(report_type, target, text):
+    """Best-effort field extraction from a rendered report (legacy backfill)"""
+    fields = dict.fromkeys(_COLUMNS, '')
+    fields['target'] = target or ''
+    lines = text.splitlines()
+
+    record_type = None
+    in_ocr = False
+    ocr_lines = []
+    for line in lines:
+        stripped = line.strip()
+        heading = re.match(r'^(A|AAAA|MX|NS|TXT|CNAME) Records:$', stripped)
+        if heading:
+            record_type = heading.group(1).lower()
+            continue
+        if record_type and stripped.startswith('•'):
+            fields[record_type] += stripped.lstrip('• ') + '\n'
+            continue
+        record_type = None
+
+        if stripped.startswith(('Primary IP:', 'Target IP:', 'Hostname:')):
+            fields['ip'] += stripped.split(':', 1)[1].strip() + '\n'
+        elif stripped.startswith(('Registrar:', 'Name Servers:', 'Registrant:')):
+            fields['whois'] += stripped.split(':', 1)[1].strip() + '\n'
+        elif stripped.startswith(('Country:', 'Region:', 'City:', 'Isp:', 'Organization:', 'Asn:')):
+            fields['geo'] += stripped.split(':', 1)[1].strip() + '\n'
+
+        if stripped == '📝 EXTRACTED TEXT:':
+            in_ocr = True
+            continue
+        if in_ocr:
+            if stripped.startswith('-' * 10):
+                if ocr_lines:
+                    in_ocr = False
+                continue
+            ocr_lines.append(line)
+
+    fields['ocr'] = '\n'.join(ocr_lines)
+    return fields
+
+
+# ═══════════════════════════════════════════════════════
+# INDEXING
+# ═══════════════════════════════════════════════════════
+
+def _delete_fields(conn, filename):
+    """Drop a report's full-text row, found through its catalog row"""
+    row = conn.execute('SELECT search_rowid FROM reports WHERE filename = ?', (filename,)).fetchone()
+    if row is None:
+        # Not catalogued: only the (unindexed) filename column can find it
+        conn.execute('DELETE FROM reports_fts WHERE filename = ?', (filename,))
+    elif row['search_rowid'] is not None:
+        conn.execute('DELETE FROM reports_fts WHERE rowid = ?', (row['search_rowid'],))
+        conn.execute('UPDATE reports SET search_rowid = NULL WHERE filename = ?', (filename,))
+
+
+def _write_fields(conn, filename, fields, content):
+    fields = dict(fields, content=content)
+    _delete_fields(conn, filename)
+    cursor = conn.execute(
+        f"INSERT INTO reports_fts (filename, {', '.join(_COLUMNS)}) "
+        f"VALUES (?{', ?' * len(_COLUMNS)})",
+        [filename] + [fields[column] for column in _COLUMNS]
+    )
+    conn.execute('UPDATE reports SET search_rowid = ? WHERE filename = ?', (cursor.lastrowid, filename))
+
+
+def index_report(filename, report_type, target, scan_result, report_content):
+    """
+    Add one report to the full-text index (called when the report is written)
+
+    Args:
+        filename (str): Report filename
+        report_type (str): 'domain', 'ip' or 'image'
+        target (str): Scan target
+        scan_result (dict): Structured scan result
+        report_content (str): Rendered text report
+    """
+    conn = _connect()
+    with conn:
+        _write_fields(conn, filename, _fields_from_result(report_type, target, scan_result),
+                      report_content)
+
+
+def unindex_report(filename):
+    """Remove a report from the full-text index (before remove_report())"""
+    conn = _connect()
+    with conn:
+        _delete_fields(conn, filename)
+
+
+def ensure_search_index():
+    """
+    Index catalogued reports that are missing from the full-text index
+
+    Only reports written before search existed (or after the database was
+    deleted) need this; it reads each such report once and is afterwards a
+    lookup in the (empty) partial index of unindexed reports.
+
+    Returns:
+        int: Number of reports indexed
+    """
+    conn = _connect()
+    missing = conn.execute(
+        'SELECT filename, report_type, target FROM reports WHERE search_rowid IS NULL'
+    ).fetchall()
+
+    with conn:
+        for row in missing:
+            record = load_record(row['filename'])
+            if record is not None:
+                result = record.get('result') or {}
+                _write_fields(conn, row['filename'],
+                              _fields_from_result(row['report_type'], row['target'], result),
+                              searchable_text(result))
+                continue
+            text = read_legacy_text(row['filename'])
+            if text is not None:
+                _write_fields(conn, row['filename'],
+                              _fields_from_text(row['report_type'], row['target'], text), text)
+    return len(missing)
+
+
+# ═══════════════════════════════════════════════════════
+# QUERYING
+# ═══════════════════════════════════════════════════════
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match_query(query):
+    """
+    Translate the user query syntax into an FTS5 MATCH expression
+
+    Every term is quoted, so dots, dashes and colons inside values
+    (IPs, hostnames, timestamps) are treated as text, not syntax.
+
+    Raises:
+        SearchQueryError: If the query has no positive terms or an unknown field
+    """
+    positives, negatives = [], []
+    pending_or = False
+
+    for negate, field, phrase, word in _TOKEN_PATTERN.findall(query or ''):
+        value = phrase if phrase else word
+        if not field and not negate and word == 'OR' and positives:
+            pending_or = True
+            continue
+        if not value.strip():
+            continue
+
+        expression = _quote(value)
+        if field:
+            columns = SEARCH_FIELDS.get(field.lower())
+            if not columns:
+                raise SearchQueryError(
+                    f"Unknown field '{field}'. Use one of: {', '.join(sorted(SEARCH_FIELDS))}"
+                )
+            expression = '{' + ' '.join(columns) + '} : ' + expression
+
+        if negate:
+            negatives.append(expression)
+        elif pending_or:
+            positives[-1] = f'({positives[-1]} OR {expression})'
+            pending_or = False
+        else:
+            positives.append(expression)
+
+    if not positives:
+        raise SearchQueryError('Search needs at least one term to match')
+
+    match = ' AND '.join(positives)
+    for expression in negatives:
+        match = f'({match}) NOT {expression}'
+    return match
+
+
+def search_reports(query, limit=25, offset=0):
+    """
+    Search all indexed reports
+
+    Args:
+        query (str): User query (see module docstring)
+        limit (int): Maximum results
+        offset (int): Results to skip
+
+    Returns:
+        list: Matching reports, best match first, each with a text snippet
+
+    Raises:
+        SearchQueryError: If the query is invalid
+    """
+    match = build_match_query(query)
+    try:
+        rows = _connect().execute(
+            "SELECT f.filename, r.report_type, r.target, r.created_at, r.status, "
+            "snippet(reports_fts, -1, '[', ']', ' … ', 12) AS snippet "
+            "FROM reports_fts f LEFT JOIN reports r ON r.filename = f.filename "
+            "WHERE reports_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+            (match, limit, offset)
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        raise SearchQueryError(f'Invalid search query: {str(e)}')
+
+    return [dict(row) for row in rows]
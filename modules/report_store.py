@@ -0,0 +1,532 @@
+"""
+Report Store Module
+Keeps the structured scan result as the canonical report and renders
+text, JSON or CSV from it on demand
+
+- Results are stored as gzip-compressed compact JSON in REPORT_DATA_FOLDER
+- Rendering is a generator, so downloads stream instead of building
+  one large string
+- Each rendition is gzipped once into REPORT_RENDER_FOLDER, so clients
+  that accept gzip get the stored bytes with no re-encoding
+- Recently rendered reports are kept in a small in-memory LRU cache
+- Reports written before structured storage existed are plain .txt
+  files (gzipped by compaction) and are still served as-is
+- Old reports are packed into monthly ZIP archives by compact_reports()
+"""
+
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import (
+    REPORTS_FOLDER,
+    REPORT_DATA_FOLDER,
+    REPORT_FORMATS,
+    RENDER_CACHE_BYTES,
+    REPORT_RENDER_FOLDER,
+    REPORT_ARCHIVE_FOLDER,
+    REPORT_GZIP_LEVEL
+)
+from .metrics import cache_lookup
+from .disclaimers import BOILERPLATE_KEYS
+
+# Text renderers live in the scanner modules, which pull in DNS, WHOIS and
+# imaging libraries; they are imported on the first text render of each type
+TEXT_RENDERERS = {
+    'domain': ('.domain_osint', 'iter_domain_report'),
+    'ip': ('.ip_osint', 'iter_ip_report'),
+    'image': ('.image_intel', 'iter_image_intel_report')
+}
+
+MIMETYPES = {
+    'txt': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+# '<type>_<target>_YYYYmmdd_HHMMSS' - creation time embedded in every report name
+_STEM_TIMESTAMP = re.compile(r'_(\d{8})_(\d{6})')
+
+
+# ═══════════════════════════════════════════════════════
+# STORAGE
+# ═══════════════════════════════════════════════════════
+
+def report_stem(report_filename):
+    """Strip the extension from a report filename ('domain_x_ts.txt' -> 'domain_x_ts')"""
+    return os.path.splitext(os.path.basename(report_filename))[0]
+
+
+def _data_member(report_filename):
+    return report_stem(report_filename) + '.json.gz'
+
+
+def _legacy_member(report_filename):
+    return report_stem(report_filename) + '.txt.gz'
+
+
+def report_month(report_filename):
+    """'YYYY-MM' the report was created in (from the timestamp in its name), or None"""
+    created = report_date(report_filename)
+    return created.strftime('%Y-%m') if created else None
+
+
+def report_date(report_filename):
+    """Creation datetime from the timestamp in a report name, or None"""
+    matches = _STEM_TIMESTAMP.findall(report_stem(report_filename))
+    if not matches:
+        return None
+    return datetime.strptime('_'.join(matches[-1]), '%Y%m%d_%H%M%S')
+
+
+def _archive_path(report_filename):
+    month = report_month(report_filename)
+    return os.path.join(REPORT_ARCHIVE_FOLDER, f'reports_{month}.zip') if month else None
+
+
+_archive_names = {}
+_archive_lock = threading.Lock()
+
+
+def _archive_contains(archive_path, member):
+    """Membership check using a cached copy of each archive's name list"""
+    try:
+        mtime = os.path.getmtime(archive_path)
+    except OSError:
+        return False
+    with _archive_lock:
+        cached = _archive_names.get(archive_path)
+        if cached is None or cached[0] != mtime:
+            with zipfile.ZipFile(archive_path) as archive:
+                cached = (mtime, frozenset(archive.namelist()))
+            _archive_names[archive_path] = cached
+    return member in cached[1]
+
+
+def _read_archived(report_filename, member):
+    """Read one member (raw gzip bytes) from the report's monthly archive"""
+    archive_path = _archive_path(report_filename)
+    if not archive_path or not _archive_contains(archive_path, member):
+        return None
+    with zipfile.ZipFile(archive_path) as archive:
+        return archive.read(member)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_result(report_filename, report_type, target, scan_result):
+    """
+    Store the canonical structured result of a scan (gzip-compressed JSON)
+
+    Args:
+        report_filename (str): Report name shown to users ('<stem>.txt')
+        report_type (str): 'domain', 'ip' or 'image'
+        target (str): Scan target
+        scan_result (dict): Result from scan_domain/scan_ip/analyze_image
+
+    Returns:
+        int: Stored (compressed) size in bytes
+    """
+    record = {'report_type': report_type, 'target': target, 'result': scan_result}
+    data = json.dumps(record, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    compressed = gzip.compress(data, compresslevel=REPORT_GZIP_LEVEL, mtime=0)
+
+    _write_atomic(os.path.join(REPORT_DATA_FOLDER, _data_member(report_filename)), compressed)
+    return len(compressed)
+
+
+def _load_data_bytes(report_filename):
+    """Raw gzip bytes of a stored record, from disk or the monthly archive"""
+    path = os.path.join(REPORT_DATA_FOLDER, _data_member(report_filename))
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    return _read_archived(report_filename, _data_member(report_filename))
+
+
+def load_record(report_filename):
+    """
+    Load a stored report record
+
+    Returns:
+        dict: {'report_type', 'target', 'result'} or None if not stored
+    """
+    data = _load_data_bytes(report_filename)
+    if data is None:
+        return None
+    return json.loads(gzip.decompress(data))
+
+
+def has_structured(report_filename):
+    """True if the report has structured data (i.e. any format can be rendered)"""
+    if os.path.isfile(os.path.join(REPORT_DATA_FOLDER, _data_member(report_filename))):
+        return True
+    archive_path = _archive_path(report_filename)
+    return bool(archive_path) and _archive_contains(archive_path, _data_member(report_filename))
+
+
+def read_legacy_text(report_filename):
+    """
+    Text of a pre-structured report (.txt, .txt.gz or archived), or None
+    """
+    path = os.path.join(REPORTS_FOLDER, os.path.basename(report_filename))
+    if os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    data = load_legacy_gzip(report_filename)
+    return gzip.decompress(data).decode('utf-8', errors='replace') if data is not None else None
+
+
+def load_legacy_gzip(report_filename):
+    """Gzip bytes of a compacted legacy text report, or None"""
+    path = os.path.join(REPORTS_FOLDER, _legacy_member(report_filename))
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    return _read_archived(report_filename, _legacy_member(report_filename))
+
+
+def iter_stored_reports():
+    """
+    Yield every stored report, loose or archived
+
+    Yields:
+        tuple: (report filename '<stem>.txt', 'structured' | 'legacy', stored size)
+    """
+    seen = set()
+    for folder, suffix, kind in ((REPORT_DATA_FOLDER, '.json.gz', 'structured'),
+                                 (REPORTS_FOLDER, '.txt.gz', 'legacy'),
+                                 (REPORTS_FOLDER, '.txt', 'legacy')):
+        if not os.path.isdir(folder):
+            continue
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.endswith(suffix):
+                report_filename = entry.name[:-len(suffix)] + '.txt'
+                if report_filename not in seen:
+                    seen.add(report_filename)
+                    yield report_filename, kind, entry.stat().st_size
+
+    if os.path.isdir(REPORT_ARCHIVE_FOLDER):
+        for entry in os.scandir(REPORT_ARCHIVE_FOLDER):
+            if not entry.name.endswith('.zip'):
+                continue
+            with zipfile.ZipFile(entry.path) as archive:
+                for info in archive.infolist():
+                    stem, _, suffix = info.filename.partition('.')
+                    report_filename = stem + '.txt'
+                    if report_filename not in seen:
+                        seen.add(report_filename)
+                        kind = 'structured' if suffix == 'json.gz' else 'legacy'
+                        yield report_filename, kind, info.file_size
+
+
+# ═══════════════════════════════════════════════════════
+# FLATTENING
+# ═══════════════════════════════════════════════════════
+
+def flatten_result(value, path=''):
+    """
+    Walk a nested result and yield (path, scalar) pairs
+
+    Example: {'dns_records': {'A': ['1.2.3.4']}} -> ('dns_records.A[0]', '1.2.3.4')
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten_result(item, f'{path}.{key}' if path else str(key))
+    elif isinstance(value, (list, tuple)):
+        for index, item in enumerate(value):
+            yield from flatten_result(item, f'{path}[{index}]')
+    else:
+        yield path, value
+
+
+def searchable_text(scan_result):
+    """All result values except boilerplate disclaimers, one per line"""
+    lines = []
+    # Stage timings describe the scan, not the target
+    content = {key: value for key, value in scan_result.items() if key != 'timings'}
+    for path, value in flatten_result(content):
+        leaf_key = path.rsplit('.', 1)[-1].split('[', 1)[0]
+        if value in (None, '') or leaf_key in BOILERPLATE_KEYS:
+            continue
+        lines.append(str(value))
+    return '\n'.join(lines)
+
+
+# ═══════════════════════════════════════════════════════
+# RENDERING
+# ═══════════════════════════════════════════════════════
+
+def _iter_json(record):
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False, default=str)
+    yield from encoder.iterencode(record['result'])
+    yield '\n'
+
+
+def _iter_csv(record):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['field', 'value'])
+    for path, value in flatten_result(record['result']):
+        writer.writerow([path, '' if value is None else value])
+        # Hand each row out as soon as it is written
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _iter_text(record):
+    spec = TEXT_RENDERERS.get(record['report_type'])
+    if spec is None:
+        raise ValueError(f"Unknown report type: {record['report_type']}")
+    module_name, function_name = spec
+    renderer = getattr(importlib.import_module(module_name, __package__), function_name)
+    yield from renderer(record['result'])
+
+
+_RENDERERS = {'txt': _iter_text, 'json': _iter_json, 'csv': _iter_csv}
+
+
+class _RenderCache:
+    """Byte-bounded LRU cache of rendered reports"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        cost = len(value)
+        if cost > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._items:
+                self.size -= len(self._items.pop(key))
+            self._items[key] = value
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+_cache = _RenderCache(RENDER_CACHE_BYTES)
+
+
+def iter_render(report_filename, fmt='txt'):
+    """
+    Render a stored report, streaming chunks as they are produced
+
+    Cached renders are returned in one piece; fresh renders are streamed
+    and cached afterwards.
+
+    Args:
+        report_filename (str): Report name ('<stem>.txt')
+        fmt (str): One of REPORT_FORMATS
+
+    Yields:
+        str: Rendered chunks
+
+    Raises:
+        ValueError: Unknown format
+        FileNotFoundError: No structured data for this report
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(REPORT_FORMATS)}")
+
+    key = (report_stem(report_filename), fmt)
+    cached = _cache.get(key)
+    cache_lookup('render', cached is not None)
+    if cached is not None:
+        yield cached
+        return
+
+    record = load_record(report_filename)
+    if record is None:
+        raise FileNotFoundError(report_filename)
+
+    chunks = []
+    for chunk in _RENDERERS[fmt](record):
+        chunks.append(chunk)
+        yield chunk
+    _cache.put(key, ''.join(chunks))
+
+
+def render_report(report_filename, fmt='txt'):
+    """Render a stored report to a single string"""
+    return ''.join(iter_render(report_filename, fmt))
+
+
+def rendered_gzip_path(report_filename, fmt='txt'):
+    """
+    Path of the gzip-encoded rendition of a report, rendering it on first use
+
+    The file holds exactly the bytes sent with Content-Encoding: gzip.
+
+    Raises:
+        ValueError: Unknown format
+        FileNotFoundError: No structured data for this report
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(REPORT_FORMATS)}")
+
+    path = os.path.join(REPORT_RENDER_FOLDER, f'{report_stem(report_filename)}.{fmt}.gz')
+    exists = os.path.isfile(path)
+    cache_lookup('rendered_gzip', exists)
+    if not exists:
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=REPORT_GZIP_LEVEL, mtime=0) as gz:
+            for chunk in iter_render(report_filename, fmt):
+                gz.write(chunk.encode('utf-8'))
+        _write_atomic(path, buffer.getvalue())
+    return path
+
+
+def iter_gunzip(source, chunk_size=64 * 1024):
+    """
+    Stream-decompress gzip data for clients that do not accept gzip
+
+    Args:
+        source (str | bytes): Path to a .gz file, or gzip bytes
+
+    Yields:
+        bytes: Decompressed chunks
+    """
+    fileobj = open(source, 'rb') if isinstance(source, str) else io.BytesIO(source)
+    with fileobj, gzip.GzipFile(fileobj=fileobj, mode='rb') as gz:
+        for chunk in iter(lambda: gz.read(chunk_size), b''):
+            yield chunk
+
+
+# ═══════════════════════════════════════════════════════
+# RETENTION & COMPACTION
+# ═══════════════════════════════════════════════════════
+
+def _add_to_archives(members_by_archive):
+    """
+    Add members to monthly archives, rewriting each archive atomically
+
+    Members are already gzip-compressed, so they are stored uncompressed
+    in the ZIP. Readers keep seeing the old archive until os.replace().
+    """
+    for archive_path, members in members_by_archive.items():
+        temp_path = f'{archive_path}.{os.getpid()}.tmp'
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED) as out:
+            if os.path.isfile(archive_path):
+                with zipfile.ZipFile(archive_path) as existing:
+                    for info in existing.infolist():
+                        if info.filename not in members:
+                            out.writestr(info, existing.read(info.filename))
+            for member, source_path in members.items():
+                out.write(source_path, member)
+        os.replace(temp_path, archive_path)
+
+
+def compact_reports(older_than_days, retention_days=None, now=None):
+    """
+    Compress and pack old reports; optionally delete expired ones
+
+    - Legacy .txt reports are gzipped in place (.txt.gz)
+    - Structured data and legacy .txt.gz older than older_than_days are
+      moved into reports/archive/reports_YYYY-MM.zip
+    - Pre-encoded renditions of archived reports are dropped (re-created on demand)
+    - With retention_days, reports older than that are deleted everywhere
+      and returned so the caller can drop them from the indexes
+
+    Args:
+        older_than_days (int): Archive reports older than this
+        retention_days (int): Delete reports older than this (None = keep)
+        now (datetime): Reference time (for tests)
+
+    Returns:
+        dict: {'compressed': int, 'archived': int, 'expired': [report filenames]}
+    """
+    now = now or datetime.now()
+    archive_before = now - timedelta(days=older_than_days)
+    expire_before = now - timedelta(days=retention_days) if retention_days is not None else None
+    summary = {'compressed': 0, 'archived': 0, 'expired': []}
+
+    # 1. Gzip legacy text reports in place
+    for entry in os.scandir(REPORTS_FOLDER):
+        if entry.is_file() and entry.name.endswith('.txt'):
+            with open(entry.path, 'rb') as f:
+                data = gzip.compress(f.read(), compresslevel=REPORT_GZIP_LEVEL, mtime=0)
+            _write_atomic(entry.path + '.gz', data)
+            os.remove(entry.path)
+            summary['compressed'] += 1
+
+    # 2. Collect loose files old enough to archive (or expire)
+    candidates = []
+    for folder, suffix in ((REPORT_DATA_FOLDER, '.json.gz'), (REPORTS_FOLDER, '.txt.gz')):
+        if not os.path.isdir(folder):
+            continue
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.endswith(suffix):
+                report_filename = entry.name[:-len(suffix)] + '.txt'
+                created = report_date(report_filename)
+                if created and created < archive_before:
+                    candidates.append((report_filename, entry.name, entry.path, created))
+
+    members_by_archive = {}
+    loose_paths = []
+    for report_filename, member, path, created in candidates:
+        if expire_before and created < expire_before:
+            summary['expired'].append(report_filename)
+            continue
+        members_by_archive.setdefault(_archive_path(report_filename), {})[member] = path
+        loose_paths.append(path)
+
+    _add_to_archives(members_by_archive)
+    for path in loose_paths:
+        os.remove(path)
+    summary['archived'] = len(loose_paths)
+
+    # 3. Retention: delete expired loose files and whole expired months
+    if expire_before:
+        for report_filename, member, path, created in candidates:
+            if report_filename in summary['expired']:
+                os.remove(path)
+        for entry in os.scandir(REPORT_ARCHIVE_FOLDER):
+            match = re.match(r'^reports_(\d{4})-(\d{2})\.zip$', entry.name)
+            if not match:
+                continue
+            month_end = datetime(int(match.group(1)), int(match.group(2)), 28) + timedelta(days=4)
+            if month_end.replace(day=1) <= expire_before:
+                with zipfile.ZipFile(entry.path) as archive:
+                    summary['expired'].extend(
+                        name.split('.', 1)[0] + '.txt' for name in archive.namelist()
+                    )
+                os.remove(entry.path)
+
+    # 4. Drop pre-encoded renditions of reports no longer kept loose
+    gone = {report_stem(name) for name, _, _, _ in candidates}
+    if os.path.isdir(REPORT_RENDER_FOLDER):
+        for entry in os.scandir(REPORT_RENDER_FOLDER):
+            if entry.name.split('.', 1)[0] in gone:
+                os.remove(entry.path)
+
+    return summary
@@ -0,0 +1,145 @@
+"""
+Report Writer Module
+Persists reports on a background thread so scan responses never wait on disk
+
+- submit_report() queues the write and returns immediately
+- The writer thread stores the structured result (temp file + fsync +
+  atomic rename), then updates the report catalog and search index, so a
+  report is listed only once its data is on disk
+- Readers call wait_for_report() before touching a report that may still
+  be queued (e.g. a download right after the scan)
+- new_report_id() gives unique IDs for report and upload names, across
+  worker processes too
+"""
+
+import atexit
+import os
+import queue
+import secrets
+import threading
+from datetime import datetime, timedelta
+
+from .metrics import inc, register_gauge, timed
+from .report_index import record_report
+from .report_search import index_report
+from .report_store import save_result, searchable_text
+
+_id_lock = threading.Lock()
+_last_id_time = datetime.min
+_id_pid = None
+_id_suffix = None
+
+
+def new_report_id():
+    """
+    Unique timestamp ID: 'YYYYmmdd_HHMMSS_ffffff_<process>'
+
+    Microsecond resolution, and never equal to or earlier than the previous
+    ID from this process, even when the clock has not advanced (or went back).
+    The suffix (pid and random bytes, drawn again after a fork) keeps
+    workers that take the same microsecond from naming the same report.
+    """
+    global _last_id_time, _id_pid, _id_suffix
+    with _id_lock:
+        if _id_pid != os.getpid():
+            _id_pid = os.getpid()
+            _id_suffix = f'{_id_pid:x}{secrets.token_hex(2)}'
+        now = datetime.now()
+        if now <= _last_id_time:
+            now = _last_id_time + timedelta(microseconds=1)
+        _last_id_time = now
+    return f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{_id_suffix}"
+
+
+class ReportWriter:
+    """Single background thread draining a queue of report writes"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='report-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, report_filename, report_type, target, scan_result, created_at):
+        with self._lock:
+            self._pending[report_filename] = threading.Event()
+        self._queue.put((report_filename, report_type, target, scan_result, created_at))
+        self._ensure_thread()
+
+    def wait(self, report_filename, timeout=None):
+        with self._lock:
+            event = self._pending.get(report_filename)
+        return event.wait(timeout) if event else True
+
+    def depth(self):
+        """Reports queued or being written"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """Block until every queued write has finished (or timeout seconds pass)"""
+        with self._lock:
+            events = list(self._pending.values())
+        for event in events:
+            if not event.wait(timeout):
+                return False
+        return True
+
+    def _run(self):
+        while True:
+            report_filename, report_type, target, scan_result, created_at = self._queue.get()
+            try:
+                with timed(None, 'report_write'):
+                    size = save_result(report_filename, report_type, target, scan_result)
+                    record_report(report_filename, report_type, target, created_at, size,
+                                  scan_result.get('status'))
+                    index_report(report_filename, report_type, target, scan_result,
+                                 searchable_text(scan_result))
+            except Exception as e:
+                inc('osint_report_write_errors_total')
+                print(f"Error writing report {report_filename}: {str(e)}")
+            finally:
+                with self._lock:
+                    event = self._pending.pop(report_filename, None)
+                if event:
+                    event.set()
+                self._queue.task_done()
+
+
+_writer = ReportWriter()
+register_gauge('osint_report_queue_depth', _writer.depth)
+
+
+def submit_report(report_filename, report_type, target, scan_result):
+    """
+    Queue a report for persistence and return immediately
+
+    Args:
+        report_filename (str): Report name ('<stem>.txt'), see new_report_id()
+        report_type (str): 'domain', 'ip' or 'image'
+        target (str): Scan target
+        scan_result (dict): Structured scan result
+    """
+    created_at = scan_result.get('timestamp') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Shallow copy: callers add response-only keys to the result after submitting
+    _writer.submit(report_filename, report_type, target, dict(scan_result), created_at)
+
+
+def wait_for_report(report_filename, timeout=30):
+    """Block until a queued write of this report has finished; True if not pending"""
+    return _writer.wait(report_filename, timeout)
+
+
+def flush_reports(timeout=None):
+    """Block until every queued report write has finished"""
+    return _writer.flush(timeout)
+
+
+# Do not lose queued reports when the process exits normally
+atexit.register(flush_reports, 30)
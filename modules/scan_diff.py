@@ -0,0 +1,236 @@
+"""
+Scan Diff Module
+Field-by-field comparison of two stored scan results for the same target
+
+Works on the structured results kept by report_store, never on the
+rendered text:
+- DNS records are compared as sets per record type (answer order from
+  resolvers is not meaningful)
+- WHOIS, geolocation/ASN and EXIF fields are compared as values
+- Boilerplate (disclaimers, limitations, timestamps of the scan itself)
+  is ignored
+
+OSINT CONSTRAINTS:
+- A change between two scans may come from the data source (CDN
+  rotation, geo database updates) rather than the target itself
+- Analyst review of every reported change is REQUIRED
+"""
+
+from .report_index import get_report, target_snapshots
+from .report_store import load_record
+
+WHOIS_FIELDS = ('registrar', 'creation_date', 'expiration_date', 'name_servers', 'country', 'registrant')
+GEO_FIELDS = ('country', 'country_code', 'region', 'city', 'zip_code', 'latitude', 'longitude',
+              'timezone', 'isp', 'organization', 'asn')
+CAMERA_FIELDS = ('make', 'model', 'lens')
+
+
+class DiffError(ValueError):
+    """Raised when two reports cannot be compared"""
+
+
+# ═══════════════════════════════════════════════════════
+# COMPARISON HELPERS
+# ═══════════════════════════════════════════════════════
+
+def _normalize_name(value):
+    """Hostnames compare case-insensitively and without the trailing root dot"""
+    return str(value).strip().rstrip('.').lower()
+
+
+def _as_set(values, normalize=str):
+    if values in (None, '', 'N/A'):
+        return set()
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    return {normalize(value) for value in values if value not in (None, '')}
+
+
+def _compare_value(changes, section, field, old, new):
+    if old != new:
+        changes.append({'section': section, 'field': field, 'change': 'changed', 'old': old, 'new': new})
+
+
+def _compare_set(changes, section, field, old, new):
+    added = sorted(new - old)
+    removed = sorted(old - new)
+    if added or removed:
+        changes.append({'section': section, 'field': field, 'change': 'set',
+                        'added': added, 'removed': removed})
+
+
+# ═══════════════════════════════════════════════════════
+# PER-TYPE DIFFS
+# ═══════════════════════════════════════════════════════
+
+def _diff_domain(old, new, changes):
+    _compare_value(changes, 'resolution', 'ip_address', old.get('ip_address'), new.get('ip_address'))
+
+    old_dns = old.get('dns_records') or {}
+    new_dns = new.get('dns_records') or {}
+    for record_type in sorted(set(old_dns) | set(new_dns)):
+        _compare_set(changes, 'dns', record_type,
+                     _as_set(old_dns.get(record_type), _normalize_name),
+                     _as_set(new_dns.get(record_type), _normalize_name))
+
+    old_whois = old.get('whois_info') or {}
+    new_whois = new.get('whois_info') or {}
+    for field in WHOIS_FIELDS:
+        if field == 'name_servers':
+            _compare_set(changes, 'whois', field,
+                         _as_set(old_whois.get(field), _normalize_name),
+                         _as_set(new_whois.get(field), _normalize_name))
+        else:
+            _compare_value(changes, 'whois', field, old_whois.get(field), new_whois.get(field))
+
+
+def _diff_ip(old, new, changes):
+    old_geo = old.get('geolocation') or {}
+    new_geo = new.get('geolocation') or {}
+    for field in GEO_FIELDS:
+        section = 'asn' if field in ('asn', 'isp', 'organization') else 'geolocation'
+        _compare_value(changes, section, field, old_geo.get(field), new_geo.get(field))
+
+    _compare_value(changes, 'resolution', 'reverse_dns', old.get('reverse_dns'), new.get('reverse_dns'))
+
+
+def _diff_image(old, new, changes):
+    _compare_value(changes, 'image', 'image_dimensions',
+                   old.get('image_dimensions'), new.get('image_dimensions'))
+
+    old_exif = old.get('exif_data') or {}
+    new_exif = new.get('exif_data') or {}
+    for field in ('available', 'timestamp', 'software'):
+        _compare_value(changes, 'exif', field, old_exif.get(field), new_exif.get(field))
+
+    old_gps = old_exif.get('gps_coordinates') or {}
+    new_gps = new_exif.get('gps_coordinates') or {}
+    for field in ('latitude', 'longitude'):
+        _compare_value(changes, 'exif', f'gps_{field}', old_gps.get(field), new_gps.get(field))
+
+    old_camera = old_exif.get('camera_info') or {}
+    new_camera = new_exif.get('camera_info') or {}
+    for field in CAMERA_FIELDS:
+        _compare_value(changes, 'exif', f'camera_{field}', old_camera.get(field), new_camera.get(field))
+
+    old_tags = old_exif.get('raw_tags') or {}
+    new_tags = new_exif.get('raw_tags') or {}
+    for tag in sorted(set(old_tags) | set(new_tags)):
+        _compare_value(changes, 'exif', tag, old_tags.get(tag), new_tags.get(tag))
+
+
+_DIFFERS = {'domain': _diff_domain, 'ip': _diff_ip, 'image': _diff_image}
+
+
+def diff_results(report_type, old_result, new_result):
+    """
+    Compare two structured scan results of the same type
+
+    Args:
+        report_type (str): 'domain', 'ip' or 'image'
+        old_result (dict): Earlier scan result
+        new_result (dict): Later scan result
+
+    Returns:
+        dict: {'changed': bool, 'changes': [...], 'summary': {section: count},
+               'lines': [one-line description per change]}
+    """
+    changes = []
+    _compare_value(changes, 'status', 'status', old_result.get('status'), new_result.get('status'))
+    _DIFFERS[report_type](old_result, new_result, changes)
+
+    summary = {}
+    for change in changes:
+        count = len(change['added']) + len(change['removed']) if change['change'] == 'set' else 1
+        summary[change['section']] = summary.get(change['section'], 0) + count
+
+    return {
+        'changed': bool(changes),
+        'changes': changes,
+        'summary': summary,
+        'lines': [_describe(change) for change in changes]
+    }
+
+
+def _describe(change):
+    """One-line summary of a change, e.g. 'dns A: +1.2.3.4 -5.6.7.8'"""
+    label = f"{change['section']} {change['field']}" if change['section'] != change['field'] else change['field']
+    if change['change'] == 'set':
+        parts = [f'+{value}' for value in change['added']] + [f'-{value}' for value in change['removed']]
+        return f"{label}: {' '.join(parts)}"
+    return f"{label}: {change['old'] if change['old'] is not None else 'none'} → " \
+           f"{change['new'] if change['new'] is not None else 'none'}"
+
+
+# ═══════════════════════════════════════════════════════
+# MAIN DIFF FUNCTION
+# ═══════════════════════════════════════════════════════
+
+def _diff_snapshots(old_report, new_report):
+    if old_report['report_type'] != new_report['report_type']:
+        raise DiffError('Only reports of the same type can be compared')
+    if new_report['report_type'] not in _DIFFERS:
+        raise DiffError(f"Unsupported report type: {new_report['report_type']}")
+
+    results = []
+    for report in (old_report, new_report):
+        record = load_record(report['filename'])
+        if record is None:
+            raise DiffError(f"{report['filename']} predates structured storage and cannot be diffed")
+        results.append(record['result'])
+
+    diff = diff_results(new_report['report_type'], results[0], results[1])
+    diff.update({'report_type': new_report['report_type'], 'old': old_report, 'new': new_report})
+    return diff
+
+
+def diff_reports(new_filename, old_filename=None):
+    """
+    Diff a stored report against another one, or against the previous
+    scan of the same target
+
+    Args:
+        new_filename (str): Report name of the later scan
+        old_filename (str): Report name of the earlier scan (default: previous
+            snapshot of the same target)
+
+    Returns:
+        dict: Both reports' index rows ('old', 'new') plus the diff_results() output
+
+    Raises:
+        DiffError: Unknown report, type mismatch, no previous scan,
+            or no structured data (legacy text-only reports)
+    """
+    new_report = get_report(new_filename)
+    if new_report is None:
+        raise DiffError(f'Report not found: {new_filename}')
+
+    if old_filename:
+        old_report = get_report(old_filename)
+        if old_report is None:
+            raise DiffError(f'Report not found: {old_filename}')
+    else:
+        earlier = target_snapshots(new_report['report_type'], new_report['target'],
+                                   before=new_report, limit=1)
+        if not earlier:
+            raise DiffError(f"No earlier scan of {new_report['target']} to compare with")
+        old_report = earlier[0]
+
+    return _diff_snapshots(old_report, new_report)
+
+
+def diff_latest(report_type, target):
+    """
+    Diff the latest scan of a target against the one before it
+
+    Both snapshots come from a single indexed range scan.
+
+    Raises:
+        DiffError: Fewer than two scans of the target, or no structured data
+    """
+    snapshots = target_snapshots(report_type, target, limit=2)
+    if not snapshots:
+        raise DiffError(f'No {report_type} reports for {target}')
+    if len(snapshots) < 2:
+        raise DiffError(f'Only one scan of {target} so far - nothing to compare')
+    return _diff_snapshots(snapshots[1], snapshots[0])
@@ -0,0 +1,537 @@
+"""
+Scheduler Module
+Central scan job queue with priority classes, per-session fairness and
+per-upstream concurrency limits
+
+- Every scan (domain, IP, image) is a job in a SQLite queue
+  (SCHEDULER_DB), so queued jobs survive restarts; jobs left 'running'
+  by a process that died are queued again
+- Priority classes: 'interactive' jobs (a user waiting on the page)
+  always start before 'batch' jobs
+- Within a class, the session with the fewest running jobs goes first,
+  then the session served longest ago, then the oldest job, so one
+  session's bulk submission cannot starve everyone else
+- Each job type declares the upstreams it calls; a job only starts while
+  every one of them is below its SCHEDULER_UPSTREAM_LIMITS share,
+  counted across all worker processes
+- Job types run on one of two pools: 'io' (DNS, HTTP lookups; sized
+  SCHEDULER_IO_WORKERS) or 'cpu' (OCR, hashing, ELA; sized
+  SCHEDULER_CPU_WORKERS), per process
+- One dispatcher thread per pool claims jobs; claims are serialized
+  with BEGIN IMMEDIATE, so gunicorn workers share the queue safely
+- Handlers can publish progress events (emit_progress) that a request
+  in any process streams with iter_job_events while the job runs
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import (
+    SCHEDULER_DB, SCHEDULER_IO_WORKERS, SCHEDULER_CPU_WORKERS, SCHEDULER_UPSTREAM_LIMITS,
+    SCHEDULER_POLL_INTERVAL, SCHEDULER_WAIT_TIMEOUT, SCHEDULER_MAX_ATTEMPTS, SCHEDULER_KEEP_DAYS
+)
+from .metrics import inc, observe, register_gauge
+from .processes import pid_alive
+
+PRIORITIES = {'interactive': 0, 'batch': 1}
+POOLS = ('io', 'cpu')
+
+# Seconds between checks for jobs orphaned by dead processes
+_RECOVER_INTERVAL = 30
+# Seconds between checks for progress published by another process
+_EVENT_POLL_INTERVAL = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    scan_type   TEXT NOT NULL,
+    pool        TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    options     TEXT NOT NULL DEFAULT '{}',
+    priority    INTEGER NOT NULL,
+    session_key TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    owner_pid   INTEGER,
+    owner_token TEXT,
+    result      TEXT,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, pool, priority, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs (session_key, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_session_started ON jobs (session_key, started_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id      TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    event       TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+_local = threading.local()
+# The job running on this thread, for emit_progress()
+_current = threading.local()
+
+# scan_type -> (handler, pool, upstreams)
+_job_types = {}
+
+
+class JobError(Exception):
+    """Raised when a job fails, cannot be found or does not finish in time"""
+
+
+def _connect():
+    """Return this thread's connection (autocommit; claims open their own transaction)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(SCHEDULER_DB), exist_ok=True)
+        conn = sqlite3.connect(SCHEDULER_DB, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def register_job_type(scan_type, handler, pool='io', upstreams=()):
+    """
+    Declare how a job type runs
+
+    Args:
+        scan_type (str): 'domain', 'ip', 'image', ...
+        handler (callable): handler(target, options) -> JSON-serializable result dict
+        pool (str): 'io' or 'cpu'
+        upstreams (tuple): Upstream names limited by SCHEDULER_UPSTREAM_LIMITS
+    """
+    if pool not in POOLS:
+        raise ValueError(f'Unknown pool: {pool}')
+    _job_types[scan_type] = (handler, pool, tuple(upstreams))
+
+
+# ═══════════════════════════════════════════════════════
+# SUBMITTING AND WAITING
+# ═══════════════════════════════════════════════════════
+
+def submit_job(scan_type, target, session_key, priority='batch', options=None):
+    """
+    Queue a job; returns its job_id
+
+    Args:
+        scan_type (str): A registered job type
+        target (str): Domain, IP address or uploaded image filename
+        session_key (str): Submitting session, for fair sharing
+        priority (str): 'interactive' or 'batch'
+        options (dict): Passed to the handler
+    """
+    if scan_type not in _job_types:
+        raise JobError(f'Unknown scan type: {scan_type}')
+    if priority not in PRIORITIES:
+        raise JobError(f'Unknown priority: {priority}')
+
+    job_id = uuid.uuid4().hex
+    _connect().execute(
+        'INSERT INTO jobs (job_id, scan_type, pool, target, options, priority, session_key, status, created_at) '
+        "VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+        (job_id, scan_type, _job_types[scan_type][1], target, json.dumps(options or {}),
+         PRIORITIES[priority], session_key, time.time())
+    )
+    _scheduler.wake(_job_types[scan_type][1])
+    return job_id
+
+
+def wait_for_job(job_id, timeout=SCHEDULER_WAIT_TIMEOUT):
+    """
+    Block until a job finishes; returns its result dict
+
+    Raises:
+        JobError: The job failed, was cancelled or is still pending at timeout
+    """
+    event = _scheduler.done_event(job_id)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            job = get_job(job_id)
+            if job is None:
+                raise JobError(f'Job not found: {job_id}')
+            if job['status'] == 'done':
+                return job['result']
+            if job['status'] in ('failed', 'cancelled'):
+                raise JobError(job['error'] or f"Job {job['status']}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise JobError(f'Job {job_id} still {job["status"]} after {timeout}s')
+            # Jobs finished by this process set the event; others are found by polling
+            event.wait(min(remaining, SCHEDULER_POLL_INTERVAL))
+            event.clear()
+    finally:
+        _scheduler.forget_event(job_id)
+
+
+def run_job(scan_type, target, session_key, priority='interactive', options=None, inline=False):
+    """
+    Submit a job and wait for its result
+
+    With inline=True the job runs on the calling thread straight away,
+    skipping the queue and upstream limits (used for profiled requests,
+    so the profiler samples the scan itself); it is still recorded.
+    """
+    if not inline:
+        return wait_for_job(submit_job(scan_type, target, session_key, priority, options))
+
+    _scheduler.start()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    _connect().execute(
+        'INSERT INTO jobs (job_id, scan_type, pool, target, options, priority, session_key, status, '
+        "created_at, started_at, attempts, owner_pid, owner_token) VALUES (?, ?, ?, ?, ?, ?, ?, 'running', ?, ?, 1, ?, ?)",
+        (job_id, scan_type, _job_types[scan_type][1], target, json.dumps(options or {}),
+         PRIORITIES[priority], session_key, now, now, os.getpid(), _scheduler.token)
+    )
+    _execute(_connect().execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone())
+    return wait_for_job(job_id, timeout=0)
+
+
+def cancel_job(job_id):
+    """Cancel a queued job; returns False if it already started or does not exist"""
+    return _connect().execute(
+        "UPDATE jobs SET status = 'cancelled', finished_at = ?, error = 'Cancelled' "
+        "WHERE job_id = ? AND status = 'queued'",
+        (time.time(), job_id)
+    ).rowcount == 1
+
+
+def emit_progress(event):
+    """
+    Publish a progress event (JSON-serializable dict) for the job running
+    on this thread; does nothing outside a job
+    """
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is None:
+        return
+    _current.seq += 1
+    _connect().execute('INSERT OR REPLACE INTO job_events (job_id, seq, event) VALUES (?, ?, ?)',
+                       (job_id, _current.seq, json.dumps(event, default=str)))
+    _scheduler.notify(job_id)
+
+
+def iter_job_events(job_id, timeout=SCHEDULER_WAIT_TIMEOUT):
+    """
+    Yield a job's progress events in order as they are published, until
+    the job finishes (then check get_job() for the outcome)
+
+    Raises:
+        JobError: The job does not exist or is still pending at timeout
+    """
+    conn = _connect()
+    event = _scheduler.done_event(job_id)
+    deadline = time.monotonic() + timeout
+    seq = 0
+    try:
+        while True:
+            # Read the status first: events published before it finished are then all visible
+            row = conn.execute('SELECT status FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row is None:
+                raise JobError(f'Job not found: {job_id}')
+            for event_row in conn.execute('SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq',
+                                          (job_id, seq)).fetchall():
+                seq = event_row['seq']
+                yield json.loads(event_row['event'])
+            if row['status'] not in ('queued', 'running'):
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise JobError(f'Job {job_id} still {row["status"]} after {timeout}s')
+            event.wait(min(remaining, _EVENT_POLL_INTERVAL))
+            event.clear()
+    finally:
+        _scheduler.forget_event(job_id)
+
+
+# ═══════════════════════════════════════════════════════
+# STATUS
+# ═══════════════════════════════════════════════════════
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+def _job_dict(row, include_result=True):
+    job = {
+        'job_id': row['job_id'],
+        'scan_type': row['scan_type'],
+        'target': row['target'],
+        'priority': next(name for name, value in PRIORITIES.items() if value == row['priority']),
+        'status': row['status'],
+        'created_at': _timestamp(row['created_at']),
+        'started_at': _timestamp(row['started_at']),
+        'finished_at': _timestamp(row['finished_at']),
+        'attempts': row['attempts'],
+        'error': row['error']
+    }
+    if include_result:
+        job['result'] = json.loads(row['result']) if row['result'] else None
+    return job
+
+
+def get_job(job_id):
+    """Job status dict (with 'queue_position' while queued and 'result' once done), or None"""
+    conn = _connect()
+    row = conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = _job_dict(row)
+    if row['status'] == 'queued':
+        # Jobs ahead in priority order; fair sharing may reorder within a class
+        job['queue_position'] = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND pool = ? "
+            'AND (priority < ? OR (priority = ? AND created_at < ?))',
+            (row['pool'], row['priority'], row['priority'], row['created_at'])
+        ).fetchone()[0] + 1
+    return job
+
+
+def list_jobs(session_key=None, limit=50):
+    """Newest jobs (optionally one session's), without results"""
+    conn = _connect()
+    if session_key is None:
+        rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,))
+    else:
+        rows = conn.execute('SELECT * FROM jobs WHERE session_key = ? ORDER BY created_at DESC LIMIT ?',
+                            (session_key, limit))
+    return [_job_dict(row, include_result=False) for row in rows]
+
+
+def queue_stats():
+    """{pool: {'queued': n, 'running': n}} across all processes"""
+    stats = {pool: {'queued': 0, 'running': 0} for pool in POOLS}
+    for row in _connect().execute(
+        "SELECT pool, status, COUNT(*) AS count FROM jobs WHERE status IN ('queued', 'running') GROUP BY pool, status"
+    ):
+        stats.setdefault(row['pool'], {'queued': 0, 'running': 0})[row['status']] = row['count']
+    return stats
+
+
+def count_jobs(scan_types, status='queued'):
+    """Number of jobs of the given types in a status, across all processes"""
+    return _connect().execute(
+        f"SELECT COUNT(*) FROM jobs WHERE status = ? AND scan_type IN ({', '.join('?' * len(scan_types))})",
+        (status, *scan_types)
+    ).fetchone()[0]
+
+
+# ═══════════════════════════════════════════════════════
+# CLAIMING AND RUNNING
+# ═══════════════════════════════════════════════════════
+
+def _claim(pool, token):
+    """Atomically pick the next runnable job in a pool and mark it running, or None"""
+    conn = _connect()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        running = {}
+        for row in conn.execute("SELECT scan_type, COUNT(*) AS count FROM jobs WHERE status = 'running' GROUP BY scan_type"):
+            for upstream in _job_types.get(row['scan_type'], (None, None, ()))[2]:
+                running[upstream] = running.get(upstream, 0) + row['count']
+
+        # Job types with an upstream at its limit wait; the others can still start
+        blocked = [scan_type for scan_type, (_, _, upstreams) in _job_types.items()
+                   if any(running.get(upstream, 0) >= SCHEDULER_UPSTREAM_LIMITS.get(upstream, float('inf'))
+                          for upstream in upstreams)]
+        runnable = [scan_type for scan_type, job_type in _job_types.items()
+                    if job_type[1] == pool and scan_type not in blocked]
+
+        candidate = None
+        if runnable:
+            candidate = conn.execute(
+                "SELECT job_id FROM jobs AS j WHERE status = 'queued' AND pool = ? "
+                f"AND scan_type IN ({', '.join('?' * len(runnable))}) "
+                'ORDER BY priority, '
+                "(SELECT COUNT(*) FROM jobs AS r WHERE r.session_key = j.session_key AND r.status = 'running'), "
+                '(SELECT COALESCE(MAX(started_at), 0) FROM jobs AS s WHERE s.session_key = j.session_key), '
+                'created_at LIMIT 1',
+                (pool, *runnable)
+            ).fetchone()
+
+        if candidate is not None:
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                'owner_pid = ?, owner_token = ? WHERE job_id = ?',
+                (now, os.getpid(), token, candidate['job_id'])
+            )
+            conn.execute('COMMIT')
+            return conn.execute('SELECT * FROM jobs WHERE job_id = ?', (candidate['job_id'],)).fetchone()
+
+        conn.execute('COMMIT')
+        return None
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def _execute(job):
+    """Run a claimed job's handler and store its outcome"""
+    handler = _job_types[job['scan_type']][0]
+    labels = {'scan_type': job['scan_type'], 'priority': 'interactive' if job['priority'] == 0 else 'batch'}
+    observe('osint_job_wait_seconds', max(job['started_at'] - job['created_at'], 0),
+            pool=job['pool'], priority=labels['priority'])
+    _scheduler.running_changed(1)
+    # Events from an earlier, interrupted run of this job
+    _connect().execute('DELETE FROM job_events WHERE job_id = ?', (job['job_id'],))
+    _current.job_id, _current.seq = job['job_id'], 0
+    try:
+        result = handler(job['target'], json.loads(job['options']))
+        status, result, error = 'done', json.dumps(result, default=str), None
+    except Exception as e:
+        status, result, error = 'failed', None, str(e)
+    finally:
+        _current.job_id = None
+        _scheduler.running_changed(-1)
+
+    _connect().execute(
+        'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?',
+        (status, result, error, time.time(), job['job_id'])
+    )
+    inc('osint_jobs_total', status=status, **labels)
+    _scheduler.job_finished(job['job_id'])
+
+
+def _recover(token):
+    """Requeue jobs left running by dead processes; drop old finished jobs"""
+    conn = _connect()
+    orphaned = [
+        row for row in conn.execute("SELECT job_id, owner_pid, owner_token, attempts FROM jobs WHERE status = 'running'")
+        if not _owner_alive(row['owner_pid'], row['owner_token'], token)
+    ]
+    for row in orphaned:
+        if row['attempts'] >= SCHEDULER_MAX_ATTEMPTS:
+            conn.execute("UPDATE jobs SET status = 'failed', finished_at = ?, error = ? "
+                         "WHERE job_id = ? AND status = 'running'",
+                         (time.time(), 'Worker exited while running this job', row['job_id']))
+        else:
+            conn.execute("UPDATE jobs SET status = 'queued', owner_pid = NULL, owner_token = NULL "
+                         "WHERE job_id = ? AND status = 'running' AND owner_token IS ?",
+                         (row['job_id'], row['owner_token']))
+    conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                 (time.time() - SCHEDULER_KEEP_DAYS * 86400,))
+    conn.execute('DELETE FROM job_events WHERE job_id NOT IN (SELECT job_id FROM jobs)')
+    return len(orphaned)
+
+
+def _owner_alive(pid, owner_token, token):
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        # Same pid as an earlier run of the app (e.g. a restarted container)
+        return owner_token == token
+    return pid_alive(pid)
+
+
+class _Scheduler:
+    """Per-process pools and dispatcher threads (started lazily, again after a fork)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pid = None
+        self.token = None
+        self.running = 0
+        self._wake = {pool: threading.Event() for pool in POOLS}
+        self._events = {}
+
+    def start(self):
+        if self.pid == os.getpid():
+            return
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            # A forked worker inherits the parent's objects but none of its threads
+            self.token = uuid.uuid4().hex
+            self.running = 0
+            self._wake = {pool: threading.Event() for pool in POOLS}
+            self._events = {}
+            _recover(self.token)
+            sizes = {'io': SCHEDULER_IO_WORKERS, 'cpu': SCHEDULER_CPU_WORKERS}
+            for pool in POOLS:
+                threading.Thread(target=self._dispatch, args=(pool, sizes[pool], self.token),
+                                 name=f'scheduler-{pool}', daemon=True).start()
+            self.pid = os.getpid()
+
+    def _dispatch(self, pool, size, token):
+        executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f'scan-{pool}')
+        slots = threading.BoundedSemaphore(size)
+        last_recover = time.monotonic()
+        while True:
+            slots.acquire()
+            job = None
+            try:
+                job = _claim(pool, token)
+            except sqlite3.Error as e:
+                print(f"Error claiming {pool} job: {str(e)}")
+            if job is None:
+                slots.release()
+                self._wake[pool].wait(SCHEDULER_POLL_INTERVAL)
+                self._wake[pool].clear()
+                if time.monotonic() - last_recover > _RECOVER_INTERVAL:
+                    last_recover = time.monotonic()
+                    try:
+                        _recover(token)
+                    except sqlite3.Error as e:
+                        print(f"Error recovering jobs: {str(e)}")
+                continue
+            executor.submit(self._run, job, slots)
+
+    @staticmethod
+    def _run(job, slots):
+        try:
+            _execute(job)
+        except Exception as e:
+            print(f"Error running job {job['job_id']}: {str(e)}")
+        finally:
+            slots.release()
+
+    def wake(self, pool):
+        self._wake[pool].set()
+
+    def running_changed(self, delta):
+        with self._lock:
+            self.running += delta
+
+    def done_event(self, job_id):
+        with self._lock:
+            return self._events.setdefault(job_id, threading.Event())
+
+    def forget_event(self, job_id):
+        with self._lock:
+            self._events.pop(job_id, None)
+
+    def notify(self, job_id):
+        with self._lock:
+            event = self._events.get(job_id)
+        if event is not None:
+            event.set()
+
+    def job_finished(self, job_id):
+        self.notify(job_id)
+        # Another dispatcher's upstream slot may have freed up
+        for pool in POOLS:
+            self._wake[pool].set()
+
+
+_scheduler = _Scheduler()
+register_gauge('osint_jobs_running', lambda: _scheduler.running)
+
+
+def start_scheduler():
+    """Start this process's worker pools (idempotent, restarts after a fork)"""
+    _scheduler.start()
@@ -0,0 +1,231 @@
+"""
+Single-Flight Module
+Concurrent identical scans share one execution
+
+- Requests are keyed by scan type, normalized target and scan options
+  (scan_key)
+- Within a process, the first request for a key runs the scan and the
+  others wait on it (threading.Event) and get the same result
+- Across processes (gunicorn workers), the process that runs a key
+  claims it in a small SQLite coordination store (COORDINATION_DB);
+  the others poll that store for the result instead of scanning
+- A claim whose owner process has died is taken over at once, and any
+  claim expires after SINGLE_FLIGHT_TIMEOUT seconds, so a crashed or
+  hung worker never blocks a key; if the running scan fails, waiting
+  processes run it themselves
+- Results shared across processes go through JSON; results are kept
+  only briefly, for the waiting requests, never as a cache
+"""
+
+import ipaddress
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import COORDINATION_DB, SINGLE_FLIGHT_TIMEOUT, SINGLE_FLIGHT_POLL_INTERVAL
+from .metrics import inc
+from .processes import pid_alive
+
+# Shared results are deleted this long after the scan finished
+_RESULT_TTL = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    key         TEXT PRIMARY KEY,
+    flight_id   TEXT NOT NULL,
+    owner_pid   INTEGER NOT NULL,
+    expires_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flight_results (
+    flight_id   TEXT PRIMARY KEY,
+    result      TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_flight_results_finished ON flight_results (finished_at);
+"""
+
+_local = threading.local()
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when the shared execution did not finish within the timeout"""
+
+
+def _connect():
+    """Return this thread's connection (SQLite connections are not shareable)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(COORDINATION_DB), exist_ok=True)
+        conn = sqlite3.connect(COORDINATION_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def scan_key(scan_type, target, **options):
+    """
+    Coalescing key: scan type, normalized target and options
+
+    Domains compare case-insensitively without the trailing root dot;
+    IP addresses compare in canonical form.
+    """
+    target = target.strip()
+    if scan_type == 'ip':
+        try:
+            target = ipaddress.ip_address(target).compressed
+        except ValueError:
+            pass
+    else:
+        target = target.rstrip('.').lower()
+    return f"{scan_type}:{target}:{json.dumps(options, sort_keys=True)}"
+
+
+# ═══════════════════════════════════════════════════════
+# IN-PROCESS
+# ═══════════════════════════════════════════════════════
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(scan_type, key, function, timeout=SINGLE_FLIGHT_TIMEOUT):
+    """
+    Run function() once for all concurrent callers with the same key
+
+    Args:
+        scan_type (str): Metrics label ('domain', 'ip')
+        key (str): From scan_key()
+        function (callable): Runs the scan; returns a JSON-serializable dict
+        timeout (float): Longest wait for another caller's execution, in seconds
+
+    Returns:
+        tuple: (result dict, coalesced) - coalesced is True when the result
+        came from another request's execution (the dict is then a copy)
+
+    Raises:
+        SingleFlightTimeout: The shared execution took longer than timeout
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if not flight.done.wait(timeout):
+            raise SingleFlightTimeout(f'Timed out waiting for in-flight {scan_type} scan')
+        if flight.error is not None:
+            raise flight.error
+        inc('osint_scans_coalesced_total', scan_type=scan_type, scope='thread')
+        return dict(flight.result), True
+
+    try:
+        flight.result, coalesced = _run_across_processes(scan_type, key, function, timeout)
+        return flight.result, coalesced
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+# ═══════════════════════════════════════════════════════
+# ACROSS PROCESSES
+# ═══════════════════════════════════════════════════════
+
+def _claim(key, timeout):
+    """Claim the key for this process; returns (flight_id, claimed)"""
+    conn = _connect()
+    flight_id = uuid.uuid4().hex
+    now = time.time()
+    with conn:
+        conn.execute('DELETE FROM flights WHERE key = ? AND expires_at < ?', (key, now))
+        claimed = conn.execute(
+            'INSERT OR IGNORE INTO flights (key, flight_id, owner_pid, expires_at) VALUES (?, ?, ?, ?)',
+            (key, flight_id, os.getpid(), now + timeout)
+        ).rowcount == 1
+        if not claimed:
+            row = conn.execute('SELECT flight_id FROM flights WHERE key = ?', (key,)).fetchone()
+            flight_id = row['flight_id'] if row else None
+    return flight_id, claimed
+
+
+def _publish(flight_id, result):
+    conn = _connect()
+    now = time.time()
+    with conn:
+        if result is not None:
+            conn.execute('INSERT OR REPLACE INTO flight_results (flight_id, result, finished_at) VALUES (?, ?, ?)',
+                         (flight_id, json.dumps(result, default=str), now))
+        conn.execute('DELETE FROM flights WHERE flight_id = ?', (flight_id,))
+        conn.execute('DELETE FROM flight_results WHERE finished_at < ?', (now - _RESULT_TTL,))
+
+
+def _owner_alive(pid):
+    if pid == os.getpid():
+        # Only this process's leader runs a key here, so the claim is left
+        # over from an earlier process that had the same pid
+        return False
+    return pid_alive(pid)
+
+
+def _wait_for_result(flight_id, deadline):
+    """Poll for another process's result; None if its claim ended without one"""
+    conn = _connect()
+    while time.monotonic() < deadline:
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        row = conn.execute('SELECT result FROM flight_results WHERE flight_id = ?', (flight_id,)).fetchone()
+        if row:
+            return json.loads(row['result'])
+        running = conn.execute('SELECT owner_pid FROM flights WHERE flight_id = ? AND expires_at >= ?',
+                               (flight_id, time.time())).fetchone()
+        if running and not _owner_alive(running['owner_pid']):
+            # The owner died mid-scan: release its claim rather than wait for it to expire
+            with conn:
+                conn.execute('DELETE FROM flights WHERE flight_id = ?', (flight_id,))
+            running = None
+        if not running:
+            # Re-check: the result may have been published just before the claim was released
+            row = conn.execute('SELECT result FROM flight_results WHERE flight_id = ?', (flight_id,)).fetchone()
+            return json.loads(row['result']) if row else None
+    raise SingleFlightTimeout('Timed out waiting for in-flight scan in another worker')
+
+
+def _run_across_processes(scan_type, key, function, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        flight_id, claimed = _claim(key, timeout)
+
+        if claimed:
+            inc('osint_scan_executions_total', scan_type=scan_type)
+            try:
+                result = function()
+            except Exception:
+                # Release the claim so waiting processes run the scan themselves
+                _publish(flight_id, None)
+                raise
+            _publish(flight_id, result)
+            return result, False
+
+        if flight_id is None:
+            continue    # The claim was released between our insert and select; try again
+
+        result = _wait_for_result(flight_id, deadline)
+        if result is not None:
+            inc('osint_scans_coalesced_total', scan_type=scan_type, scope='process')
+            return result, True
@@ -0,0 +1,552 @@
+"""
+Threat Intelligence Module
+Matches scan results against local blocklists of known-bad indicators
+
+- Every file in THREAT_INTEL_FOLDER is one list, named after the file:
+  one IP address, CIDR network, domain or MD5/SHA-1/SHA-256 hash per
+  line ('#' and ';' comments, hosts-file lines such as '0.0.0.0 evil.com' and
+  .gz files are accepted; anything else is counted as skipped)
+- IPv4 networks and all IPv6 entries go into a path-compressed binary
+  (patricia) tree stored in flat arrays; single IPv4 addresses, the bulk
+  of most feeds, are the tree's full-length leaves and are kept in a
+  sorted array instead (4 bytes each, searched in C)
+- Domains are stored by reversed labels ('com.example.www'), sorted and
+  packed into one bytes blob: the suffix trie in leaf order. A listed
+  domain matches itself and every subdomain; a Bloom filter in front
+  skips the search for names that are not listed
+- Hashes go into one set per list (raw digests, not hex text)
+- annotate() adds result['threat_intel'] with the matches; a lookup
+  takes microseconds and never waits for a reload
+- A background thread reloads the lists when their files change: the
+  new index is built off to the side and swapped in with one assignment,
+  so scans keep using the previous one until it is ready
+"""
+
+import gzip
+import hashlib
+import ipaddress
+import os
+import re
+import socket
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from config import THREAT_INTEL_FOLDER, THREAT_INTEL_RELOAD_INTERVAL, THREAT_INTEL_BLOOM_BITS
+from .metrics import timed, inc
+from .disclaimers import DISCLAIMERS
+
+# Hex digest length -> hash type
+HASH_TYPES = {32: 'md5', 40: 'sha1', 64: 'sha256'}
+# Addresses that mark a hosts-file line ('0.0.0.0 evil.com')
+_HOSTS_FILE_ADDRESSES = {'0.0.0.0', '127.0.0.1', '::', '::1'}
+_DOMAIN = re.compile(r'^(?=.{1,253}$)([a-z0-9_]([a-z0-9_-]{0,61}[a-z0-9_])?)(\.[a-z0-9_]([a-z0-9_-]{0,61}[a-z0-9_])?)*$')
+_SEPARATORS = re.compile(r'[\s,]+')
+
+
+# ═══════════════════════════════════════════════════════
+# INDEX STRUCTURES
+# ═══════════════════════════════════════════════════════
+
+class _ListSets:
+    """Interned sets of list names; indexes store a set's ID per entry"""
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+
+    def id(self, names):
+        names = tuple(sorted(names))
+        set_id = self._ids.get(names)
+        if set_id is None:
+            set_id = self._ids[names] = len(self.names)
+            self.names.append(names)
+        return set_id
+
+    def merge(self, first, second):
+        if first == second:
+            return first
+        return self.id(set(self.names[first]) | set(self.names[second]))
+
+
+class _PrefixTree:
+    """
+    Patricia tree of network prefixes, one node per array slot
+    Keys are addresses as integers with the host bits zeroed
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self._keys = array('Q') if width <= 64 else []     # IPv6 keys do not fit 64 bits
+        self._lengths = array('B')
+        self._left = array('i')
+        self._right = array('i')
+        self._values = array('i')   # List set ID, -1 for branching-only nodes
+        self._root = -1
+        self.entries = 0
+
+    def _node(self, key, length, value):
+        self._keys.append(key)
+        self._lengths.append(length)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._values.append(value)
+        if value >= 0:
+            self.entries += 1
+        return len(self._lengths) - 1
+
+    def _bit(self, key, position):
+        return (key >> (self.width - 1 - position)) & 1
+
+    def insert(self, key, length, value):
+        """Add a prefix (each prefix once; callers merge list sets beforehand)"""
+        if self._root < 0:
+            self._root = self._node(key, length, value)
+            return
+        width = self.width
+        parent, parent_children, node = -1, None, self._root
+        while True:
+            node_key, node_length = self._keys[node], self._lengths[node]
+            common = min(width - (key ^ node_key).bit_length(), length, node_length)
+            if common == node_length:
+                if node_length == length:
+                    # A branching node that is also listed
+                    if self._values[node] < 0:
+                        self.entries += 1
+                    self._values[node] = value
+                    return
+                children = self._right if self._bit(key, node_length) else self._left
+                if children[node] < 0:
+                    children[node] = self._node(key, length, value)
+                    return
+                parent, parent_children, node = node, children, children[node]
+                continue
+
+            if common == length:
+                # The new prefix covers the node
+                new = self._node(key, length, value)
+                (self._right if self._bit(node_key, length) else self._left)[new] = node
+            else:
+                # Branch where the two prefixes first differ
+                mask = ((1 << common) - 1) << (width - common) if common else 0
+                new = self._node(key & mask, common, -1)
+                leaf = self._node(key, length, value)
+                if self._bit(key, common):
+                    self._right[new], self._left[new] = leaf, node
+                else:
+                    self._left[new], self._right[new] = leaf, node
+            if parent < 0:
+                self._root = new
+            else:
+                parent_children[parent] = new
+            return
+
+    def matches(self, key):
+        """[(prefix key, prefix length, list set ID)] of every prefix containing key"""
+        width = self.width
+        keys, lengths, values = self._keys, self._lengths, self._values
+        left, right = self._left, self._right
+        found = []
+        node = self._root
+        while node >= 0:
+            length = lengths[node]
+            if length and (key ^ keys[node]) >> (width - length):
+                break
+            if values[node] >= 0:
+                found.append((keys[node], length, values[node]))
+            if length == width:
+                break
+            node = right[node] if (key >> (width - 1 - length)) & 1 else left[node]
+        return found
+
+
+class _BloomFilter:
+    """Bit array with k positions per item from one BLAKE2b digest (double hashing)"""
+
+    def __init__(self, count, bits_per_item):
+        self._size = max(64, count * bits_per_item)
+        self._hash_count = max(1, round(bits_per_item * 0.693))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self._size for i in range(self._hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class _SuffixIndex:
+    """
+    Listed domains by reversed labels, sorted, in one bytes blob
+    Matching walks the query's label path from the TLD down, so a listed
+    'example.com' matches 'www.example.com'
+    """
+
+    def __init__(self, entries, bloom_bits):
+        names = sorted(entries)
+        self._offsets = array('I', [0])
+        self._values = array('I')
+        chunks = []
+        position = 0
+        self._bloom = _BloomFilter(len(names), bloom_bits) if bloom_bits and names else None
+        for name in names:
+            encoded = name.encode('ascii')
+            chunks.append(encoded)
+            position += len(encoded)
+            self._offsets.append(position)
+            self._values.append(entries[name])
+            if self._bloom is not None:
+                self._bloom.add(encoded)
+        self._blob = b''.join(chunks)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        return self._blob[self._offsets[index]:self._offsets[index + 1]]
+
+    def matches(self, labels):
+        """[(listed domain, list set ID)] for a name's labels, TLD first"""
+        found = []
+        for depth in range(1, len(labels) + 1):
+            path = '.'.join(labels[:depth]).encode('ascii')
+            if self._bloom is not None and path not in self._bloom:
+                continue
+            index = bisect_left(self, path)
+            if index < len(self) and self[index] == path:
+                found.append(('.'.join(reversed(labels[:depth])), self._values[index]))
+        return found
+
+
+# ═══════════════════════════════════════════════════════
+# LOADING
+# ═══════════════════════════════════════════════════════
+
+class _Indicators:
+    """One immutable, fully built generation of the blocklists"""
+
+    def __init__(self, signature=()):
+        self.signature = signature
+        self.lists = {}             # name -> per-type entry counts
+        self.sets = _ListSets()
+        self.hosts = array('I')     # Sorted IPv4 addresses
+        self.host_values = array('I')
+        self.networks = {4: _PrefixTree(32), 6: _PrefixTree(128)}
+        self.domains = _SuffixIndex({}, 0)
+        self.hashes = {}            # list name -> set of digests
+        self.loaded_at = None
+        self.load_ms = None
+
+    def match_ip(self, value):
+        try:
+            address = ipaddress.ip_address(value)
+        except ValueError:
+            return []
+        key = int(address)
+        found = []
+        if address.version == 4:
+            index = bisect_left(self.hosts, key)
+            if index < len(self.hosts) and self.hosts[index] == key:
+                found.append({'indicator': str(address), 'type': 'ip', 'value': value,
+                              'lists': list(self.sets.names[self.host_values[index]])})
+        for prefix_key, length, set_id in self.networks[address.version].matches(key):
+            network = ipaddress.ip_network((prefix_key, length))
+            found.append({
+                'indicator': str(network.network_address) if length == network.max_prefixlen else str(network),
+                'type': 'ip' if length == network.max_prefixlen else 'cidr',
+                'value': value,
+                'lists': list(self.sets.names[set_id])
+            })
+        return found
+
+    def match_domain(self, value):
+        name = _normalize_domain(value)
+        if name is None:
+            return []
+        return [
+            {'indicator': domain, 'type': 'domain', 'value': value, 'lists': list(self.sets.names[set_id])}
+            for domain, set_id in self.domains.matches(name.split('.')[::-1])
+        ]
+
+    def match_hash(self, value):
+        try:
+            digest = bytes.fromhex(value.strip())
+        except (ValueError, AttributeError):
+            return []
+        lists = [name for name, digests in self.hashes.items() if digest in digests]
+        if not lists:
+            return []
+        return [{'indicator': value.strip().lower(), 'type': HASH_TYPES.get(len(digest) * 2, 'hash'),
+                 'value': value, 'lists': lists}]
+
+    def status(self):
+        totals = {kind: sum(counts[kind] for counts in self.lists.values())
+                  for kind in ('ips', 'networks', 'domains', 'hashes', 'skipped')}
+        return {
+            'loaded': self.loaded_at is not None,
+            'loaded_at': self.loaded_at,
+            'load_ms': self.load_ms,
+            'lists': self.lists,
+            'totals': totals
+        }
+
+
+def _normalize_domain(value):
+    name = (value or '').strip().rstrip('.').lower()
+    if name.startswith('*.'):
+        name = name[2:]
+    name = name.lstrip('.')
+    try:
+        name = name.encode('idna').decode('ascii')
+    except UnicodeError:
+        return None
+    return name if _DOMAIN.match(name) else None
+
+
+def _list_files():
+    """[(list name, path, mtime_ns, size)] of the list files"""
+    files = []
+    try:
+        entries = list(os.scandir(THREAT_INTEL_FOLDER))
+    except FileNotFoundError:
+        return files
+    for entry in sorted(entries, key=lambda entry: entry.name):
+        if entry.name.startswith('.') or not entry.is_file():
+            continue
+        name = entry.name[:-3] if entry.name.endswith('.gz') else entry.name
+        stat = entry.stat()
+        files.append((os.path.splitext(name)[0], entry.path, stat.st_mtime_ns, stat.st_size))
+    return files
+
+
+def _iter_indicators(path):
+    """The indicator token of each line (hosts-file lines: the name)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.split('#', 1)[0].split(';', 1)[0].strip()
+            if not line:
+                continue
+            tokens = _SEPARATORS.split(line)
+            if len(tokens) > 1 and tokens[0] in _HOSTS_FILE_ADDRESSES:
+                yield tokens[1]
+            else:
+                yield tokens[0]
+
+
+def _load(files):
+    """Build a new generation from the list files"""
+    start = time.perf_counter()
+    indicators = _Indicators(tuple(files))
+    sets = indicators.sets
+    hosts = {}
+    networks = {}
+    domains = {}
+
+    def add(entries, key, set_id):
+        current = entries.get(key)
+        entries[key] = set_id if current is None else sets.merge(current, set_id)
+
+    for name, path, _, _ in files:
+        counts = {'ips': 0, 'networks': 0, 'domains': 0, 'hashes': 0, 'skipped': 0}
+        set_id = sets.id((name,))
+        digests = set()
+        try:
+            tokens = _iter_indicators(path)
+            for token in tokens:
+                # Cheapest checks first: plain IPv4, hex digest, network, domain
+                try:
+                    add(hosts, int.from_bytes(socket.inet_pton(socket.AF_INET, token), 'big'), set_id)
+                    counts['ips'] += 1
+                    continue
+                except OSError:
+                    pass
+                if len(token) in HASH_TYPES:
+                    try:
+                        digests.add(bytes.fromhex(token))
+                        counts['hashes'] += 1
+                        continue
+                    except ValueError:
+                        pass
+                if '/' in token or ':' in token:
+                    try:
+                        network = ipaddress.ip_network(token, strict=False)
+                    except ValueError:
+                        counts['skipped'] += 1
+                        continue
+                    add(networks, (network.version, int(network.network_address), network.prefixlen), set_id)
+                    counts['networks' if network.num_addresses > 1 else 'ips'] += 1
+                    continue
+                domain = _normalize_domain(token)
+                if domain is None or '.' not in domain:
+                    counts['skipped'] += 1
+                    continue
+                add(domains, '.'.join(domain.split('.')[::-1]), set_id)
+                counts['domains'] += 1
+        except OSError as e:
+            print(f"Error reading threat intel list {path}: {str(e)}")
+        if digests:
+            indicators.hashes[name] = frozenset(digests)
+        indicators.lists[name] = counts
+
+    for key in sorted(hosts):
+        indicators.hosts.append(key)
+        indicators.host_values.append(hosts[key])
+    # Sorted insertion keeps the tree walks short while it is built
+    for (version, key, length), set_id in sorted(networks.items()):
+        indicators.networks[version].insert(key, length, set_id)
+    indicators.domains = _SuffixIndex(domains, THREAT_INTEL_BLOOM_BITS)
+
+    indicators.loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    indicators.load_ms = round((time.perf_counter() - start) * 1000, 2)
+    return indicators
+
+
+_indicators = _Indicators()
+_reload_lock = threading.Lock()
+
+
+def reload_threat_intel(force=False):
+    """
+    Load the list files if they changed since the last load (or force)
+    Scans keep matching against the previous generation meanwhile
+
+    Returns:
+        dict: Status of the generation in use afterwards (see threat_intel_status)
+    """
+    global _indicators
+    with _reload_lock:
+        files = _list_files()
+        if force or _indicators.loaded_at is None or tuple(files) != _indicators.signature:
+            try:
+                _indicators = _load(files)
+                inc('osint_threat_intel_reloads_total', outcome='loaded')
+            except Exception as e:
+                print(f"Error loading threat intel lists: {str(e)}")
+                inc('osint_threat_intel_reloads_total', outcome='failed')
+    return _indicators.status()
+
+
+class _Reloader:
+    """Per-process thread loading the lists and reloading them on change"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pid = None
+
+    def start(self):
+        if self.pid == os.getpid():
+            return
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            # A forked worker inherits the parent's lists but not its thread
+            threading.Thread(target=self._loop, name='threat-intel-reload', daemon=True).start()
+            self.pid = os.getpid()
+
+    def _loop(self):
+        while True:
+            try:
+                reload_threat_intel()
+            except Exception as e:
+                print(f"Threat intel reload error: {str(e)}")
+            time.sleep(THREAT_INTEL_RELOAD_INTERVAL)
+
+
+_reloader = _Reloader()
+
+
+def start_threat_intel():
+    """Start this process's reload thread (idempotent, restarts after a fork)"""
+    _reloader.start()
+
+
+def threat_intel_status():
+    """Lists in use: per-list counts, totals and when they were loaded"""
+    return _indicators.status()
+
+
+# ═══════════════════════════════════════════════════════
+# MATCHING
+# ═══════════════════════════════════════════════════════
+
+def match_indicator(value):
+    """
+    Matches for one value of any type (IP address, domain or hash)
+
+    Returns:
+        list: [{'indicator' (listed entry), 'type', 'value', 'lists'}]
+    """
+    value = (value or '').strip()
+    indicators = _indicators
+    if len(value) in HASH_TYPES and re.fullmatch(r'[0-9a-fA-F]+', value):
+        return indicators.match_hash(value)
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return indicators.match_domain(value)
+    return indicators.match_ip(value)
+
+
+def annotate(result, ips=(), domains=(), hashes=()):
+    """
+    Add result['threat_intel']: the matches of a scan's IP addresses,
+    domains and file hashes (duplicates and empty values are skipped)
+    Starts the reload thread if needed; before the first load there are
+    no lists and 'loaded' is False
+    """
+    start_threat_intel()
+    indicators = _indicators
+    matches = []
+    with timed(result.get('timings'), 'threat_intel'):
+        for value in dict.fromkeys(filter(None, ips)):
+            matches.extend(indicators.match_ip(value))
+        for value in dict.fromkeys(filter(None, domains)):
+            matches.extend(indicators.match_domain(value))
+        for value in dict.fromkeys(filter(None, hashes)):
+            matches.extend(indicators.match_hash(value))
+    for match in matches:
+        inc('osint_threat_intel_matches_total', type=match['type'])
+
+    result['threat_intel'] = {
+        'matched': bool(matches),
+        'matches': matches,
+        'loaded': indicators.loaded_at is not None,
+        'lists': sorted(indicators.lists),
+        'disclaimer': DISCLAIMERS['threat_intel_local']
+    }
+    return result
+
+
+def iter_threat_intel_report(scan_result):
+    """
+    Report section for result['threat_intel'] (nothing for older results)
+
+    Yields:
+        str: Successive chunks of the formatted text section
+    """
+    threat_intel = scan_result.get('threat_intel')
+    if threat_intel is None:
+        return
+    yield f"""
+─────────────────────────────────────────────────────
+THREAT INTELLIGENCE (LOCAL BLOCKLISTS)
+─────────────────────────────────────────────────────
+"""
+    if not threat_intel['lists']:
+        yield "No blocklists loaded\n"
+    elif not threat_intel['matches']:
+        yield f"No matches in {len(threat_intel['lists'])} blocklists\n"
+    for match in threat_intel['matches']:
+        listed = '' if match['indicator'] == match['value'] else f" (listed: {match['indicator']})"
+        yield f"🚩 {match['value']}{listed} - {', '.join(match['lists'])}\n"
+    yield f"⚠ {threat_intel['disclaimer']}\n"
@@ -0,0 +1,102 @@
+"""
+Thumbnail Module
+Generates fixed-size previews of uploaded images once, at ingest time
+
+Previews are stored by SHA-256 content hash, so identical uploads share
+one set of files and a preview URL never changes meaning. That makes
+them safe to serve with strong ETags and long-lived Cache-Control.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from PIL import Image
+
+from config import THUMBNAIL_FOLDER, THUMBNAIL_SIZES, THUMBNAIL_QUALITY
+from .image_loader import load_bounded
+from .metrics import cache_lookup
+
+_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Background used when flattening transparent images to JPEG (matches UI cards)
+_BACKGROUND = (26, 31, 46)
+
+
+def content_hash(file_path):
+    """
+    Calculate SHA-256 of a file in 64KB chunks
+
+    Args:
+        file_path (str): Path to file
+
+    Returns:
+        str: Hex digest
+    """
+    sha256_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+
+def thumbnail_path(file_hash, size):
+    """
+    Resolve the on-disk path of a thumbnail
+
+    Args:
+        file_hash (str): SHA-256 hex digest of the original upload
+        size (str): Size key from THUMBNAIL_SIZES
+
+    Returns:
+        str: Path, or None if the hash or size is invalid
+    """
+    if size not in THUMBNAIL_SIZES or not _HASH_PATTERN.match(file_hash or ''):
+        return None
+    return os.path.join(THUMBNAIL_FOLDER, f"{file_hash}_{size}.jpg")
+
+
+def generate_thumbnails(image_path, file_hash):
+    """
+    Create every configured preview size for an upload (skips existing ones)
+
+    The source is decoded once, at the coarsest JPEG DCT scale that still
+    covers the largest preview, and each size is derived from it.
+
+    Args:
+        image_path (str): Path to uploaded image
+        file_hash (str): SHA-256 hex digest of the upload
+
+    Returns:
+        dict: {size_key: thumbnail path} for all sizes now on disk
+    """
+    targets = {size: thumbnail_path(file_hash, size) for size in THUMBNAIL_SIZES}
+    missing = {size: path for size, path in targets.items() if not os.path.exists(path)}
+    cache_lookup('thumbnails', not missing)
+
+    if missing:
+        largest = max(THUMBNAIL_SIZES[size] for size in missing)
+        os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
+
+        with load_bounded(image_path, draft_size=(largest, largest)) as img:
+            preview = img
+            if preview.mode in ('RGBA', 'LA', 'P'):
+                preview = preview.convert('RGBA')
+                flattened = Image.new('RGB', preview.size, _BACKGROUND)
+                flattened.paste(preview, mask=preview.split()[-1])
+                preview = flattened
+            elif preview.mode != 'RGB':
+                preview = preview.convert('RGB')
+
+            # Largest first, so each smaller size is reduced from the previous one
+            for size in sorted(missing, key=lambda s: THUMBNAIL_SIZES[s], reverse=True):
+                edge = THUMBNAIL_SIZES[size]
+                preview.thumbnail((edge, edge), Image.LANCZOS)
+
+                # Write to a temp name and rename, so a reader never sees a partial file;
+                # the name is per writer, as two uploads of one image may race here
+                temp_path = f'{missing[size]}.{os.getpid()}.{threading.get_ident()}.tmp'
+                preview.save(temp_path, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+                os.replace(temp_path, missing[size])
+
+    return targets
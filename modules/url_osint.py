@@ -0,0 +1,487 @@
+"""
+URL OSINT Module
+Follows a URL's redirect chain and fingerprints the page it lands on
+
+- Every hop is recorded: URL, status code, Location, server, content
+  type and time taken; the landing page gets its title, size and a
+  SHA-256 of its content
+- One pooled HTTP client (keep-alive connections per host) serves every
+  scan; each hop has connect/read timeouts, each chain a total time
+  limit, and at most URL_MAX_BYTES of a page is downloaded
+- Redirect hops are cached by URL (permanent ones up to
+  URL_REDIRECT_CACHE_TTL, temporary ones for their max-age), so a
+  shortener or tracker shared by many URLs is fetched once; concurrent
+  scans wait for the one fetch in progress
+- Hosts that resolve to private, loopback or link-local addresses are
+  not fetched (unless URL_ALLOW_PRIVATE); new connections go to an
+  address checked in the same lookup, so a DNS answer that changes
+  after the check (rebinding) cannot redirect the fetch
+- The host names along the chain are returned in 'domains' for domain
+  scans; scan_urls() analyzes many URLs concurrently
+"""
+
+import hashlib
+import html
+import ipaddress
+import os
+import re
+import socket
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import connection
+
+from config import (
+    URL_WORKERS, URL_POOL_HOSTS, URL_MAX_REDIRECTS, URL_CONNECT_TIMEOUT, URL_READ_TIMEOUT,
+    URL_TOTAL_TIMEOUT, URL_MAX_BYTES, URL_REDIRECT_CACHE_TTL, URL_USER_AGENT, URL_ALLOW_PRIVATE
+)
+from .metrics import timed, timed_scan, inc, cache_lookup
+from .disclaimers import DISCLAIMERS
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+PERMANENT_REDIRECT_CODES = (301, 308)
+
+# Seconds a temporary redirect without max-age is reused
+_TEMPORARY_TTL = 300
+# Hops kept; when full, expired entries are dropped, then the oldest
+# until a quarter of the room is free
+_CACHE_MAX = 10000
+# Page bytes searched for the <title>
+_TITLE_WINDOW = 64 * 1024
+# Response headers kept for each hop and the landing page
+HOP_HEADERS = ('Server', 'Content-Type', 'Location', 'Cache-Control')
+PAGE_HEADERS = ('Server', 'Content-Type', 'Content-Length', 'Last-Modified', 'ETag', 'Cache-Control',
+                'Strict-Transport-Security', 'Content-Security-Policy', 'X-Frame-Options', 'X-Powered-By')
+
+_TITLE = re.compile(rb'<title[^>]*>(.*?)</title', re.I | re.S)
+_MAX_AGE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+
+
+class URLBlocked(Exception):
+    """The URL's host resolves to an address that may not be fetched"""
+
+
+# ═══════════════════════════════════════════════════════
+# HTTP CLIENT
+# ═══════════════════════════════════════════════════════
+
+def _resolve(host, port=None):
+    """
+    Addresses host may be connected to, in resolver order
+
+    Raises:
+        socket.gaierror: host does not resolve
+        URLBlocked: host resolves to a non-public address
+    """
+    addresses = []
+    for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        if not URL_ALLOW_PRIVATE:
+            address = ipaddress.ip_address(info[4][0].split('%')[0])
+            if not address.is_global:
+                raise URLBlocked(f'{host} resolves to non-public address {address}')
+        if info[4][0] not in addresses:
+            addresses.append(info[4][0])
+    return addresses
+
+
+class _CheckedConnectionMixin:
+    """Connects to an address from _resolve(), never to a second, unchecked DNS answer"""
+
+    def _new_conn(self):
+        try:
+            addresses = _resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f'Failed to resolve {self.host}: {e}') from e
+
+        error = None
+        for address in addresses:
+            try:
+                return connection.create_connection((address, self.port), self.timeout,
+                                                    source_address=self.source_address,
+                                                    socket_options=self.socket_options)
+            except socket.timeout:
+                error = ConnectTimeoutError(
+                    self, f'Connection to {self.host} timed out. (connect timeout={self.timeout})')
+            except OSError as e:
+                error = NewConnectionError(self, f'Failed to establish a new connection: {e}')
+        raise error
+
+
+class _CheckedHTTPConnection(_CheckedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CheckedHTTPSConnection(_CheckedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CheckedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CheckedHTTPConnection
+
+
+class _CheckedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CheckedHTTPSConnection
+
+
+class _CheckedAdapter(HTTPAdapter):
+    """HTTPAdapter whose direct connections go only to checked addresses (Host and SNI unchanged)"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CheckedHTTPConnectionPool,
+            'https': _CheckedHTTPSConnectionPool
+        }
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """
+    Shared HTTP client with keep-alive connection pools
+    URL_POOL_HOSTS hosts x URL_WORKERS connections each; a forked worker builds its own
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = _CheckedAdapter(pool_connections=URL_POOL_HOSTS, pool_maxsize=URL_WORKERS, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = URL_USER_AGENT
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+def _check_host(host):
+    """
+    Fail fast before a request (and guard requests sent through a proxy);
+    direct connections are checked again when they are opened
+
+    Raises:
+        URLBlocked: host resolves to a non-public address
+    """
+    if URL_ALLOW_PRIVATE:
+        return
+    try:
+        _resolve(host)
+    except socket.gaierror:
+        return      # The fetch reports the resolution failure
+
+
+def _fetch(url, deadline, timings=None):
+    """
+    One request, redirects not followed
+
+    Returns:
+        dict: status_code, headers, elapsed_ms and, for non-redirects,
+        body (at most URL_MAX_BYTES) and truncated
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout(f'Chain took longer than {URL_TOTAL_TIMEOUT}s')
+    _check_host(urlsplit(url).hostname)
+
+    start = time.perf_counter()
+    with timed(timings, 'http_fetch', upstream='http'):
+        with _get_session().get(url, allow_redirects=False, stream=True,
+                                timeout=(min(URL_CONNECT_TIMEOUT, remaining),
+                                         min(URL_READ_TIMEOUT, remaining))) as response:
+            hop = {
+                'status_code': response.status_code,
+                'headers': dict(response.headers),
+            }
+            if response.status_code not in REDIRECT_CODES:
+                chunks = []
+                size = 0
+                truncated = False
+                for chunk in response.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= URL_MAX_BYTES:
+                        truncated = size > URL_MAX_BYTES or bool(next(response.iter_content(1), b''))
+                        break
+                    if time.monotonic() > deadline:
+                        raise requests.exceptions.Timeout(f'Chain took longer than {URL_TOTAL_TIMEOUT}s')
+                hop['body'] = b''.join(chunks)[:URL_MAX_BYTES]
+                hop['truncated'] = truncated
+    hop['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return hop
+
+
+# ═══════════════════════════════════════════════════════
+# REDIRECT CACHE
+# ═══════════════════════════════════════════════════════
+
+def _redirect_ttl(hop):
+    """Seconds a redirect response may be reused (0: not at all)"""
+    cache_control = hop['headers'].get('Cache-Control', '')
+    if 'no-store' in cache_control or 'no-cache' in cache_control or 'private' in cache_control:
+        return 0
+    max_age = _MAX_AGE.search(cache_control)
+    if max_age:
+        return min(int(max_age.group(1)), URL_REDIRECT_CACHE_TTL)
+    return URL_REDIRECT_CACHE_TTL if hop['status_code'] in PERMANENT_REDIRECT_CODES else _TEMPORARY_TTL
+
+
+class _HopCache:
+    """Redirect responses by URL, with one fetch per URL at a time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._in_flight = {}
+
+    def _get(self, url):
+        entry = self._entries.get(url)
+        if entry is not None and entry[0] >= time.monotonic():
+            return entry[1]
+        return None
+
+    def fetch(self, url, deadline, timings=None):
+        """
+        The response for url: cached if it is a known redirect, else fetched
+        Returns (hop, cached)
+        """
+        with self._lock:
+            hop = self._get(url)
+            waiting = None if hop is not None else self._in_flight.get(url)
+            leader = hop is None and waiting is None
+            if leader:
+                self._in_flight[url] = threading.Event()
+        if waiting is not None:
+            # Another scan is fetching this URL; a redirect is cached when it is done
+            waiting.wait(max(0, deadline - time.monotonic()))
+            with self._lock:
+                hop = self._get(url)
+        cache_lookup('redirect', hop is not None)
+        if hop is not None:
+            return hop, True
+
+        try:
+            hop = _fetch(url, deadline, timings)
+            if hop['status_code'] in REDIRECT_CODES:
+                ttl = _redirect_ttl(hop)
+                if ttl:
+                    self._put(url, hop, ttl)
+            return hop, False
+        finally:
+            if leader:
+                with self._lock:
+                    self._in_flight.pop(url).set()
+
+    def _put(self, url, hop, ttl):
+        now = time.monotonic()
+        with self._lock:
+            # Re-inserted below, as the newest entry
+            self._entries.pop(url, None)
+            if len(self._entries) >= _CACHE_MAX:
+                entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+                if len(entries) >= _CACHE_MAX:
+                    # Dicts keep insertion order: drop the oldest, freeing room for many puts at once
+                    entries = dict(list(entries.items())[len(entries) - _CACHE_MAX * 3 // 4:])
+                self._entries = entries
+            self._entries[url] = (now + ttl, hop)
+
+
+_hops = _HopCache()
+
+
+# ═══════════════════════════════════════════════════════
+# ANALYSIS
+# ═══════════════════════════════════════════════════════
+
+def normalize_url(url):
+    """
+    http(s) URL with an IDNA host ('http://' added when the scheme is missing)
+
+    Raises:
+        ValueError: Not an http(s) URL with a host
+    """
+    url = (url or '').strip()
+    if '://' not in url:
+        url = f'http://{url}'
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        raise ValueError('Only http and https URLs with a host can be analyzed')
+    host = parts.hostname.encode('idna').decode('ascii')
+    if ':' in host:
+        host = f'[{host}]'      # IPv6 literal
+    netloc = host if parts.port is None else f'{host}:{parts.port}'
+    return parts._replace(scheme=parts.scheme.lower(), netloc=netloc).geturl()
+
+
+def _is_domain(host):
+    try:
+        ipaddress.ip_address(host)
+        return False
+    except ValueError:
+        return '.' in host
+
+
+def _page_title(body):
+    match = _TITLE.search(body[:_TITLE_WINDOW])
+    if not match:
+        return None
+    title = html.unescape(match.group(1).decode('utf-8', errors='replace'))
+    return ' '.join(title.split())[:300] or None
+
+
+@timed_scan('url')
+def scan_url(url):
+    """
+    Perform OSINT analysis of a URL
+    Follows redirects up to URL_MAX_REDIRECTS within URL_TOTAL_TIMEOUT
+
+    Args:
+        url (str): Target URL
+
+    Returns:
+        dict: URL intelligence data
+    """
+    result = {
+        'url': (url or '').strip(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'status': 'Unknown',
+        'final_url': None,
+        'final_host': None,
+        'status_code': None,
+        'redirects': [],
+        'headers': {},
+        'page': {},
+        'domains': [],
+        'errors': [],
+        'limitations': [],
+        'timings': {}
+    }
+
+    try:
+        current = normalize_url(url)
+    except ValueError as e:
+        result['status'] = 'Invalid'
+        result['errors'].append(str(e))
+        return result
+
+    deadline = time.monotonic() + URL_TOTAL_TIMEOUT
+    seen = set()
+    try:
+        while True:
+            host = urlsplit(current).hostname
+            if _is_domain(host) and host not in result['domains']:
+                result['domains'].append(host)
+            hop, cached = _hops.fetch(current, deadline, result['timings'])
+            if hop['status_code'] not in REDIRECT_CODES:
+                break
+
+            location = hop['headers'].get('Location')
+            result['redirects'].append({
+                'url': current,
+                'status_code': hop['status_code'],
+                'location': location,
+                'headers': {name: hop['headers'][name] for name in HOP_HEADERS if name in hop['headers']},
+                'elapsed_ms': 0 if cached else hop['elapsed_ms'],
+                'cached': cached
+            })
+            if not location:
+                break
+            seen.add(current)
+            current = normalize_url(urljoin(current, location))
+            if current in seen:
+                raise requests.exceptions.TooManyRedirects(f'Redirect loop at {current}')
+            if len(result['redirects']) >= URL_MAX_REDIRECTS:
+                raise requests.exceptions.TooManyRedirects(f'More than {URL_MAX_REDIRECTS} redirects')
+
+        result['final_url'] = current
+        result['final_host'] = urlsplit(current).hostname
+        result['status_code'] = hop['status_code']
+        result['headers'] = {name: hop['headers'][name] for name in PAGE_HEADERS if name in hop['headers']}
+        body = hop.get('body', b'')
+        result['page'] = {
+            'title': _page_title(body),
+            'content_type': hop['headers'].get('Content-Type'),
+            'bytes': len(body),
+            'truncated': hop.get('truncated', False),
+            'sha256': hashlib.sha256(body).hexdigest()
+        }
+        result['status'] = 'Reachable' if hop['status_code'] < 400 else 'HTTP error'
+    except URLBlocked as e:
+        result['status'] = 'Blocked'
+        result['errors'].append(str(e))
+    except requests.exceptions.TooManyRedirects as e:
+        result['status'] = 'Too many redirects'
+        result['errors'].append(str(e))
+    except requests.exceptions.Timeout as e:
+        result['status'] = 'Timeout'
+        result['errors'].append(f'Request timed out: {str(e)}')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        result['status'] = 'Unreachable'
+        result['errors'].append(f'Request error: {str(e)}')
+    except Exception as e:
+        result['status'] = 'Error'
+        result['errors'].append(f'Scan error: {str(e)}')
+
+    if result['page'].get('truncated'):
+        result['limitations'].append(DISCLAIMERS['url_truncated'])
+    result['limitations'].append(DISCLAIMERS['url_single_fetch'])
+    inc('osint_url_scans_total', status=result['status'])
+    return result
+
+
+def _bulk_entry(result):
+    return {
+        'url': result['url'],
+        'status': result['status'],
+        'status_code': result['status_code'],
+        'final_url': result['final_url'],
+        'redirects': len(result['redirects']),
+        'title': result['page'].get('title'),
+        'sha256': result['page'].get('sha256'),
+        'domains': result['domains'],
+        'error': result['errors'][0] if result['errors'] else None
+    }
+
+
+@timed_scan('url_bulk')
+def scan_urls(urls):
+    """
+    Analyze many URLs concurrently (URL_WORKERS threads)
+    Duplicates are analyzed once; shared redirect hops are fetched once
+
+    Returns:
+        dict: Per-URL summaries in input order, a count per status and
+        every domain seen
+    """
+    unique = list(dict.fromkeys((url or '').strip() for url in urls))
+    results = []
+    if unique:
+        with ThreadPoolExecutor(max_workers=min(URL_WORKERS, len(unique)),
+                                thread_name_prefix='url-scan') as executor:
+            results = list(executor.map(scan_url, unique))
+
+    summary = defaultdict(int)
+    domains = {}
+    for result in results:
+        summary[result['status']] += 1
+        domains.update(dict.fromkeys(result['domains']))
+    return {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'total': len(urls),
+        'unique': len(unique),
+        'summary': dict(summary),
+        'domains': list(domains),
+        'results': [_bulk_entry(result) for result in results],
+        'limitations': [DISCLAIMERS['url_single_fetch']],
+        'timings': {}
+    }
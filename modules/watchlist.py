@@ -0,0 +1,494 @@
+"""
+Watchlist Module
+Named lists of domains and IPs that are re-checked on a schedule
+
+A watched target is split into facets, each re-checked on its own when
+its TTL expires instead of re-running a full scan:
+- domain: dns_A, dns_AAAA, dns_MX, dns_NS, dns_TXT, dns_CNAME (the DNS
+  answer's TTL, clamped to WATCH_MIN_TTL..WATCH_MAX_TTL) and whois
+  (WATCH_WHOIS_TTL, daily close to the registration's expiry)
+- ip: geolocation (WATCH_GEO_TTL) and reverse_dns (the PTR record's TTL)
+
+- Every interval gets random jitter and new targets are spread over
+  WATCH_INITIAL_SPREAD, so checks do not stampede the upstreams
+- One process at a time (holding a lease in WATCHLIST_DB) dispatches due
+  facets, at most WATCH_RATE_LIMITS per second per upstream, as batch
+  jobs on the scan scheduler (one 'watch_<upstream>' job per target
+  and upstream)
+- Only the latest value of each facet is stored; when a re-check
+  differs (compared with scan_diff), a change event is recorded with
+  just the changed fields
+- Targets shared by several watchlists are checked once
+
+OSINT CONSTRAINTS:
+- A change may come from the data source (CDN rotation, geolocation
+  database updates) rather than the target itself; analyst review of
+  every change event is REQUIRED
+"""
+
+import ipaddress
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from config import (
+    WATCHLIST_DB, WATCH_TICK, WATCH_RATE_LIMITS, WATCH_MIN_TTL, WATCH_MAX_TTL, WATCH_WHOIS_TTL,
+    WATCH_WHOIS_EXPIRING_TTL, WATCH_GEO_TTL, WATCH_RETRY, WATCH_JITTER, WATCH_INITIAL_SPREAD,
+    WATCH_MAX_QUEUED
+)
+from .metrics import inc, register_gauge
+from .scan_diff import diff_results
+from .scheduler import submit_job, count_jobs
+
+TARGET_TYPES = ('domain', 'ip')
+
+DNS_FACETS = tuple(f'dns_{record_type}' for record_type in ('A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME'))
+
+# target_type -> {facet: upstream}
+FACETS = {
+    'domain': {**{facet: 'dns' for facet in DNS_FACETS}, 'whois': 'whois'},
+    'ip': {'geolocation': 'ip_api', 'reverse_dns': 'ptr'}
+}
+
+# Scheduler job type per upstream, so the scheduler's upstream limits stay exact
+JOB_TYPES = {upstream: f'watch_{upstream}' for facets in FACETS.values() for upstream in facets.values()}
+
+# Seconds a dispatched facet stays claimed before it is dispatched again
+_CLAIM_SECONDS = 900
+
+_DOMAIN_PATTERN = re.compile(r'[^\s/:]+\.[^\s/:.]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlists (
+    name        TEXT PRIMARY KEY,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watch_targets (
+    name        TEXT NOT NULL,
+    target_type TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    added_at    REAL NOT NULL,
+    PRIMARY KEY (name, target_type, target)
+);
+CREATE INDEX IF NOT EXISTS idx_watch_targets_target ON watch_targets (target_type, target);
+CREATE TABLE IF NOT EXISTS facets (
+    target_type TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    facet       TEXT NOT NULL,
+    upstream    TEXT NOT NULL,
+    value       TEXT,
+    checked_at  REAL,
+    expires_at  REAL NOT NULL,
+    error       TEXT,
+    PRIMARY KEY (target_type, target, facet)
+);
+CREATE INDEX IF NOT EXISTS idx_facets_due ON facets (upstream, expires_at);
+CREATE TABLE IF NOT EXISTS watch_events (
+    event_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    target_type TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    facet       TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    changes     TEXT NOT NULL,
+    lines       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_watch_events_target ON watch_events (target_type, target, event_id);
+CREATE TABLE IF NOT EXISTS watch_lease (
+    id          INTEGER PRIMARY KEY CHECK (id = 1),
+    owner_token TEXT NOT NULL,
+    expires_at  REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+
+
+class WatchlistError(ValueError):
+    """Raised for unknown watchlists and invalid targets"""
+
+
+def _connect():
+    """Return this thread's connection (SQLite connections are not shareable)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(WATCHLIST_DB), exist_ok=True)
+        conn = sqlite3.connect(WATCHLIST_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _jittered(seconds):
+    return seconds * (1 + random.uniform(0, WATCH_JITTER))
+
+
+def normalize_target(target_type, target):
+    """
+    Canonical form of a watched target
+
+    Raises:
+        WatchlistError: Unknown type or malformed domain/IP
+    """
+    target = str(target).strip()
+    if target_type == 'ip':
+        try:
+            return ipaddress.ip_address(target).compressed
+        except ValueError:
+            raise WatchlistError(f'Invalid IP address: {target}')
+    if target_type == 'domain':
+        target = target.rstrip('.').lower()
+        if not _DOMAIN_PATTERN.fullmatch(target):
+            raise WatchlistError(f'Invalid domain: {target}')
+        return target
+    raise WatchlistError(f'Unknown target type: {target_type}')
+
+
+# ═══════════════════════════════════════════════════════
+# MANAGING WATCHLISTS
+# ═══════════════════════════════════════════════════════
+
+def add_targets(name, target_type, targets):
+    """
+    Add targets to a watchlist (created if needed); returns how many were new to it
+
+    Raises:
+        WatchlistError: Invalid name, type or target (nothing is added)
+    """
+    name = name.strip()
+    if not name:
+        raise WatchlistError('Watchlist name is required')
+    targets = sorted({normalize_target(target_type, target) for target in targets})
+
+    conn = _connect()
+    now = time.time()
+    with conn:
+        conn.execute('INSERT OR IGNORE INTO watchlists (name, created_at) VALUES (?, ?)', (name, now))
+        before = conn.total_changes
+        conn.executemany('INSERT OR IGNORE INTO watch_targets (name, target_type, target, added_at) VALUES (?, ?, ?, ?)',
+                         [(name, target_type, target, now) for target in targets])
+        added = conn.total_changes - before
+        # First checks are spread out; targets already watched elsewhere keep their schedule
+        conn.executemany(
+            'INSERT OR IGNORE INTO facets (target_type, target, facet, upstream, expires_at) VALUES (?, ?, ?, ?, ?)',
+            [(target_type, target, facet, upstream, now + random.uniform(0, WATCH_INITIAL_SPREAD))
+             for target in targets for facet, upstream in FACETS[target_type].items()]
+        )
+    return added
+
+
+def remove_targets(name, target_type=None, targets=None):
+    """
+    Remove targets from a watchlist, or the whole watchlist when targets is None
+    Facets and change history of targets no longer watched anywhere are dropped
+
+    Raises:
+        WatchlistError: Unknown watchlist
+    """
+    conn = _connect()
+    with conn:
+        if conn.execute('SELECT 1 FROM watchlists WHERE name = ?', (name,)).fetchone() is None:
+            raise WatchlistError(f'Watchlist not found: {name}')
+        if targets is None:
+            conn.execute('DELETE FROM watch_targets WHERE name = ?', (name,))
+            conn.execute('DELETE FROM watchlists WHERE name = ?', (name,))
+            for table in ('facets', 'watch_events'):
+                conn.execute(f'DELETE FROM {table} WHERE NOT EXISTS (SELECT 1 FROM watch_targets AS w '
+                             f'WHERE w.target_type = {table}.target_type AND w.target = {table}.target)')
+        else:
+            removed = [(target_type, normalize_target(target_type, target)) for target in targets]
+            conn.executemany('DELETE FROM watch_targets WHERE name = ? AND target_type = ? AND target = ?',
+                             [(name, *target) for target in removed])
+            for table in ('facets', 'watch_events'):
+                conn.executemany(f'DELETE FROM {table} WHERE target_type = ? AND target = ? AND NOT EXISTS '
+                                 '(SELECT 1 FROM watch_targets AS w WHERE w.target_type = ? AND w.target = ?)',
+                                 [target * 2 for target in removed])
+
+
+def list_watchlists():
+    """All watchlists with their target counts"""
+    rows = _connect().execute(
+        'SELECT l.name, l.created_at, COUNT(w.target) AS targets FROM watchlists AS l '
+        'LEFT JOIN watch_targets AS w ON w.name = l.name GROUP BY l.name ORDER BY l.name'
+    )
+    return [{'name': row['name'], 'created_at': _timestamp(row['created_at']), 'targets': row['targets']}
+            for row in rows]
+
+
+def list_targets(name, limit=100, offset=0):
+    """
+    One page of a watchlist's targets with their check times
+
+    Raises:
+        WatchlistError: Unknown watchlist
+    """
+    conn = _connect()
+    if conn.execute('SELECT 1 FROM watchlists WHERE name = ?', (name,)).fetchone() is None:
+        raise WatchlistError(f'Watchlist not found: {name}')
+    rows = conn.execute(
+        'SELECT w.target_type, w.target, w.added_at, MAX(f.checked_at) AS last_checked, '
+        'MIN(f.expires_at) AS next_check, SUM(f.error IS NOT NULL) AS errors '
+        'FROM watch_targets AS w LEFT JOIN facets AS f ON f.target_type = w.target_type AND f.target = w.target '
+        'WHERE w.name = ? GROUP BY w.target_type, w.target ORDER BY w.target_type, w.target LIMIT ? OFFSET ?',
+        (name, limit, offset)
+    )
+    return [{
+        'target_type': row['target_type'],
+        'target': row['target'],
+        'added_at': _timestamp(row['added_at']),
+        'last_checked': _timestamp(row['last_checked']),
+        'next_check': _timestamp(row['next_check']),
+        'failing_facets': row['errors'] or 0
+    } for row in rows]
+
+
+def target_state(target_type, target):
+    """Latest value, check times and last error of each facet of a target"""
+    rows = _connect().execute('SELECT * FROM facets WHERE target_type = ? AND target = ? ORDER BY facet',
+                              (target_type, normalize_target(target_type, target)))
+    return {row['facet']: {
+        'value': json.loads(row['value']) if row['value'] else None,
+        'checked_at': _timestamp(row['checked_at']),
+        'next_check': _timestamp(row['expires_at']),
+        'error': row['error']
+    } for row in rows}
+
+
+def list_events(since=0, name=None, limit=100):
+    """
+    Change events newer than event_id 'since', oldest first (poll with the last ID seen)
+    Optionally only for targets in one watchlist
+    """
+    query = 'SELECT e.* FROM watch_events AS e'
+    params = []
+    if name:
+        query += (' JOIN watch_targets AS w ON w.target_type = e.target_type AND w.target = e.target'
+                  ' AND w.name = ?')
+        params.append(name)
+    query += ' WHERE e.event_id > ? ORDER BY e.event_id LIMIT ?'
+    params += [since, limit]
+    return [{
+        'event_id': row['event_id'],
+        'target_type': row['target_type'],
+        'target': row['target'],
+        'facet': row['facet'],
+        'created_at': _timestamp(row['created_at']),
+        'changes': json.loads(row['changes']),
+        'lines': json.loads(row['lines'])
+    } for row in _connect().execute(query, params)]
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+# ═══════════════════════════════════════════════════════
+# RE-CHECKING FACETS
+# ═══════════════════════════════════════════════════════
+
+def _whois_ttl(whois_info):
+    """Weekly, or daily once the registration expires within 30 days"""
+    match = re.search(r'\d{4}-\d{2}-\d{2}', str(whois_info.get('expiration_date', '')))
+    if match:
+        expires = datetime.strptime(match.group(), '%Y-%m-%d')
+        if expires - datetime.now() < timedelta(days=30):
+            return WATCH_WHOIS_EXPIRING_TTL
+    return WATCH_WHOIS_TTL
+
+
+def _fetch(target_type, target, facet):
+    """
+    Look up one facet; returns (value, ttl in seconds)
+
+    Raises:
+        Exception: The lookup failed (the stored value is kept)
+    """
+    # The scanners' dependencies load here, on the first re-check, not at startup
+    if facet.startswith('dns_'):
+        from .domain_osint import resolve_records
+        records, ttl = resolve_records(target, facet[len('dns_'):])
+        return sorted(records), min(max(ttl or WATCH_MAX_TTL, WATCH_MIN_TTL), WATCH_MAX_TTL)
+
+    if facet == 'whois':
+        from .domain_osint import lookup_whois
+        whois_info = lookup_whois(target)
+        if 'error' in whois_info:
+            raise RuntimeError(whois_info['error'])
+        return whois_info, _whois_ttl(whois_info)
+
+    if facet == 'geolocation':
+        from .ip_osint import lookup_geolocation
+        geolocation, _, error = lookup_geolocation(target)
+        if error:
+            raise RuntimeError(error)
+        return geolocation, WATCH_GEO_TTL
+
+    if facet == 'reverse_dns':
+        from .domain_osint import reverse_lookup
+        hostname, ttl = reverse_lookup(target)
+        return hostname or 'No PTR record', min(max(ttl or WATCH_MAX_TTL, WATCH_MIN_TTL), WATCH_MAX_TTL)
+
+    raise WatchlistError(f'Unknown facet: {facet}')
+
+
+def _as_result(facet, value):
+    """A partial scan result holding one facet, for scan_diff"""
+    if facet.startswith('dns_'):
+        return {'dns_records': {facet[len('dns_'):]: value}}
+    if facet == 'whois':
+        return {'whois_info': value}
+    return {facet: value}
+
+
+def refresh_target(target_type, target, facets):
+    """
+    Re-check some facets of a watched target (runs as a scheduler job)
+
+    Returns:
+        dict: {'target', 'checked': [...], 'failed': [...], 'events': [event_id, ...]}
+    """
+    conn = _connect()
+    summary = {'target': target, 'checked': [], 'failed': [], 'events': []}
+    for facet in facets:
+        row = conn.execute('SELECT value FROM facets WHERE target_type = ? AND target = ? AND facet = ?',
+                           (target_type, target, facet)).fetchone()
+        if row is None:
+            continue    # No longer watched
+
+        upstream = FACETS[target_type][facet]
+        try:
+            value, ttl = _fetch(target_type, target, facet)
+        except Exception as e:
+            inc('osint_watch_checks_total', upstream=upstream, outcome='error')
+            summary['failed'].append(facet)
+            with conn:
+                conn.execute('UPDATE facets SET expires_at = ?, error = ? WHERE target_type = ? AND target = ? AND facet = ?',
+                             (time.time() + _jittered(WATCH_RETRY), str(e), target_type, target, facet))
+            continue
+
+        now = time.time()
+        with conn:
+            if row['value'] is not None:
+                diff = diff_results(target_type, _as_result(facet, json.loads(row['value'])), _as_result(facet, value))
+                if diff['changed']:
+                    cursor = conn.execute(
+                        'INSERT INTO watch_events (target_type, target, facet, created_at, changes, lines) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (target_type, target, facet, now, json.dumps(diff['changes'], default=str),
+                         json.dumps(diff['lines']))
+                    )
+                    summary['events'].append(cursor.lastrowid)
+                    inc('osint_watch_changes_total', target_type=target_type, facet=facet)
+            conn.execute(
+                'UPDATE facets SET value = ?, checked_at = ?, expires_at = ?, error = NULL '
+                'WHERE target_type = ? AND target = ? AND facet = ?',
+                (json.dumps(value, default=str), now, now + _jittered(ttl), target_type, target, facet)
+            )
+        inc('osint_watch_checks_total', upstream=upstream, outcome='ok')
+        summary['checked'].append(facet)
+    return summary
+
+
+# ═══════════════════════════════════════════════════════
+# DISPATCHER
+# ═══════════════════════════════════════════════════════
+
+class _Dispatcher:
+    """Hands due facets to the scheduler, within per-upstream rate limits"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pid = None
+        self.token = None
+        self.leader = False
+        self.due = 0
+
+    def start(self):
+        if self.pid == os.getpid():
+            return
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            # A forked worker inherits the parent's state but not its thread
+            self.token = uuid.uuid4().hex
+            self.leader = False
+            threading.Thread(target=self._loop, name='watchlist-dispatcher', daemon=True).start()
+            self.pid = os.getpid()
+
+    def _acquire_lease(self, conn):
+        now = time.time()
+        with conn:
+            conn.execute(
+                'INSERT INTO watch_lease (id, owner_token, expires_at) VALUES (1, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET owner_token = excluded.owner_token, expires_at = excluded.expires_at '
+                'WHERE watch_lease.owner_token = excluded.owner_token OR watch_lease.expires_at < ?',
+                (self.token, now + WATCH_TICK * 3, now)
+            )
+        row = conn.execute('SELECT owner_token FROM watch_lease WHERE id = 1').fetchone()
+        return row is not None and row['owner_token'] == self.token
+
+    def _loop(self):
+        # Token buckets: one tick of burst, at least one request
+        tokens = {upstream: 0.0 for upstream in WATCH_RATE_LIMITS}
+        last = time.monotonic()
+        while True:
+            time.sleep(WATCH_TICK)
+            try:
+                conn = _connect()
+                self.leader = self._acquire_lease(conn)
+                if not self.leader:
+                    continue
+                now = time.monotonic()
+                for upstream, rate in WATCH_RATE_LIMITS.items():
+                    tokens[upstream] = min(tokens[upstream] + rate * (now - last), max(rate * WATCH_TICK, 1))
+                last = now
+                self._dispatch(conn, tokens)
+            except sqlite3.Error as e:
+                print(f"Error dispatching watchlist checks: {str(e)}")
+
+    def _dispatch(self, conn, tokens):
+        now = time.time()
+        self.due = sum(conn.execute('SELECT COUNT(*) FROM facets WHERE upstream = ? AND expires_at <= ?',
+                                    (upstream, now)).fetchone()[0] for upstream in WATCH_RATE_LIMITS)
+        # Back off while the scheduler has not caught up
+        if not self.due or count_jobs(tuple(JOB_TYPES.values())) >= WATCH_MAX_QUEUED:
+            return
+
+        batches = {}
+        with conn:
+            for upstream in WATCH_RATE_LIMITS:
+                rows = conn.execute(
+                    'SELECT target_type, target, facet FROM facets WHERE upstream = ? AND expires_at <= ? '
+                    'ORDER BY expires_at LIMIT ?',
+                    (upstream, now, int(tokens[upstream]))
+                ).fetchall()
+                tokens[upstream] -= len(rows)
+                for row in rows:
+                    batches.setdefault((row['target_type'], row['target'], upstream), []).append(row['facet'])
+                # Claimed until the job re-schedules them (or again after _CLAIM_SECONDS if it never runs)
+                conn.executemany(
+                    'UPDATE facets SET expires_at = ? WHERE target_type = ? AND target = ? AND facet = ?',
+                    [(now + _CLAIM_SECONDS, row['target_type'], row['target'], row['facet']) for row in rows]
+                )
+
+        for (target_type, target, upstream), facets in batches.items():
+            submit_job(JOB_TYPES[upstream], target, 'watchlist', 'batch',
+                       {'target_type': target_type, 'facets': facets})
+
+
+_dispatcher = _Dispatcher()
+# Only the lease holder reports, so the sum across processes is the real backlog
+register_gauge('osint_watch_due_facets', lambda: _dispatcher.due if _dispatcher.leader else 0)
+
+
+def start_watchlist_dispatcher():
+    """Start this process's dispatcher thread (idempotent, restarts after a fork)"""
+    _dispatcher.start()
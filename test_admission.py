@@ -0,0 +1,234 @@
+"""
+Admission Control Testing Script
+Checks the 429 answers and in-flight slots of the scan APIs
+
+- A session whose token bucket is empty gets 429 with a Retry-After
+  that is exactly long enough for the next token; other sessions are
+  unaffected
+- A streamed scan holds its in-flight slot while the response is open
+  and frees it when the stream finishes, when the response (plain or
+  gzip-wrapped) is closed, and when the client disconnects from a
+  running server
+- Slots left by an exited process are reclaimed when the cap is reached
+
+The checks run in fresh interpreters with their own storage folder and
+a stand-in domain job, so no separate server or network access is needed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# App with a logged-in test client, and a helper counting held domain slots
+SETUP = (
+    "import json, socket, threading, time, types\n"
+    "import app as osint\n"
+    "from modules import admission\n"
+    "application = osint.create_app()\n"
+    "def login(session_id):\n"
+    "    client = application.test_client()\n"
+    "    with client.session_transaction() as session:\n"
+    "        session['logged_in'] = True\n"
+    "        session['session_id'] = session_id\n"
+    "    return client\n"
+    "def in_flight():\n"
+    "    return admission._connect().execute(\n"
+    "        \"SELECT COUNT(*) FROM admission_slots WHERE scan_type = 'domain'\").fetchone()[0]\n"
+)
+
+# Domain jobs that publish an event every 50 ms until `finish` is set
+STREAM_SETUP = SETUP + (
+    "from modules.scheduler import register_job_type, emit_progress\n"
+    "admission.ADMISSION_RATES.pop('domain')\n"
+    "admission.ADMISSION_IN_FLIGHT['domain'] = 1\n"
+    "finish = threading.Event()\n"
+    "def slow_domain(domain, options):\n"
+    "    while not finish.is_set():\n"
+    "        emit_progress({'event': 'dns', 'record_type': 'A', 'records': ['192.0.2.1']})\n"
+    "        time.sleep(0.05)\n"
+    "    return {'domain': domain}\n"
+    "register_job_type('domain', slow_domain, pool='io')\n"
+    "def wait_released(timeout=5):\n"
+    "    deadline = time.monotonic() + timeout\n"
+    "    while in_flight() and time.monotonic() < deadline:\n"
+    "        time.sleep(0.05)\n"
+    "    return in_flight()\n"
+)
+
+
+def run_python(code, storage, timeout=60):
+    """Run code in a fresh interpreter using the given storage folder; returns its JSON output"""
+    env = dict(os.environ, OSINT_STORAGE_DIR=storage)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=timeout)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_empty_bucket_retry_after():
+    """An empty bucket answers 429 with a Retry-After matching the refill time"""
+    print("\n🔍 TEST 1: Empty Bucket Retry-After")
+    print("=" * 50)
+
+    code = SETUP + (
+        "admission.ADMISSION_RATES['domain'] = (0.5, 2)\n"
+        "clock = [1000000.0]\n"
+        "admission.time = types.SimpleNamespace(time=lambda: clock[0])\n"
+        "def scan(client):\n"
+        "    response = client.post('/api/scan/domain', json={'domain': ''})\n"
+        "    return [response.status_code, response.headers.get('Retry-After'),\n"
+        "            (response.get_json() or {}).get('retry_after')]\n"
+        "client = login('session-a')\n"
+        "report = {'burst': [scan(client) for _ in range(3)]}\n"
+        "clock[0] += 1.9\n"
+        "report['almost'] = scan(client)\n"
+        "clock[0] += 0.1\n"
+        "report['refilled'] = [scan(client), scan(client)]\n"
+        "report['other_session'] = scan(login('session-b'))\n"
+        "print(json.dumps(report))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        report = run_python(code, storage)
+
+    # 0.5 tokens/s, burst 2: two requests pass, the third waits 2s for a token
+    assert report['burst'] == [[200, None, None], [200, None, None], [429, '2', 2]], report
+    assert report['almost'] == [429, '1', 1], report
+    assert report['refilled'] == [[200, None, None], [429, '2', 2]], report
+    assert report['other_session'] == [200, None, None], report
+    print("✅ PASSED: 429 with Retry-After 2s, then 1s; admitted once it passed")
+
+
+def test_stream_releases_slot():
+    """A streamed scan frees its slot when it finishes or its response is closed"""
+    print("\n🔍 TEST 2: Streamed Scan Releases Its Slot")
+    print("=" * 50)
+
+    code = STREAM_SETUP + (
+        "client = login('session-a')\n"
+        "report = {}\n"
+        "for name, headers in (('closed', {}), ('closed_gzip', {'Accept-Encoding': 'gzip'})):\n"
+        "    response = client.post('/api/scan/domain/stream', json={'domain': 'example.com'},\n"
+        "                           headers=headers, buffered=False)\n"
+        "    next(iter(response.response))\n"
+        "    held = in_flight()\n"
+        "    blocked = client.post('/api/scan/domain/stream', json={'domain': 'example.org'}).status_code\n"
+        "    response.close()\n"
+        "    report[name] = {'status': response.status_code, 'gzip': response.content_encoding == 'gzip',\n"
+        "                    'held': held, 'blocked': blocked, 'after': in_flight()}\n"
+        "finish.set()\n"
+        "response = client.post('/api/scan/domain/stream', json={'domain': 'example.net'})\n"
+        "events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]\n"
+        "response.close()   # As the WSGI server does once the body is sent\n"
+        "report['finished'] = {'last': events[-1]['event'], 'after': in_flight()}\n"
+        "print(json.dumps(report))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        report = run_python(code, storage)
+
+    for name, gzip in (('closed', False), ('closed_gzip', True)):
+        case = report[name]
+        assert case['status'] == 200 and case['gzip'] == gzip, report
+        assert case['held'] == 1 and case['blocked'] == 429, report
+        assert case['after'] == 0, report
+    assert report['finished'] == {'last': 'result', 'after': 0}, report
+    print("✅ PASSED: Slot held while streaming; freed on close (plain and gzip) and on completion")
+
+
+def test_client_disconnect_releases_slot():
+    """A client hanging up on a running stream frees its slot"""
+    print("\n🔍 TEST 3: Client Disconnect Releases Its Slot")
+    print("=" * 50)
+
+    code = STREAM_SETUP + (
+        "from werkzeug.serving import make_server\n"
+        "server = make_server('127.0.0.1', 0, application, threaded=True)\n"
+        "threading.Thread(target=server.serve_forever, daemon=True).start()\n"
+        "cookie = application.session_interface.get_signing_serializer(application).dumps(\n"
+        "    {'logged_in': True, 'session_id': 'session-a'})\n"
+        "body = json.dumps({'domain': 'example.com'}).encode()\n"
+        "connection = socket.create_connection(('127.0.0.1', server.server_port))\n"
+        "connection.sendall(b'POST /api/scan/domain/stream HTTP/1.1\\r\\nHost: localhost\\r\\n'\n"
+        "                   b'Content-Type: application/json\\r\\n'\n"
+        "                   + f'Cookie: session={cookie}\\r\\nContent-Length: {len(body)}\\r\\n\\r\\n'.encode()\n"
+        "                   + body)\n"
+        "received = b''\n"
+        "while b'\"event\"' not in received:\n"
+        "    received += connection.recv(4096)\n"
+        "held = in_flight()\n"
+        "connection.close()\n"
+        "start = time.monotonic()\n"
+        "after = wait_released()\n"
+        "finish.set()\n"
+        "print(json.dumps({'status': received.split(b' ')[1].decode(), 'held': held, 'after': after,\n"
+        "                  'elapsed': time.monotonic() - start}))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        report = run_python(code, storage)
+
+    print(f"   Slot freed {report['elapsed']:.2f}s after the client hung up")
+    assert report['status'] == '200' and report['held'] == 1, report
+    assert report['after'] == 0, report
+    print("✅ PASSED: Slot freed once the server noticed the disconnect")
+
+
+def test_leftover_slots_reclaimed():
+    """Slots held by a process that exited no longer count against the cap"""
+    print("\n🔍 TEST 4: Leftover Slots Reclaimed")
+    print("=" * 50)
+
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    code = SETUP + (
+        "admission.ADMISSION_IN_FLIGHT['domain'] = 2\n"
+        "conn = admission._connect()\n"
+        "for slot_id in ('left-1', 'left-2'):\n"
+        "    conn.execute('INSERT INTO admission_slots (slot_id, scan_type, owner_pid, owner_token, acquired_at) '\n"
+        f"                 \"VALUES (?, 'domain', {exited.pid}, 'earlier-run', ?)\", (slot_id, time.time()))\n"
+        "status = login('session-a').post('/api/scan/domain', json={'domain': ''}).status_code\n"
+        "print(json.dumps({'status': status, 'left': in_flight()}))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        report = run_python(code, storage)
+
+    assert report == {'status': 200, 'left': 0}, report
+    print("✅ PASSED: Exited process's slots reclaimed; the request was admitted")
+
+
+def run_all_tests():
+    """Run all admission tests"""
+    print("\n" + "=" * 50)
+    print("  ADMISSION CONTROL TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("Empty Bucket Retry-After", test_empty_bucket_retry_after),
+                       ("Stream Releases Slot", test_stream_releases_slot),
+                       ("Client Disconnect", test_client_disconnect_releases_slot),
+                       ("Leftover Slots", test_leftover_slots_reclaimed)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)
@@ -0,0 +1,159 @@
+"""
+Email OSINT Testing Script
+Checks email_osint against the local DNS and SMTP stand-ins
+
+- Syntax checks and role-account flags
+- MX lookup, including the implicit MX of a domain without MX records
+- Mailbox verification: deliverable, undeliverable, greylisted and
+  catch-all domains
+- Connection pooling: a bulk check of many addresses opens no more
+  connections than SMTP_CONNECTIONS_PER_HOST per MX host
+
+The checks run in fresh interpreters pointed at the stand-ins, so no
+server or network access is needed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.standins import start_standins
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_checks(code, standin_env):
+    """Run code in a fresh interpreter pointed at the stand-ins; returns its JSON output"""
+    with tempfile.TemporaryDirectory() as storage:
+        env = dict(os.environ, OSINT_STORAGE_DIR=storage, **standin_env)
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_syntax():
+    """Malformed addresses are rejected without any lookup"""
+    print("\n🔍 TEST 1: Address Syntax")
+    print("=" * 50)
+
+    standins, env = start_standins()
+    try:
+        results = run_checks(
+            "import json\n"
+            "from modules.email_osint import scan_email\n"
+            "addresses = ['alice@example.com', 'no-at-sign.example.com', 'a..b@example.com',\n"
+            "             'bob@localhost', 'x' * 65 + '@example.com', 'Info@Bücher.example']\n"
+            "print(json.dumps([scan_email(a, verify=False) for a in addresses]))\n",
+            env
+        )
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    statuses = [result['status'] for result in results]
+    assert statuses == ['Valid domain', 'Invalid', 'Invalid', 'Invalid', 'Invalid', 'Valid domain'], statuses
+    assert results[5]['domain'] == 'xn--bcher-kva.example', results[5]['domain']
+    assert results[5]['role_account'] and not results[0]['role_account']
+    print("✅ PASSED: Syntax checked, IDNA domains normalized, role accounts flagged")
+
+
+def test_mx_and_mailboxes():
+    """MX records are resolved and each mailbox gets the right status"""
+    print("\n🔍 TEST 2: MX Records And Mailbox Checks")
+    print("=" * 50)
+
+    standins, env = start_standins()
+    try:
+        results = run_checks(
+            "import json\n"
+            "from modules.email_osint import scan_email\n"
+            "addresses = ['alice@example.com', 'nobody@example.com', 'greylist1@example.com',\n"
+            "             'nobody@catch-all.example.com', 'bob@no-mx.example.com']\n"
+            "print(json.dumps([scan_email(a) for a in addresses]))\n",
+            env
+        )
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    alice, nobody, greylisted, catch_all, implicit = results
+    assert [mx['host'] for mx in alice['mx_records']] == ['mail.bench-target.com', 'mail2.bench-target.com']
+    assert alice['status'] == 'Deliverable' and alice['smtp']['code'] == 250, alice['smtp']
+    assert alice['smtp']['catch_all'] is False
+    assert nobody['status'] == 'Undeliverable' and nobody['smtp']['code'] == 550, nobody['smtp']
+    assert greylisted['status'] == 'Unknown' and greylisted['smtp']['code'] == 451, greylisted['smtp']
+    assert catch_all['status'] == 'Accept-all' and catch_all['smtp']['catch_all'] is True
+    assert implicit['mx_implicit'] and implicit['mx_records'][0]['host'] == 'no-mx.example.com'
+    assert implicit['status'] == 'Deliverable'
+    print("✅ PASSED: Deliverable, undeliverable, greylisted, catch-all and implicit MX")
+
+
+def test_bulk_reuses_connections():
+    """A bulk check shares a few pooled connections per MX host"""
+    print("\n🔍 TEST 3: Bulk Checks Reuse Connections")
+    print("=" * 50)
+
+    standins, env = start_standins()
+    try:
+        summary = run_checks(
+            "import json\n"
+            "from config import SMTP_CONNECTIONS_PER_HOST\n"
+            "from modules.email_osint import scan_emails\n"
+            "addresses = [f'user{i}@domain{i % 20}.example' for i in range(1000)]\n"
+            "addresses += [f'nobody{i}@domain{i % 20}.example' for i in range(200)]\n"
+            "addresses += addresses[:100]\n"
+            "result = scan_emails(addresses)\n"
+            "print(json.dumps({'total': result['total'], 'unique': result['unique'],\n"
+            "                  'summary': result['summary'], 'statuses': len(result['results']),\n"
+            "                  'limit': SMTP_CONNECTIONS_PER_HOST}))\n",
+            env
+        )
+        stats = standins['smtp'].stats()
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    print(f"   {summary['unique']} addresses, {stats['connections']} SMTP connections")
+    assert summary['total'] == 1300 and summary['unique'] == 1200 == summary['statuses']
+    assert summary['summary'] == {'Deliverable': 1000, 'Undeliverable': 200}, summary['summary']
+    # Every domain shares the stand-in's MX host
+    assert stats['connections'] <= summary['limit'], stats
+    print("✅ PASSED: Duplicates checked once, connections pooled per MX host")
+
+
+def run_all_tests():
+    """Run all email OSINT tests"""
+    print("\n" + "=" * 50)
+    print("  EMAIL OSINT TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("Address Syntax", test_syntax),
+                       ("MX And Mailboxes", test_mx_and_mailboxes),
+                       ("Connection Reuse", test_bulk_reuses_connections)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)
@@ -0,0 +1,129 @@
+"""
+Import Time Testing Script
+Guards application startup cost with python -X importtime
+
+- Importing the app and building it with create_app() must not load the
+  heavy scanner dependencies (they load on the first scan)
+- The app import must stay within an import-time budget
+  (OSINT_IMPORT_BUDGET_MS, default 400 ms)
+- Scanners must still load their dependencies on first use
+
+Runs in fresh interpreters against a temporary storage folder, so no
+server is needed and the real reports are not touched.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+IMPORT_BUDGET_MS = float(os.environ.get('OSINT_IMPORT_BUDGET_MS', '400'))
+
+# Top-level packages that only the scanners and image pipeline need
+HEAVY_PACKAGES = ('dns', 'whois', 'requests', 'PIL', 'numpy', 'pytesseract', 'exifread', 'geopy')
+
+
+def run_python(code, *flags):
+    """Run code in a fresh interpreter from the repo root; returns the completed process"""
+    with tempfile.TemporaryDirectory() as storage:
+        env = dict(os.environ, OSINT_STORAGE_DIR=storage)
+        return subprocess.run([sys.executable, *flags, '-c', code], cwd=ROOT, env=env,
+                              capture_output=True, text=True, timeout=120)
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from -X importtime output"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def test_no_heavy_imports_at_startup():
+    """Building the app loads no scanner dependencies"""
+    print("\n🔍 TEST 1: No Heavy Imports At Startup")
+    print("=" * 50)
+
+    result = run_python("import app; app.create_app()", '-X', 'importtime')
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    loaded = {name.split('.')[0] for name in parse_importtime(result.stderr)}
+    heavy = sorted(loaded.intersection(HEAVY_PACKAGES))
+    assert not heavy, f"Imported at startup: {', '.join(heavy)}"
+    print("✅ PASSED: No scanner dependencies imported at startup")
+
+
+def test_import_budget():
+    """The app module imports within the budget"""
+    print("\n🔍 TEST 2: Import Time Budget")
+    print("=" * 50)
+
+    result = run_python("import app", '-X', 'importtime')
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    timings = parse_importtime(result.stderr)
+    total_ms = timings['app'][1] / 1000
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    print(f"   app import: {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    for name, (self_us, _) in slowest:
+        print(f"   {self_us / 1000:8.1f} ms  {name}")
+
+    assert total_ms <= IMPORT_BUDGET_MS, f"app import took {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+    print("✅ PASSED: Import time within budget")
+
+
+def test_scanners_load_on_first_use():
+    """Accessing a scanner loads its dependencies"""
+    print("\n🔍 TEST 3: Scanners Load On First Use")
+    print("=" * 50)
+
+    result = run_python(
+        "import sys, modules\n"
+        "assert 'dns' not in sys.modules\n"
+        "modules.scan_domain\n"
+        "assert 'dns.resolver' in sys.modules and 'whois' in sys.modules\n"
+        "assert 'PIL' not in sys.modules\n"
+        "modules.analyze_image\n"
+        "assert 'PIL' in sys.modules and 'exifread' in sys.modules\n"
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    print("✅ PASSED: Scanner dependencies load on first access")
+
+
+def run_all_tests():
+    """Run all import time tests"""
+    print("\n" + "=" * 50)
+    print("  IMPORT TIME TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("No Heavy Imports", test_no_heavy_imports_at_startup),
+                       ("Import Budget", test_import_budget),
+                       ("Lazy Scanners", test_scanners_load_on_first_use)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)
@@ -0,0 +1,175 @@
+"""
+Metrics Testing Script
+Checks the /metrics totals merged across worker processes
+
+- Counters and histograms of a worker that exits are kept (folded into
+  the exited-process totals), so the summed series never go down;
+  its gauges are dropped
+- Folding happens once, however many processes scrape at the same time
+- Liveness checks are portable (no os.kill(pid, 0) probe on Windows)
+
+The checks run in fresh interpreters with their own storage folder, so
+no server or network access is needed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# A worker that records 5 requests and a scan, publishes a gauge, flushes, then waits to be killed
+WORKER = (
+    "import os, sys, time\n"
+    "from modules import metrics\n"
+    "for _ in range(5):\n"
+    "    metrics.inc('osint_http_requests_total', endpoint='main.api_scan_domain', status='200')\n"
+    "metrics.observe('osint_scan_duration_seconds', 0.2, scan_type='domain')\n"
+    "metrics.register_gauge('osint_jobs_running', lambda: 3)\n"
+    "metrics._registry.write_snapshot()\n"
+    "print('ready', flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+# Scrape and report the series the worker recorded
+SCRAPE = (
+    "import json, os\n"
+    "from config import METRICS_FOLDER\n"
+    "from modules.metrics import render_prometheus\n"
+    "series = {}\n"
+    "for line in render_prometheus().splitlines():\n"
+    "    if line.startswith(('osint_http_requests_total{', 'osint_scan_duration_seconds_count{',\n"
+    "                        'osint_jobs_running ')):\n"
+    "        name, value = line.rsplit(' ', 1)\n"
+    "        series[name.split('{')[0]] = float(value)\n"
+    "print(json.dumps({'series': series, 'files': sorted(os.listdir(METRICS_FOLDER))}))\n"
+)
+
+
+def spawn(code, storage):
+    """Start code in a fresh interpreter using the given storage folder"""
+    env = dict(os.environ, OSINT_STORAGE_DIR=storage)
+    return subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def collect(process, timeout=60):
+    """Wait for a spawned interpreter; returns its JSON output"""
+    stdout, stderr = process.communicate(timeout=timeout)
+    assert process.returncode == 0, stderr[-2000:]
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def start_worker(storage):
+    """Start a WORKER and wait until its snapshot is written"""
+    worker = spawn(WORKER, storage)
+    assert worker.stdout.readline().strip() == 'ready', worker.stderr.read()[-2000:]
+    return worker
+
+
+def test_dead_worker_counters_kept():
+    """Killing a worker leaves counters and histogram counts where they were"""
+    print("\n🔍 TEST 1: Exited Worker's Counters Kept")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as storage:
+        first, second = start_worker(storage), start_worker(storage)
+        try:
+            before = collect(spawn(SCRAPE, storage))
+            first.kill()
+            first.wait()
+            after = collect(spawn(SCRAPE, storage))
+            second.kill()
+            second.wait()
+            after_both = collect(spawn(SCRAPE, storage))
+            again = collect(spawn(SCRAPE, storage))
+        finally:
+            for worker in (first, second):
+                if worker.poll() is None:
+                    worker.kill()
+                worker.communicate()
+
+    print(f"   Requests counter: {before['series']['osint_http_requests_total']:.0f} before, "
+          f"{after['series']['osint_http_requests_total']:.0f} after one kill, "
+          f"{after_both['series']['osint_http_requests_total']:.0f} after both")
+    for report in (before, after, after_both, again):
+        assert report['series']['osint_http_requests_total'] == 10, report
+        assert report['series']['osint_scan_duration_seconds_count'] == 2, report
+    assert before['series']['osint_jobs_running'] == 6, before
+    assert after['series']['osint_jobs_running'] == 3, after
+    # Only the scraping process's own gauge (no jobs) is left
+    assert after_both['series']['osint_jobs_running'] == 0, after_both
+    assert after_both['files'] == ['dead.json'], after_both['files']
+    print("✅ PASSED: Counters held at 10 while workers exited; their gauges dropped")
+
+
+def test_concurrent_scrapes_fold_once():
+    """Scrapes racing to fold the same exited worker count it once"""
+    print("\n🔍 TEST 2: Concurrent Scrapes Fold Once")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as storage:
+        workers = [start_worker(storage) for _ in range(3)]
+        for worker in workers:
+            worker.kill()
+            worker.communicate()
+        start_at = time.time() + 1
+        scrape = f"import time\ntime.sleep(max(0, {start_at} - time.time()))\n" + SCRAPE
+        reports = [collect(process) for process in [spawn(scrape, storage) for _ in range(4)]]
+
+    totals = [report['series']['osint_http_requests_total'] for report in reports]
+    assert totals == [15] * 4, totals
+    print("✅ PASSED: 4 simultaneous scrapes all saw 15 requests from 3 exited workers")
+
+
+def test_pid_alive():
+    """The shared liveness check tells running and exited processes apart"""
+    print("\n🔍 TEST 3: Process Liveness")
+    print("=" * 50)
+
+    from modules.processes import pid_alive
+
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    assert pid_alive(os.getpid())
+    assert not pid_alive(exited.pid)
+    assert not pid_alive(None) and not pid_alive(0)
+    print("✅ PASSED: This process alive, an exited one not")
+
+
+def run_all_tests():
+    """Run all metrics tests"""
+    print("\n" + "=" * 50)
+    print("  METRICS TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("Exited Worker's Counters", test_dead_worker_counters_kept),
+                       ("Concurrent Scrapes", test_concurrent_scrapes_fold_once),
+                       ("Process Liveness", test_pid_alive)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)
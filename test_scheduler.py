@@ -0,0 +1,200 @@
+"""
+Scheduler Testing Script
+Checks the order and limits the job queue applies when claiming jobs
+
+- An 'interactive' job is claimed before 'batch' jobs queued earlier
+- An upstream at its SCHEDULER_UPSTREAM_LIMITS share holds back only the
+  job types that call it
+- Jobs left 'running' by a worker that died are queued again (or failed
+  after SCHEDULER_MAX_ATTEMPTS); jobs of live workers are left alone
+- Nominatim requests from several worker processes stay
+  NOMINATIM_MIN_INTERVAL apart
+
+The checks run in fresh interpreters with their own storage folder and
+claim jobs directly (no dispatcher threads), so no server or network
+access is needed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Test job types: two on an upstream limited to 1 running job, one without
+SETUP = (
+    "import json, os, time\n"
+    "from modules import scheduler\n"
+    "from modules.scheduler import register_job_type, submit_job, _claim, _recover, _connect\n"
+    "scheduler.SCHEDULER_UPSTREAM_LIMITS['test_upstream'] = 1\n"
+    "register_job_type('limited', lambda target, options: {}, pool='io', upstreams=('test_upstream',))\n"
+    "register_job_type('limited_cpu', lambda target, options: {}, pool='cpu', upstreams=('test_upstream',))\n"
+    "register_job_type('free', lambda target, options: {}, pool='io')\n"
+    "def claim(pool='io'):\n"
+    "    job = _claim(pool, 'test-token')\n"
+    "    return job and job['target']\n"
+)
+
+
+def spawn(code, storage):
+    """Start code in a fresh interpreter using the given storage folder"""
+    env = dict(os.environ, OSINT_STORAGE_DIR=storage)
+    return subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def collect(process, timeout=60):
+    """Wait for a spawned interpreter; returns its JSON output"""
+    stdout, stderr = process.communicate(timeout=timeout)
+    assert process.returncode == 0, stderr[-2000:]
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def test_priority_order():
+    """Interactive jobs are claimed before older batch jobs"""
+    print("\n🔍 TEST 1: Priority Order")
+    print("=" * 50)
+
+    code = SETUP + (
+        "for i in range(3):\n"
+        "    submit_job('free', f'batch-{i}', 'session-a', priority='batch')\n"
+        "    time.sleep(0.01)\n"
+        "submit_job('free', 'interactive', 'session-b', priority='interactive')\n"
+        "print(json.dumps([claim() for _ in range(5)]))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        order = collect(spawn(code, storage))
+
+    assert order[0] == 'interactive', order
+    assert set(order[1:4]) == {'batch-0', 'batch-1', 'batch-2'} and order[4] is None, order
+    print("✅ PASSED: Interactive job claimed first, then the batch jobs")
+
+
+def test_upstream_limit_blocks_only_its_jobs():
+    """An upstream at its limit holds back only job types that call it"""
+    print("\n🔍 TEST 2: Upstream Limit")
+    print("=" * 50)
+
+    code = SETUP + (
+        "for target in ('limited-1', 'limited-2'):\n"
+        "    submit_job('limited', target, 'session-a', priority='interactive')\n"
+        "    time.sleep(0.01)\n"
+        "submit_job('limited_cpu', 'limited-cpu', 'session-a', priority='interactive')\n"
+        "submit_job('free', 'free', 'session-a', priority='batch')\n"
+        "report = {'first': claim(), 'second': claim(), 'cpu': claim('cpu')}\n"
+        "# The running 'limited' job finishes; its upstream slot frees up\n"
+        "_connect().execute(\"UPDATE jobs SET status = 'done' WHERE target = ?\", (report['first'],))\n"
+        "report['after_finish'] = claim()\n"
+        "print(json.dumps(report))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        report = collect(spawn(code, storage))
+
+    assert report['first'] == 'limited-1', report
+    assert report['second'] == 'free', report
+    assert report['cpu'] is None, report
+    assert report['after_finish'] == 'limited-2', report
+    print("✅ PASSED: Limited jobs waited (in both pools) while an unlimited batch job started")
+
+
+def test_dead_owner_jobs_recovered():
+    """Jobs running under a dead pid are requeued, or failed after the last attempt"""
+    print("\n🔍 TEST 3: Dead Worker Recovery")
+    print("=" * 50)
+
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+
+    code = SETUP + (
+        "from config import SCHEDULER_MAX_ATTEMPTS\n"
+        "for target, priority in (('orphaned', 'interactive'), ('exhausted', 'interactive'), ('alive', 'batch')):\n"
+        "    submit_job('free', target, 'session-a', priority=priority)\n"
+        "    time.sleep(0.01)\n"
+        "claimed = [claim() for _ in range(3)]\n"
+        "conn = _connect()\n"
+        f"conn.execute(\"UPDATE jobs SET owner_pid = ?, owner_token = 'dead' WHERE target != 'alive'\", ({dead.pid},))\n"
+        "conn.execute(\"UPDATE jobs SET attempts = ? WHERE target = 'exhausted'\", (SCHEDULER_MAX_ATTEMPTS,))\n"
+        "conn.execute(\"UPDATE jobs SET owner_pid = ?, owner_token = 'other' WHERE target = 'alive'\", (os.getppid(),))\n"
+        "recovered = _recover('test-token')\n"
+        "status = {row['target']: [row['status'], row['owner_pid'], row['error']]\n"
+        "          for row in conn.execute('SELECT target, status, owner_pid, error FROM jobs')}\n"
+        "print(json.dumps({'claimed': claimed, 'recovered': recovered, 'status': status,\n"
+        "                  'reclaimed': claim()}))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        report = collect(spawn(code, storage))
+
+    status = report['status']
+    assert sorted(report['claimed']) == ['alive', 'exhausted', 'orphaned'], report
+    assert report['recovered'] == 2, report
+    assert status['orphaned'][:2] == ['queued', None], status
+    assert status['exhausted'][0] == 'failed' and status['exhausted'][2], status
+    assert status['alive'][:2] == ['running', os.getpid()], status
+    assert report['reclaimed'] == 'orphaned', report
+    print("✅ PASSED: Dead worker's jobs requeued or failed; the live worker's job kept running")
+
+
+def test_nominatim_spacing_across_processes():
+    """Reverse-geocoding requests from several processes stay NOMINATIM_MIN_INTERVAL apart"""
+    print("\n🔍 TEST 4: Nominatim Spacing Across Workers")
+    print("=" * 50)
+
+    start_at = time.time() + 2
+    code = (
+        "import json, time\n"
+        "from modules import image_intel\n"
+        "image_intel.NOMINATIM_MIN_INTERVAL = 0.3\n"
+        f"time.sleep(max(0, {start_at} - time.time()))\n"
+        "times = []\n"
+        "for _ in range(2):\n"
+        "    image_intel._wait_for_nominatim_slot()\n"
+        "    times.append(time.time())\n"
+        "print(json.dumps(times))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        processes = [spawn(code, storage) for _ in range(3)]
+        times = sorted(t for process in processes for t in collect(process))
+
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    print(f"   Smallest gap between 6 requests from 3 processes: {min(gaps):.2f}s")
+    assert min(gaps) >= 0.25, gaps
+    print("✅ PASSED: Requests from all workers were spaced out")
+
+
+def run_all_tests():
+    """Run all scheduler tests"""
+    print("\n" + "=" * 50)
+    print("  SCHEDULER TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("Priority Order", test_priority_order),
+                       ("Upstream Limit", test_upstream_limit_blocks_only_its_jobs),
+                       ("Dead Worker Recovery", test_dead_owner_jobs_recovered),
+                       ("Nominatim Spacing", test_nominatim_spacing_across_processes)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)
@@ -0,0 +1,233 @@
+"""
+Single-Flight Testing Script
+Checks that concurrent identical scans share one execution
+
+- Threads of one process asking for the same key run the scan once and
+  all get the leader's result
+- Worker processes sharing the coordination store run it once as well
+- A leader that fails, hangs or dies never leaves the others waiting:
+  they get the error, time out, or take the key over
+
+The checks run in fresh interpreters with their own storage folder, so
+no server or network access is needed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def spawn(code, storage):
+    """Start code in a fresh interpreter using the given storage folder"""
+    env = dict(os.environ, OSINT_STORAGE_DIR=storage)
+    return subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def collect(process, timeout=60):
+    """Wait for a spawned interpreter; returns its JSON output"""
+    stdout, stderr = process.communicate(timeout=timeout)
+    assert process.returncode == 0, stderr[-2000:]
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def test_threads_share_one_execution():
+    """Identical requests from many threads run once and share the result"""
+    print("\n🔍 TEST 1: Threads Share One Execution")
+    print("=" * 50)
+
+    code = (
+        "import json, threading, time\n"
+        "from modules.single_flight import single_flight, scan_key\n"
+        "calls = []\n"
+        "def scan():\n"
+        "    calls.append(1)\n"
+        "    time.sleep(0.3)\n"
+        "    return {'target': 'example.com', 'call': len(calls)}\n"
+        "barrier = threading.Barrier(16)\n"
+        "outcomes = []\n"
+        "def request(target):\n"
+        "    barrier.wait()\n"
+        "    outcomes.append(single_flight('domain', scan_key('domain', target), scan))\n"
+        "targets = ['example.com', 'EXAMPLE.com.', ' example.com'] * 5 + ['Example.COM']\n"
+        "threads = [threading.Thread(target=request, args=(t,)) for t in targets]\n"
+        "for thread in threads: thread.start()\n"
+        "for thread in threads: thread.join()\n"
+        "print(json.dumps({'calls': len(calls), 'outcomes': outcomes}))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        output = collect(spawn(code, storage))
+
+    results = [result for result, _ in output['outcomes']]
+    coalesced = [flag for _, flag in output['outcomes']]
+    assert output['calls'] == 1, output['calls']
+    assert len(results) == 16 and all(result == {'target': 'example.com', 'call': 1} for result in results)
+    assert coalesced.count(False) == 1 and coalesced.count(True) == 15, coalesced
+    print("✅ PASSED: 16 requests (differently spelled targets), 1 execution, same result")
+
+
+def test_processes_share_one_execution():
+    """Identical requests from several worker processes run once"""
+    print("\n🔍 TEST 2: Processes Share One Execution")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as storage:
+        executions = os.path.join(storage, 'executions.log')
+        start_at = time.time() + 2
+        code = (
+            "import json, os, time\n"
+            "from modules.single_flight import single_flight, scan_key\n"
+            "def scan():\n"
+            f"    with open({executions!r}, 'a') as f:\n"
+            "        f.write(f'{os.getpid()}\\n')\n"
+            "    time.sleep(1.5)\n"
+            "    return {'leader': os.getpid()}\n"
+            f"time.sleep(max(0, {start_at} - time.time()))\n"
+            "result, coalesced = single_flight('ip', scan_key('ip', '192.0.2.1'), scan)\n"
+            "print(json.dumps({'pid': os.getpid(), 'result': result, 'coalesced': coalesced}))\n"
+        )
+        outputs = [collect(process) for process in [spawn(code, storage) for _ in range(4)]]
+        with open(executions) as f:
+            runs = f.read().split()
+
+    assert len(runs) == 1, runs
+    leader = int(runs[0])
+    assert all(output['result'] == {'leader': leader} for output in outputs), outputs
+    assert [output['coalesced'] for output in outputs].count(False) == 1
+    assert [output for output in outputs if not output['coalesced']][0]['pid'] == leader
+    print("✅ PASSED: 4 workers, 1 execution, the leader's result everywhere")
+
+
+def test_failed_leader_releases_followers():
+    """Followers get a failing leader's error and stop waiting on a hung one"""
+    print("\n🔍 TEST 3: Failing And Hung Leaders")
+    print("=" * 50)
+
+    code = (
+        "import json, threading, time\n"
+        "from modules.single_flight import single_flight, scan_key, SingleFlightTimeout\n"
+        "def failing():\n"
+        "    time.sleep(0.3)\n"
+        "    raise ValueError('upstream down')\n"
+        "def hanging():\n"
+        "    time.sleep(3)\n"
+        "    return {'late': True}\n"
+        "def follow(key, function, timeout, outcomes):\n"
+        "    start = time.monotonic()\n"
+        "    try:\n"
+        "        single_flight('domain', key, function, timeout=timeout)\n"
+        "        outcome = 'result'\n"
+        "    except Exception as e:\n"
+        "        outcome = type(e).__name__\n"
+        "    outcomes.append((outcome, time.monotonic() - start))\n"
+        "report = {}\n"
+        "for name, function, key, follower_timeout in (\n"
+        "        ('failing', failing, scan_key('domain', 'failing.example'), 10),\n"
+        "        ('hanging', hanging, scan_key('domain', 'hanging.example'), 0.5)):\n"
+        "    outcomes = []\n"
+        "    leader = threading.Thread(target=follow, args=(key, function, 10, []))\n"
+        "    leader.start()\n"
+        "    time.sleep(0.1)\n"
+        "    followers = [threading.Thread(target=follow, args=(key, function, follower_timeout, outcomes))\n"
+        "                 for _ in range(4)]\n"
+        "    for thread in followers: thread.start()\n"
+        "    for thread in followers: thread.join()\n"
+        "    report[name] = outcomes\n"
+        "    leader.join()\n"
+        "print(json.dumps(report))\n"
+    )
+    with tempfile.TemporaryDirectory() as storage:
+        output = collect(spawn(code, storage))
+
+    assert [outcome for outcome, _ in output['failing']] == ['ValueError'] * 4, output['failing']
+    assert all(elapsed < 2 for _, elapsed in output['failing'])
+    assert [outcome for outcome, _ in output['hanging']] == ['SingleFlightTimeout'] * 4, output['hanging']
+    assert all(elapsed < 2 for _, elapsed in output['hanging']), output['hanging']
+    print("✅ PASSED: Leader's error passed on; followers of a hung leader timed out")
+
+
+def test_dead_leader_taken_over():
+    """A key claimed by a killed worker is taken over without waiting for its claim to expire"""
+    print("\n🔍 TEST 4: Dead Leader Taken Over")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as storage:
+        started = os.path.join(storage, 'leader.started')
+        leader = spawn(
+            "import time\n"
+            "from modules.single_flight import single_flight, scan_key\n"
+            "def scan():\n"
+            f"    open({started!r}, 'w').close()\n"
+            "    time.sleep(60)\n"
+            "single_flight('domain', scan_key('domain', 'example.com'), scan, timeout=60)\n",
+            storage
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not os.path.exists(started):
+                assert time.monotonic() < deadline and leader.poll() is None, 'Leader never started'
+                time.sleep(0.05)
+            follower = spawn(
+                "import json, os, time\n"
+                "from modules.single_flight import single_flight, scan_key\n"
+                "start = time.monotonic()\n"
+                "result, coalesced = single_flight('domain', scan_key('domain', 'example.com'),\n"
+                "                                  lambda: {'runner': os.getpid()}, timeout=30)\n"
+                "print(json.dumps({'pid': os.getpid(), 'result': result, 'coalesced': coalesced,\n"
+                "                  'elapsed': time.monotonic() - start}))\n",
+                storage
+            )
+            time.sleep(1)
+            leader.kill()
+            leader.wait()
+            output = collect(follower)
+        finally:
+            if leader.poll() is None:
+                leader.kill()
+            leader.communicate()
+
+    print(f"   Follower finished {output['elapsed']:.1f}s after asking (claim lifetime 60s)")
+    assert output['result'] == {'runner': output['pid']} and not output['coalesced'], output
+    assert output['elapsed'] < 10, output['elapsed']
+    print("✅ PASSED: Follower took over the dead leader's key and ran the scan")
+
+
+def run_all_tests():
+    """Run all single-flight tests"""
+    print("\n" + "=" * 50)
+    print("  SINGLE-FLIGHT TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("Threads", test_threads_share_one_execution),
+                       ("Processes", test_processes_share_one_execution),
+                       ("Failing And Hung Leaders", test_failed_leader_releases_followers),
+                       ("Dead Leader", test_dead_leader_taken_over)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)
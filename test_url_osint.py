@@ -0,0 +1,215 @@
+"""
+URL OSINT Testing Script
+Checks url_osint against the local web stand-in
+
+- Redirect chains are followed and the landing page fingerprinted
+- Redirect hops shared by many URLs (shortener, tracker) are fetched once
+- Size, redirect and address limits hold
+- A host whose DNS answer turns private after the check is not fetched
+- The redirect cache stays within its size, dropping expired entries
+  first and then the oldest
+
+The checks run in fresh interpreters pointed at the stand-ins, so no
+server or network access is needed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.standins import start_standins
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_checks(code, standin_env):
+    """Run code in a fresh interpreter pointed at the stand-ins; returns its JSON output"""
+    with tempfile.TemporaryDirectory() as storage:
+        env = dict(os.environ, OSINT_STORAGE_DIR=storage, **standin_env)
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_redirect_chain():
+    """Every hop is recorded and the landing page fingerprinted"""
+    print("\n🔍 TEST 1: Redirect Chain")
+    print("=" * 50)
+
+    standins, env = start_standins()
+    try:
+        result = run_checks(
+            "import json\n"
+            "from modules.url_osint import scan_url\n"
+            f"print(json.dumps(scan_url('{standins['web'].url}/short/abc')))\n",
+            env
+        )
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    assert result['status'] == 'Reachable', result['errors']
+    assert [hop['status_code'] for hop in result['redirects']] == [301, 302]
+    assert [hop['location'] for hop in result['redirects']] == ['/track/abc', '/page/abc']
+    assert result['final_url'].endswith('/page/abc') and result['status_code'] == 200
+    assert result['page']['title'] == 'Bench Page abc' and len(result['page']['sha256']) == 64
+    print("✅ PASSED: Hops recorded, landing page titled and hashed")
+
+
+def test_shared_hops_fetched_once():
+    """Many URLs through the same shortener and tracker fetch those once"""
+    print("\n🔍 TEST 2: Shared Redirect Hops Fetched Once")
+    print("=" * 50)
+
+    standins, env = start_standins(latency=0.01)
+    try:
+        summary = run_checks(
+            "import json\n"
+            "from modules.url_osint import scan_urls\n"
+            f"result = scan_urls([f'{standins['web'].url}/ad/{{i}}' for i in range(200)])\n"
+            "print(json.dumps({'summary': result['summary'],\n"
+            "                  'redirects': sorted({entry['redirects'] for entry in result['results']})}))\n",
+            env
+        )
+        hits = standins['web'].hits
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    assert summary == {'summary': {'Reachable': 200}, 'redirects': [3]}, summary
+    print(f"   /short/campaign: {hits['/short/campaign']} fetch, /track/campaign: {hits['/track/campaign']} fetch")
+    assert hits['/short/campaign'] == 1 and hits['/track/campaign'] == 1, hits
+    # Uncacheable hops and landing pages are fetched every time
+    assert hits['/ad/0'] == 1 and hits['/page/campaign'] == 200
+    print("✅ PASSED: Shortener and tracker fetched once for 200 URLs")
+
+
+def test_limits():
+    """Oversized pages, redirect loops, bad URLs and private addresses are handled"""
+    print("\n🔍 TEST 3: Limits")
+    print("=" * 50)
+
+    standins, env = start_standins()
+    base = standins['web'].url
+    code = (
+        "import json\n"
+        "from config import URL_MAX_BYTES\n"
+        "from modules.url_osint import scan_url\n"
+        f"results = [scan_url(url) for url in ('{base}/big', '{base}/loop', 'ftp://example.com/', '{base}/status/404')]\n"
+        "print(json.dumps({'max_bytes': URL_MAX_BYTES, 'results': results}))\n"
+    )
+    try:
+        allowed = run_checks(code, env)
+        blocked = run_checks(code, {key: value for key, value in env.items() if key != 'OSINT_URL_ALLOW_PRIVATE'})
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    big, loop, invalid, missing = allowed['results']
+    assert big['status'] == 'Reachable' and big['page']['truncated'], big['page']
+    assert big['page']['bytes'] == allowed['max_bytes'] and big['page']['title'] == 'Big'
+    assert loop['status'] == 'Too many redirects', loop['status']
+    assert invalid['status'] == 'Invalid', invalid['status']
+    assert missing['status'] == 'HTTP error' and missing['status_code'] == 404
+    assert {result['status'] for result in blocked['results']} == {'Blocked', 'Invalid'}
+    print("✅ PASSED: Download capped, loops stopped, private addresses blocked")
+
+
+def test_dns_rebinding_blocked():
+    """A host that resolves to a public address for the check and a private one after is not fetched"""
+    print("\n🔍 TEST 4: DNS Rebinding")
+    print("=" * 50)
+
+    standins, env = start_standins()
+    web = standins['web']
+    code = (
+        "import json, socket\n"
+        "from modules.url_osint import scan_url\n"
+        "real_getaddrinfo = socket.getaddrinfo\n"
+        "answers = []\n"
+        "def rebinding_getaddrinfo(host, port, *args, **kwargs):\n"
+        "    if host != 'rebind.test':\n"
+        "        return real_getaddrinfo(host, port, *args, **kwargs)\n"
+        "    answers.append('8.8.8.8' if not answers else '127.0.0.1')\n"
+        "    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (answers[-1], port or 0))]\n"
+        "socket.getaddrinfo = rebinding_getaddrinfo\n"
+        f"result = scan_url('http://rebind.test:{web.server.server_port}/page/rebind')\n"
+        "print(json.dumps({'status': result['status'], 'errors': result['errors'], 'answers': answers}))\n"
+    )
+    try:
+        result = run_checks(code, {key: value for key, value in env.items() if key != 'OSINT_URL_ALLOW_PRIVATE'})
+        hits = dict(web.hits)
+    finally:
+        for standin in standins.values():
+            standin.stop()
+
+    assert result['answers'] == ['8.8.8.8', '127.0.0.1'], result
+    assert result['status'] == 'Blocked', result
+    assert '/page/rebind' not in hits, hits
+    print("✅ PASSED: The connection re-checked the changed answer and was refused")
+
+
+def test_redirect_cache_bounded():
+    """A full redirect cache drops expired entries, then the oldest"""
+    print("\n🔍 TEST 5: Redirect Cache Size")
+    print("=" * 50)
+
+    result = run_checks(
+        "import json\n"
+        "from modules import url_osint\n"
+        "url_osint._CACHE_MAX = 4\n"
+        "cache = url_osint._HopCache()\n"
+        "sizes = {}\n"
+        "for url, ttl in (('a', 60), ('b', -1), ('c', 60), ('d', 60), ('e', 60), ('f', 60), ('c', 60), ('g', 60)):\n"
+        "    cache._put(url, {'status_code': 301, 'headers': {}}, ttl)\n"
+        "    sizes[url] = list(cache._entries)\n"
+        "print(json.dumps(sizes))\n",
+        {}
+    )
+
+    # 'b' is expired when the cache fills; then the oldest go; re-put 'c' becomes the newest
+    assert result['e'] == ['a', 'c', 'd', 'e'], result
+    assert result['f'] == ['c', 'd', 'e', 'f'], result
+    assert result['c'] == ['d', 'e', 'f', 'c'], result
+    assert result['g'] == ['e', 'f', 'c', 'g'], result
+    print("✅ PASSED: Cache held at its size with unexpired entries")
+
+
+def run_all_tests():
+    """Run all URL OSINT tests"""
+    print("\n" + "=" * 50)
+    print("  URL OSINT TEST SUITE")
+    print("=" * 50)
+
+    results = []
+    for name, test in [("Redirect Chain", test_redirect_chain),
+                       ("Shared Hops", test_shared_hops_fetched_once),
+                       ("Limits", test_limits),
+                       ("DNS Rebinding", test_dns_rebinding_blocked),
+                       ("Redirect Cache Size", test_redirect_cache_bounded)]:
+        try:
+            test()
+            results.append((name, True))
+        except AssertionError as e:
+            print(f"❌ FAILED: {str(e)}")
+            results.append((name, False))
+
+    print("\n" + "=" * 50)
+    print("  TEST SUMMARY")
+    print("=" * 50)
+
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASSED' if result else '❌ FAILED'}: {test_name}")
+    print("=" * 50)
+    print(f"Results: {passed}/{len(results)} tests passed")
+    print("=" * 50)
+
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    exit(0 if run_all_tests() else 1)